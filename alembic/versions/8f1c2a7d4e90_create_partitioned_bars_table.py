@@ -0,0 +1,42 @@
+"""create partitioned bars table for intraday intervals
+
+Revision ID: 8f1c2a7d4e90
+Revises: 2e2f5c5d3b1d
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "8f1c2a7d4e90"
+down_revision: Union[str, Sequence[str], None] = "2e2f5c5d3b1d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE bars (
+            symbol_id INTEGER NOT NULL REFERENCES symbols (id),
+            interval VARCHAR(8) NOT NULL,
+            ts TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            open DOUBLE PRECISION,
+            high DOUBLE PRECISION,
+            low DOUBLE PRECISION,
+            close DOUBLE PRECISION,
+            volume DOUBLE PRECISION,
+            CONSTRAINT pk_bars PRIMARY KEY (symbol_id, interval, ts) INCLUDE (open, high, low, close, volume)
+        ) PARTITION BY RANGE (ts)
+        """
+    )
+    op.execute("CREATE INDEX ix_bars_ts_brin ON bars USING brin (ts)")
+    # Monthly partitions are created on demand by app.services.bar_store.ensure_bar_partitions;
+    # the default partition only catches rows written outside that path.
+    op.execute("CREATE TABLE bars_default PARTITION OF bars DEFAULT")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE bars CASCADE")
@@ -0,0 +1,60 @@
+"""create backtest sweep tables
+
+Revision ID: a3c9e5b71f02
+Revises: 8f1c2a7d4e90
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a3c9e5b71f02"
+down_revision: Union[str, Sequence[str], None] = "8f1c2a7d4e90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "backtest_sweeps",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("ticker", sa.String, nullable=False),
+        sa.Column("strategy_type", sa.String, nullable=False),
+        sa.Column("strategy_params", sa.JSON, nullable=True),
+        sa.Column("param_grid", sa.JSON, nullable=False),
+        sa.Column("start", sa.String, nullable=True),
+        sa.Column("end", sa.String, nullable=True),
+        sa.Column("timeframe", sa.String, nullable=True),
+        sa.Column("engine", sa.String, nullable=False, server_default="backtrader"),
+        sa.Column("initial_cash", sa.Float, nullable=False),
+        sa.Column("rank_by", sa.String, nullable=False, server_default="sharpe"),
+        sa.Column("top_n", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("combinations", sa.Integer, nullable=False),
+        sa.Column("status", sa.String, nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    op.create_table(
+        "backtest_sweep_results",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("sweep_id", sa.Integer, sa.ForeignKey("backtest_sweeps.id"), nullable=False),
+        sa.Column("rank", sa.Integer, nullable=True),
+        sa.Column("strategy_params", sa.JSON, nullable=False),
+        sa.Column("final_value", sa.Float, nullable=True),
+        sa.Column("return_pct", sa.Float, nullable=True),
+        sa.Column("sharpe", sa.Float, nullable=True),
+        sa.Column("max_drawdown", sa.Float, nullable=True),
+        sa.Column("trades", sa.Integer, nullable=True),
+        sa.Column("error", sa.String, nullable=True),
+        sa.Column("backtest_id", sa.Integer, sa.ForeignKey("backtests.id"), nullable=True),
+    )
+    op.create_index("ix_backtest_sweep_results_sweep_id", "backtest_sweep_results", ["sweep_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_backtest_sweep_results_sweep_id", table_name="backtest_sweep_results")
+    op.drop_table("backtest_sweep_results")
+    op.drop_table("backtest_sweeps")
@@ -0,0 +1,27 @@
+"""add cache_key to backtests
+
+Revision ID: c71d4b2e9a35
+Revises: a3c9e5b71f02
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c71d4b2e9a35"
+down_revision: Union[str, Sequence[str], None] = "a3c9e5b71f02"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("backtests", sa.Column("cache_key", sa.String(length=64), nullable=True))
+    op.create_index("ix_backtests_cache_key", "backtests", ["cache_key"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_backtests_cache_key", table_name="backtests")
+    op.drop_column("backtests", "cache_key")
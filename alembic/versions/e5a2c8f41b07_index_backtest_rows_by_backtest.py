@@ -0,0 +1,26 @@
+"""index backtest trades and positions by backtest
+
+Revision ID: e5a2c8f41b07
+Revises: c71d4b2e9a35
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "e5a2c8f41b07"
+down_revision: Union[str, Sequence[str], None] = "c71d4b2e9a35"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_backtest_trades_backtest_id_id", "backtest_trades", ["backtest_id", "id"])
+    op.create_index("ix_backtest_positions_backtest_id_id", "backtest_positions", ["backtest_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_backtest_positions_backtest_id_id", table_name="backtest_positions")
+    op.drop_index("ix_backtest_trades_backtest_id_id", table_name="backtest_trades")
@@ -0,0 +1,25 @@
+"""add capture to backtests
+
+Revision ID: f3b9d0c6a418
+Revises: e5a2c8f41b07
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f3b9d0c6a418"
+down_revision: Union[str, Sequence[str], None] = "e5a2c8f41b07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("backtests", sa.Column("capture", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("backtests", "capture")
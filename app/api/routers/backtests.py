@@ -1,16 +1,26 @@
+import json
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Literal, Optional, Union
 
 from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 import structlog
 
+from app.metrics import ROLLING_WINDOW
 from app.services.backtest_service import (
+    RESULT_MAX_PAGE_SIZE,
+    RESULT_PAGE_SIZE,
     run_backtest_and_save,
     get_backtest_results,
+    get_backtest_rows,
+    iter_backtest_rows,
     list_backtests,
 )
+from app.services.sweep_service import run_sweep, stream_sweep
+from app.services.universe_service import run_universe
+from app.services.walk_forward_service import run_walk_forward
 
 router = APIRouter(prefix="/backtests", tags=["backtests"])
 logger = structlog.get_logger(__name__)
@@ -26,6 +36,66 @@ class BacktestRunRequest(BaseModel):
     initial_cash: float = 100000.0
     commission: Optional[float] = None
     timeframe: Optional[str] = "1d"
+    use_stored_indicators: bool = Field(False, description="Le os indicadores da tabela indicators em vez de recalcula-los")
+    engine: str = Field("backtrader", description="Engine de simulacao: backtrader ou vectorized")
+    use_cache: bool = Field(True, description="Reaproveita um backtest identico ja salvo (mesmos parametros e precos)")
+    capture: str = Field("full", description="Nivel de captura: metrics_only, trades, equity_downsampled ou full")
+    low_memory: bool = Field(False, description="Le as barras por cursor no servidor com buffers limitados (so backtrader, sem cache)")
+    analyzers: Optional[bool] = Field(
+        None, description="Sharpe e drawdown pelos analyzers do Backtrader (padrao: so com low_memory)"
+    )
+
+
+class BacktestSweepRequest(BaseModel):
+    ticker: str
+    strategy_type: str
+    param_grid: Dict[str, Any] = Field(..., description="Valores por parametro: lista ou {start, stop, step} (stop inclusivo)")
+    strategy_params: Dict[str, Any] = Field(default_factory=dict, description="Parametros fixos para todas as combinacoes")
+    start: Optional[str] = None
+    end: Optional[str] = None
+    initial_cash: float = 100000.0
+    commission: Optional[float] = None
+    timeframe: Optional[str] = "1d"
+    engine: str = Field("backtrader", description="Engine de simulacao: backtrader ou vectorized")
+    top_n: int = Field(5, ge=0, le=50, description="Combinacoes com trades/posicoes persistidos")
+    rank_by: str = Field("sharpe", description="Metrica de ordenacao: sharpe, return_pct, max_drawdown ou final_value")
+    max_workers: Optional[int] = Field(None, ge=0, description="Processos do pool (0 = numero de CPUs)")
+
+
+class BacktestUniverseRequest(BaseModel):
+    strategy_type: str
+    tickers: Union[List[str], Literal["all"]] = Field("all", description="Lista de tickers ou 'all' para todos os simbolos")
+    strategy_params: Dict[str, Any] = Field(default_factory=dict)
+    start: Optional[str] = None
+    end: Optional[str] = None
+    initial_cash: float = 100000.0
+    commission: Optional[float] = None
+    timeframe: Optional[str] = "1d"
+    engine: str = Field("backtrader", description="Engine de simulacao: backtrader ou vectorized")
+    rank_by: str = Field("sharpe", description="Metrica de ordenacao: sharpe, return_pct, max_drawdown ou final_value")
+    max_workers: Optional[int] = Field(None, ge=0, description="Processos do pool (0 = numero de CPUs)")
+    batch_size: Optional[int] = Field(None, ge=1, description="Backtests persistidos por transacao")
+    capture: str = Field("full", description="Nivel de captura: metrics_only, trades, equity_downsampled ou full")
+
+
+class BacktestWalkForwardRequest(BaseModel):
+    ticker: str
+    strategy_type: str
+    train_bars: int = Field(..., ge=2, description="Barras da janela de otimizacao (in-sample)")
+    test_bars: int = Field(..., ge=1, description="Barras da janela de avaliacao (out-of-sample)")
+    step_bars: Optional[int] = Field(None, ge=1, description="Avanco entre folds (padrao: test_bars)")
+    anchored: bool = Field(False, description="Janela de treino sempre a partir da primeira barra")
+    param_grid: Optional[Dict[str, Any]] = Field(None, description="Grade de parametros (padrao: defaults da estrategia x0.5/x1/x1.5)")
+    strategy_params: Dict[str, Any] = Field(default_factory=dict)
+    start: Optional[str] = None
+    end: Optional[str] = None
+    initial_cash: float = 100000.0
+    commission: Optional[float] = None
+    timeframe: Optional[str] = "1d"
+    engine: str = Field("backtrader", description="Engine de simulacao: backtrader ou vectorized")
+    rank_by: str = Field("sharpe", description="Metrica de ordenacao: sharpe, return_pct, max_drawdown ou final_value")
+    max_workers: Optional[int] = Field(None, ge=0, description="Processos do pool (0 = numero de CPUs)")
+    resume: bool = Field(True, description="Reaproveita folds do checkpoint de uma execucao identica")
 
 
 def _schedule_job(background_tasks: BackgroundTasks, *, payload: Dict[str, Any]):
@@ -64,6 +134,56 @@ def run_backtest(
     return result
 
 
+@router.post("/sweep")
+def run_sweep_endpoint(
+    req: BacktestSweepRequest,
+    stream: bool = Query(False, description="Retorna NDJSON com uma linha por combinacao"),
+):
+    payload = req.model_dump()
+    try:
+        if stream:
+            events = stream_sweep(**payload)
+            lines = (json.dumps(event, default=str) + "\n" for event in events)
+            return StreamingResponse(lines, media_type="application/x-ndjson")
+        result = run_sweep(**payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception as exc:
+        logger.exception("backtest.sweep.error", ticker=req.ticker, strategy_type=req.strategy_type)
+        raise HTTPException(status_code=500, detail=str(exc))
+
+    logger.info("backtest.sweep.sync_completed", ticker=req.ticker, strategy_type=req.strategy_type, sweep_id=result.get("id"))
+    return result
+
+
+@router.post("/universe")
+def run_universe_endpoint(req: BacktestUniverseRequest):
+    try:
+        result = run_universe(**req.model_dump())
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception as exc:
+        logger.exception("backtest.universe.error", strategy_type=req.strategy_type)
+        raise HTTPException(status_code=500, detail=str(exc))
+
+    logger.info("backtest.universe.sync_completed", strategy_type=req.strategy_type, completed=result["completed"], failed=result["failed"])
+    return result
+
+
+@router.post("/walk-forward")
+def run_walk_forward_endpoint(req: BacktestWalkForwardRequest):
+    try:
+        result = run_walk_forward(**req.model_dump())
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except Exception as exc:
+        logger.exception("backtest.walk_forward.error", ticker=req.ticker, strategy_type=req.strategy_type)
+        raise HTTPException(status_code=500, detail=str(exc))
+
+    logger.info("backtest.walk_forward.sync_completed", ticker=req.ticker, strategy_type=req.strategy_type, job_id=result["job_id"])
+    return result
+
+
 @router.get("/")
 def list_backtests_endpoint(
     page: int = Query(1, ge=1),
@@ -96,9 +216,60 @@ def list_backtests_endpoint(
     return result
 
 
+def _split_fields(fields: Optional[str]) -> Optional[List[str]]:
+    return [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+
+
 @router.get("/{backtest_id}/results")
-def get_results(backtest_id: int):
-    result = get_backtest_results(backtest_id)
+def get_results(
+    backtest_id: int,
+    rolling_window: int = Query(ROLLING_WINDOW, ge=2, description="Janela, em dias, do Sharpe movel de rolling_metrics"),
+    fields: Optional[str] = Query(
+        None, description="Secoes separadas por virgula: metrics, trades, positions, equity_curve, rolling_metrics (padrao: todas)"
+    ),
+):
+    try:
+        result = get_backtest_results(backtest_id, rolling_window=rolling_window, fields=_split_fields(fields))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     if not result:
         raise HTTPException(status_code=404, detail="Backtest nao encontrado")
-    return result
\ No newline at end of file
+    return result
+
+
+def _rows_response(backtest_id: int, kind: str, after: Optional[int], limit: int, fields: Optional[str], stream: bool):
+    try:
+        if stream:
+            rows = iter_backtest_rows(backtest_id, kind, after=after, fields=_split_fields(fields))
+        else:
+            rows = get_backtest_rows(backtest_id, kind, after=after, limit=limit, fields=_split_fields(fields))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if rows is None:
+        raise HTTPException(status_code=404, detail="Backtest nao encontrado")
+    if stream:
+        lines = (json.dumps(row, default=str) + "\n" for row in rows)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    return rows
+
+
+@router.get("/{backtest_id}/trades")
+def get_trades(
+    backtest_id: int,
+    after: Optional[int] = Query(None, description="next_after da pagina anterior"),
+    limit: int = Query(RESULT_PAGE_SIZE, ge=1, le=RESULT_MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Colunas separadas por virgula: date, operation, price, size, pnl"),
+    stream: bool = Query(False, description="Retorna NDJSON com todas as linhas apos after"),
+):
+    return _rows_response(backtest_id, "trades", after, limit, fields, stream)
+
+
+@router.get("/{backtest_id}/positions")
+def get_positions(
+    backtest_id: int,
+    after: Optional[int] = Query(None, description="next_after da pagina anterior"),
+    limit: int = Query(RESULT_PAGE_SIZE, ge=1, le=RESULT_MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Colunas separadas por virgula: date, position, value, equity"),
+    stream: bool = Query(False, description="Retorna NDJSON com todas as linhas apos after"),
+):
+    return _rows_response(backtest_id, "positions", after, limit, fields, stream)
\ No newline at end of file
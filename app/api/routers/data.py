@@ -2,6 +2,7 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 from app.services.data_collector import update_prices_for_ticker
 from app.services.indicator_service import update_sma_for_ticker
+from app.services.price_cache import price_cache
 
 router = APIRouter(prefix="/data", tags=["Data"])
 
@@ -15,4 +16,9 @@ class IndicatorRequest(BaseModel):
 def update_indicators(req: IndicatorRequest):
     prices_summary = update_prices_for_ticker(req.ticker)
     indicators_summary = update_sma_for_ticker(req.ticker, req.window)
-    return {"prices": prices_summary, "indicators": indicators_summary}
\ No newline at end of file
+    return {"prices": prices_summary, "indicators": indicators_summary}
+
+
+@router.get("/cache/stats")
+def price_cache_stats():
+    return price_cache.stats()
\ No newline at end of file
@@ -12,6 +12,18 @@ class Settings:
 
     ENABLE_SCHEDULER: bool = os.getenv("ENABLE_SCHEDULER", "false").lower() in {"1", "true", "yes"}
     SCHEDULER_INTERVAL_MINUTES: int = int(os.getenv("SCHEDULER_INTERVAL_MINUTES", "60"))
+    SCHEDULER_INDICATORS: str = os.getenv("SCHEDULER_INDICATORS", "SMA:20")
+
+    PRICE_CACHE_MAX_SYMBOLS: int = int(os.getenv("PRICE_CACHE_MAX_SYMBOLS", "64"))
+    PRICE_CACHE_WARMUP_TOP_N: int = int(os.getenv("PRICE_CACHE_WARMUP_TOP_N", "0"))
+    PRICE_MIRROR_DIR: str = os.getenv("PRICE_MIRROR_DIR", "")
+    PRICE_REFRESH_OVERLAP_DAYS: int = int(os.getenv("PRICE_REFRESH_OVERLAP_DAYS", "5"))
+
+    SWEEP_MAX_WORKERS: int = int(os.getenv("SWEEP_MAX_WORKERS", "0"))  # 0 = os.cpu_count()
+    SWEEP_MAX_COMBINATIONS: int = int(os.getenv("SWEEP_MAX_COMBINATIONS", "5000"))
+    UNIVERSE_BATCH_SIZE: int = int(os.getenv("UNIVERSE_BATCH_SIZE", "50"))  # backtests por transacao
+    WALK_FORWARD_CHECKPOINT_DIR: str = os.getenv("WALK_FORWARD_CHECKPOINT_DIR", "checkpoints/walk_forward")
+    LOW_MEMORY_FETCH_ROWS: int = int(os.getenv("LOW_MEMORY_FETCH_ROWS", "10000"))  # linhas por fetch do cursor
 
     SQLALCHEMY_DATABASE_URL: str = (
         f"postgresql+psycopg2://{POSTGRES_USER}:{POSTGRES_PASSWORD}"
@@ -0,0 +1,117 @@
+"""Bulk ``INSERT ... ON CONFLICT DO NOTHING`` helpers.
+
+On PostgreSQL rows are streamed with ``COPY`` into a temporary staging table and
+moved with ``INSERT ... SELECT``, which sidesteps the 65535 bind-parameter limit
+of a single multi-row ``VALUES`` statement. Other dialects (SQLite in the test
+suite) fall back to multi-row inserts chunked below their parameter limit.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import itertools
+import math
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Iterable, List, Sequence
+
+from sqlalchemy import Table
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+PG_MAX_BIND_PARAMS = 65535
+SQLITE_MAX_BIND_PARAMS = 32766
+COPY_CHUNK_ROWS = 50_000
+
+_staging_ids = itertools.count()
+
+
+@dataclass(frozen=True)
+class BulkInsertResult:
+    inserted: int
+    skipped: int
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return "NaN" if math.isnan(value) else repr(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _rows_to_csv(rows: Sequence[dict], columns: Sequence[str]) -> io.StringIO:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for row in rows:
+        writer.writerow([_csv_value(row[col]) for col in columns])
+    buffer.seek(0)
+    return buffer
+
+
+def _chunks(rows: List[dict], size: int) -> Iterable[List[dict]]:
+    for offset in range(0, len(rows), size):
+        yield rows[offset : offset + size]
+
+
+def _copy_insert(db, table: Table, rows: List[dict], conflict_columns: Sequence[str], chunk_rows: int) -> int:
+    columns = list(rows[0].keys())
+    column_list = ", ".join(f'"{col}"' for col in columns)
+    staging = f"_staging_{table.name}_{next(_staging_ids)}"
+
+    raw_connection = db.connection().connection.driver_connection
+    inserted = 0
+    with raw_connection.cursor() as cursor:
+        # A failed statement aborts the transaction, so no cleanup can run after it:
+        # the rollback discards the staging table, and ON COMMIT DROP covers the rest.
+        cursor.execute(
+            f'CREATE TEMP TABLE "{staging}" ON COMMIT DROP AS SELECT {column_list} FROM "{table.name}" WITH NO DATA'
+        )
+        for chunk in _chunks(rows, chunk_rows):
+            cursor.copy_expert(
+                f'COPY "{staging}" ({column_list}) FROM STDIN WITH (FORMAT csv)',
+                _rows_to_csv(chunk, columns),
+            )
+            cursor.execute(
+                f'INSERT INTO "{table.name}" ({column_list}) '
+                f'SELECT {column_list} FROM "{staging}" '
+                f'ON CONFLICT ({", ".join(conflict_columns)}) DO NOTHING'
+            )
+            inserted += max(cursor.rowcount, 0)
+            cursor.execute(f'TRUNCATE "{staging}"')
+        cursor.execute(f'DROP TABLE "{staging}"')
+    return inserted
+
+
+def _multirow_insert(db, table: Table, rows: List[dict], conflict_columns: Sequence[str], max_params: int) -> int:
+    insert = sqlite_insert if db.get_bind().dialect.name == "sqlite" else pg_insert
+    chunk_size = max(max_params // max(len(rows[0]), 1), 1)
+    inserted = 0
+    for chunk in _chunks(rows, chunk_size):
+        stmt = insert(table).values(chunk).on_conflict_do_nothing(index_elements=list(conflict_columns))
+        result = db.execute(stmt)
+        inserted += result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(chunk)
+    return inserted
+
+
+def bulk_insert_ignore_duplicates(
+    db,
+    table: Table,
+    rows: Sequence[dict],
+    conflict_columns: Sequence[str],
+    chunk_rows: int = COPY_CHUNK_ROWS,
+) -> BulkInsertResult:
+    """Insert ``rows`` skipping conflicts on ``conflict_columns``; the caller commits."""
+    rows = list(rows)
+    if not rows:
+        return BulkInsertResult(inserted=0, skipped=0)
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        inserted = _copy_insert(db, table, rows, conflict_columns, chunk_rows)
+    else:
+        max_params = SQLITE_MAX_BIND_PARAMS if dialect == "sqlite" else PG_MAX_BIND_PARAMS
+        inserted = _multirow_insert(db, table, rows, conflict_columns, max_params)
+    return BulkInsertResult(inserted=inserted, skipped=len(rows) - inserted)
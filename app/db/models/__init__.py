@@ -1,4 +1,10 @@
 from app.db.base import Base
 from app.db.models.symbol import Symbol
 from app.db.models.price import Price
-from app.db.models.indicator import Indicator
\ No newline at end of file
+from app.db.models.indicator import Indicator
+from app.db.models.bar import Bar
+from app.db.models.backtest import Backtest
+from app.db.models.backtest_trade import BacktestTrade
+from app.db.models.backtest_position import BacktestPosition
+from app.db.models.backtest_sweep import BacktestSweep
+from app.db.models.backtest_sweep_result import BacktestSweepResult
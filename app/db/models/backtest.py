@@ -18,4 +18,6 @@ class Backtest(Base):
     final_value = Column(Float, nullable=True)
     status = Column(String, default="completed")
     metrics = Column(JSON, nullable=True)
+    capture = Column(String, nullable=True)  # nivel de captura (CAPTURE_LEVELS); NULL em runs anteriores
+    cache_key = Column(String(64), nullable=True, unique=True, index=True)  # ver backtest_cache_key
     created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, Float, Index, Date, ForeignKey
 from app.db.base import Base
 
 class BacktestPosition(Base):
@@ -9,4 +9,9 @@ class BacktestPosition(Base):
     date = Column(Date, nullable=False)
     position = Column(Float, nullable=False)
     value = Column(Float, nullable=False)
-    equity = Column(Float, nullable=False)
\ No newline at end of file
+    equity = Column(Float, nullable=False)
+
+    # Keyset pagination of a run's rows: WHERE backtest_id = ? AND id > ? ORDER BY id.
+    __table_args__ = (
+        Index("ix_backtest_positions_backtest_id_id", "backtest_id", "id"),
+    )
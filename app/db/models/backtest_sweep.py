@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class BacktestSweep(Base):
+    __tablename__ = "backtest_sweeps"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ticker = Column(String, nullable=False)
+    strategy_type = Column(String, nullable=False)
+    strategy_params = Column(JSON, nullable=True)  # parametros fixos
+    param_grid = Column(JSON, nullable=False)
+    start = Column(String, nullable=True)
+    end = Column(String, nullable=True)
+    timeframe = Column(String, nullable=True)
+    engine = Column(String, nullable=False, default="backtrader")
+    initial_cash = Column(Float, nullable=False)
+    rank_by = Column(String, nullable=False, default="sharpe")
+    top_n = Column(Integer, nullable=False, default=0)
+    combinations = Column(Integer, nullable=False)
+    status = Column(String, default="completed")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
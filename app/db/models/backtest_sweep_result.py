@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Float, String, JSON, ForeignKey
+from app.db.base import Base
+
+class BacktestSweepResult(Base):
+    __tablename__ = "backtest_sweep_results"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sweep_id = Column(Integer, ForeignKey("backtest_sweeps.id"), nullable=False, index=True)
+    rank = Column(Integer, nullable=True)
+    strategy_params = Column(JSON, nullable=False)
+    final_value = Column(Float, nullable=True)
+    return_pct = Column(Float, nullable=True)
+    sharpe = Column(Float, nullable=True)
+    max_drawdown = Column(Float, nullable=True)
+    trades = Column(Integer, nullable=True)
+    error = Column(String, nullable=True)
+    backtest_id = Column(Integer, ForeignKey("backtests.id"), nullable=True)  # apenas top-N
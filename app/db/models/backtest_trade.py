@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, Date, ForeignKey
+from sqlalchemy import Column, Integer, Float, Index, String, Date, ForeignKey
 from app.db.base import Base
 
 class BacktestTrade(Base):
@@ -10,4 +10,9 @@ class BacktestTrade(Base):
     operation = Column(String, nullable=False)  # buy/sell
     price = Column(Float, nullable=False)
     size = Column(Float, nullable=False)
-    pnl = Column(Float, nullable=True)
\ No newline at end of file
+    pnl = Column(Float, nullable=True)
+
+    # Keyset pagination of a run's rows: WHERE backtest_id = ? AND id > ? ORDER BY id.
+    __table_args__ = (
+        Index("ix_backtest_trades_backtest_id_id", "backtest_id", "id"),
+    )
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, PrimaryKeyConstraint
+from app.db.base import Base
+
+
+class Bar(Base):
+    """Intraday OHLCV bars, range-partitioned by ``ts`` on PostgreSQL (see ``bar_store``)."""
+
+    __tablename__ = "bars"
+
+    symbol_id = Column(Integer, ForeignKey("symbols.id"), nullable=False)
+    interval = Column(String(8), nullable=False)  # ex: 1m, 5m, 1h
+    ts = Column(DateTime, nullable=False)
+    open = Column(Float, nullable=True)
+    high = Column(Float, nullable=True)
+    low = Column(Float, nullable=True)
+    close = Column(Float, nullable=True)
+    volume = Column(Float, nullable=True)
+
+    __table_args__ = (
+        # Covering key: range scans per (symbol, interval) are served index-only.
+        PrimaryKeyConstraint(
+            "symbol_id", "interval", "ts",
+            name="pk_bars",
+            postgresql_include=["open", "high", "low", "close", "volume"],
+        ),
+        Index("ix_bars_ts_brin", "ts", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (ts)"},
+    )
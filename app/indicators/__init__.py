@@ -0,0 +1,2 @@
+from .core import sma, ema, true_range, atr, rolling_max, rolling_min, roc_percent, log_returns
+from .registry import INDICATORS, IndicatorDefinition, IndicatorSpec, parse_indicator_specs
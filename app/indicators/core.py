@@ -0,0 +1,142 @@
+"""NumPy implementations of the indicators the strategies use in Backtrader.
+
+Outputs are aligned with the input (same length) and NaN until the indicator
+has enough history, matching Backtrader's ``SMA``, ``EMA``, ``ATR``,
+``Highest``, ``Lowest`` and ``RateOfChange100`` bar for bar.
+
+The recursive indicators (``ema``, ``atr``) accept a ``seed``: the value of
+the indicator on the bar right before the new data, so a refresh can continue
+from a stored value instead of replaying the whole history.
+"""
+import math
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _as_float(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def _nan_like(values: np.ndarray) -> np.ndarray:
+    return np.full(values.shape[0], np.nan)
+
+
+def sma(values, period: int) -> np.ndarray:
+    values = _as_float(values)
+    out = _nan_like(values)
+    if values.shape[0] < period:
+        return out
+    # Window sums (rather than a cumsum difference) keep long series free of drift.
+    out[period - 1 :] = sliding_window_view(values, period).sum(axis=1) / period
+    return out
+
+
+def _exponential_smoothing(values: np.ndarray, period: int, alpha: float, seed: Optional[float]) -> np.ndarray:
+    """``out[i] = out[i-1] * (1 - alpha) + values[i] * alpha``.
+
+    Without ``seed`` the recursion starts at ``period - 1`` from the mean of
+    the first ``period`` values; with it, ``seed`` plays the role of ``out[-1]``.
+    """
+    n = values.shape[0]
+    result = [np.nan] * n
+    if seed is None:
+        if n < period:
+            return np.asarray(result, dtype=np.float64)
+        start = period
+        prev = math.fsum(values[:period].tolist()) / period
+        result[period - 1] = prev
+    else:
+        start = 0
+        prev = float(seed)
+
+    alpha1 = 1.0 - alpha
+    data = values.tolist()
+    for idx in range(start, n):
+        prev = prev * alpha1 + data[idx] * alpha
+        result[idx] = prev
+    return np.asarray(result, dtype=np.float64)
+
+
+def ema(values, period: int, seed: Optional[float] = None) -> np.ndarray:
+    """Exponential moving average with ``alpha = 2 / (period + 1)``."""
+    return _exponential_smoothing(_as_float(values), period, 2.0 / (1.0 + period), seed)
+
+
+def true_range(high, low, close) -> np.ndarray:
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    out = _nan_like(close)
+    prev_close = close[:-1]
+    out[1:] = np.maximum(high[1:], prev_close) - np.minimum(low[1:], prev_close)
+    return out
+
+
+def atr(high, low, close, period: int, seed: Optional[float] = None) -> np.ndarray:
+    """Wilder's ATR: smoothed moving average (``alpha = 1 / period``) of the true range.
+
+    The true range needs the previous close, so bar 0 never gets a value of
+    its own: unseeded, the first ATR is the mean of the true ranges of bars
+    ``1..period``; seeded, ``seed`` is taken as the ATR of bar 0.
+    """
+    tr = true_range(high, low, close)
+    out = _nan_like(tr)
+    if seed is not None and out.shape[0]:
+        out[0] = seed
+    out[1:] = _exponential_smoothing(tr[1:], period, 1.0 / period, seed)
+    return out
+
+
+def _block_extreme(values: np.ndarray, period: int, ufunc: np.ufunc, fill: float) -> np.ndarray:
+    """Rolling max/min in O(n) with the van Herk/Gil-Werman block algorithm.
+
+    Within blocks of ``period`` elements, a prefix scan and a suffix scan give
+    the extreme of any window as ``ufunc(suffix[start], prefix[end])``; both
+    scans are vectorised ``accumulate`` calls.
+    """
+    n = values.shape[0]
+    out = _nan_like(values)
+    if period <= 0 or n < period:
+        return out
+    if period == 1:
+        return values.copy()
+
+    padded_len = -(-n // period) * period
+    padded = np.full(padded_len, fill)
+    padded[:n] = values
+    blocks = padded.reshape(-1, period)
+    prefix = ufunc.accumulate(blocks, axis=1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    ends = np.arange(period - 1, n)
+    out[period - 1 :] = ufunc(suffix[ends - period + 1], prefix[ends])
+    return out
+
+
+def rolling_max(values, period: int) -> np.ndarray:
+    """Equivalent to ``bt.ind.Highest``."""
+    return _block_extreme(_as_float(values), period, np.maximum, -np.inf)
+
+
+def rolling_min(values, period: int) -> np.ndarray:
+    """Equivalent to ``bt.ind.Lowest``."""
+    return _block_extreme(_as_float(values), period, np.minimum, np.inf)
+
+
+def roc_percent(values, period: int) -> np.ndarray:
+    """Equivalent to ``bt.ind.RateOfChange100``: ``100 * (x / x[-period] - 1)``."""
+    values = _as_float(values)
+    out = _nan_like(values)
+    if values.shape[0] > period:
+        out[period:] = 100.0 * (values[period:] / values[:-period] - 1.0)
+    return out
+
+
+def log_returns(values, period: int = 1) -> np.ndarray:
+    """``log(x / x[-period])``."""
+    values = _as_float(values)
+    out = _nan_like(values)
+    if values.shape[0] > period:
+        logs = np.log(values)
+        out[period:] = logs[period:] - logs[:-period]
+    return out
@@ -0,0 +1,95 @@
+"""Indicators that can be persisted in the ``indicators`` table.
+
+Each entry knows which price columns it reads, how its single integer
+parameter is spelled in ``Indicator.params``, how many bars on/before the
+last stored value a refresh must reload to continue the series and the index
+of the first value when computed from the first bar of a series.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+from .core import atr, ema, log_returns, roc_percent, rolling_max, rolling_min, sma
+
+
+@dataclass(frozen=True)
+class IndicatorDefinition:
+    param: str
+    inputs: Tuple[str, ...]
+    compute: Callable
+    warmup: Callable[[int], int]
+    first_valid: Callable[[int], int]
+    recursive: bool = False
+
+
+INDICATORS: Dict[str, IndicatorDefinition] = {
+    "SMA": IndicatorDefinition("window", ("close",), sma, lambda n: n - 1, lambda n: n - 1),
+    "EMA": IndicatorDefinition("period", ("close",), ema, lambda n: 0, lambda n: n - 1, recursive=True),
+    "ATR": IndicatorDefinition("period", ("high", "low", "close"), atr, lambda n: 1, lambda n: n, recursive=True),
+    "HIGHEST": IndicatorDefinition("period", ("high",), rolling_max, lambda n: n - 1, lambda n: n - 1),
+    "LOWEST": IndicatorDefinition("period", ("low",), rolling_min, lambda n: n - 1, lambda n: n - 1),
+    "ROC": IndicatorDefinition("period", ("close",), roc_percent, lambda n: n, lambda n: n),
+    "LOGRET": IndicatorDefinition("period", ("close",), log_returns, lambda n: n, lambda n: n),
+}
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    name: str
+    period: int
+
+    def __post_init__(self):
+        if self.name not in INDICATORS:
+            raise ValueError(f"Indicador '{self.name}' nao suportado. Use um de: {', '.join(INDICATORS)}")
+        if self.period < 1:
+            raise ValueError(f"Periodo invalido para {self.name}: {self.period}")
+
+    @property
+    def definition(self) -> IndicatorDefinition:
+        return INDICATORS[self.name]
+
+    @property
+    def inputs(self) -> Tuple[str, ...]:
+        return self.definition.inputs
+
+    @property
+    def recursive(self) -> bool:
+        return self.definition.recursive
+
+    @property
+    def params(self) -> str:
+        return f"{self.definition.param}={self.period}"
+
+    @property
+    def line_name(self) -> str:
+        """Column/line name used when the series is attached to a price feed."""
+        return f"{self.name.lower()}_{self.period}"
+
+    @property
+    def warmup(self) -> int:
+        return self.definition.warmup(self.period)
+
+    @property
+    def first_valid(self) -> int:
+        return self.definition.first_valid(self.period)
+
+    def compute(self, columns: Dict[str, "object"], seed=None):
+        inputs = [columns[col] for col in self.inputs]
+        if self.recursive:
+            return self.definition.compute(*inputs, self.period, seed=seed)
+        return self.definition.compute(*inputs, self.period)
+
+
+def parse_indicator_specs(text: str) -> List[IndicatorSpec]:
+    """Parse ``"SMA:20,ATR:14"`` into specs (names are case-insensitive)."""
+    specs: List[IndicatorSpec] = []
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, period = item.partition(":")
+        if not sep or not period.strip().isdigit():
+            raise ValueError(f"Indicador invalido '{item}'. Formato esperado: NOME:PERIODO")
+        spec = IndicatorSpec(name.strip().upper(), int(period))
+        if spec not in specs:
+            specs.append(spec)
+    return specs
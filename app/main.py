@@ -3,6 +3,7 @@ from fastapi import FastAPI
 from app.api.routers import data, health, backtests
 from app.core.config import settings
 from app.core.logging_config import setup_logging
+from app.services.backtest_service import warm_up_price_cache
 from app.tasks.scheduler import start_scheduler, shutdown_scheduler
 
 setup_logging()
@@ -20,6 +21,12 @@ def _startup_scheduler():
         start_scheduler(settings.SCHEDULER_INTERVAL_MINUTES)
 
 
+@app.on_event("startup")
+def _warm_up_price_cache():
+    if settings.PRICE_CACHE_WARMUP_TOP_N > 0:
+        warm_up_price_cache(settings.PRICE_CACHE_WARMUP_TOP_N)
+
+
 @app.on_event("shutdown")
 def _shutdown_scheduler():
     if settings.ENABLE_SCHEDULER:
@@ -0,0 +1,15 @@
+from .performance import (
+    ROLLING_WINDOW,
+    SERIES_METRICS,
+    TRADE_METRICS,
+    TRADING_DAYS,
+    daily_closing,
+    daily_returns,
+    daily_sharpe,
+    drawdown_series,
+    max_drawdown,
+    max_drawdown_duration,
+    performance_metrics,
+    rolling_metrics,
+    rolling_sharpe,
+)
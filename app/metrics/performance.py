@@ -0,0 +1,178 @@
+"""Performance metrics computed once from a run's per-bar broker value and its fills.
+
+``values`` is the broker value on every bar (warm-up bars included) and
+``dates`` the matching bar timestamps; intraday series are reduced to the
+last value of each day first. ``sharpe`` and ``sortino`` are per-day ratios,
+as reported by ``bt.analyzers.SharpeRatio(timeframe=Days)``; ``volatility``
+is annualized over ``TRADING_DAYS``.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+TRADING_DAYS = 252
+ROLLING_WINDOW = 63
+
+SERIES_METRICS = (
+    "sharpe",
+    "sortino",
+    "cagr",
+    "volatility",
+    "max_drawdown",
+    "max_drawdown_days",
+    "calmar",
+    "exposure",
+    "turnover",
+)
+TRADE_METRICS = ("closed_trades", "win_rate", "profit_factor")
+
+
+def daily_closing(dates: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """``(days, value)`` at the last bar of each day."""
+    days = dates.astype("datetime64[D]")
+    last_of_day = np.flatnonzero(np.r_[days[1:] != days[:-1], True])
+    return days[last_of_day], values[last_of_day]
+
+
+def daily_returns(closing: np.ndarray, initial_cash: float) -> np.ndarray:
+    """Day-over-day returns of the closing values; the first day is measured against ``initial_cash``."""
+    previous = np.r_[initial_cash, closing[:-1]]
+    return closing / previous - 1.0
+
+
+def daily_sharpe(dates: np.ndarray, values: np.ndarray, initial_cash: float) -> Optional[float]:
+    """``bt.analyzers.SharpeRatio`` with ``timeframe=Days`` and a zero risk-free rate."""
+    _, closing = daily_closing(dates, values)
+    returns = daily_returns(closing, initial_cash).tolist()
+    if not returns:
+        return None
+    avg = math.fsum(returns) / len(returns)
+    std = math.sqrt(math.fsum([pow(r - avg, 2.0) for r in returns]) / len(returns))
+    try:
+        return avg / std
+    except ZeroDivisionError:
+        return None
+
+
+def drawdown_series(values: np.ndarray) -> np.ndarray:
+    """Distance below the running peak at each point, as a negative fraction (0 at new highs)."""
+    peaks = np.maximum.accumulate(values)
+    return values / peaks - 1.0
+
+
+def max_drawdown(values: np.ndarray) -> float:
+    """``bt.analyzers.DrawDown`` max drawdown, as a negative fraction."""
+    peaks = np.maximum.accumulate(values)
+    drawdowns = 100.0 * (peaks - values) / peaks
+    return -float(max(0.0, drawdowns.max(initial=0.0))) / 100.0
+
+
+def max_drawdown_duration(values: np.ndarray) -> int:
+    """Longest run of consecutive points below the running peak."""
+    underwater = np.r_[False, values < np.maximum.accumulate(values), False]
+    edges = np.flatnonzero(underwater[1:] != underwater[:-1])
+    return int((edges[1::2] - edges[::2]).max(initial=0))
+
+
+def rolling_sharpe(returns: np.ndarray, window: int) -> np.ndarray:
+    """Per-day Sharpe of the trailing ``window`` returns; NaN before the first full window."""
+    out = np.full(returns.shape[0], np.nan)
+    if returns.shape[0] < window:
+        return out
+    windows = sliding_window_view(returns, window)
+    std = windows.std(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[window - 1 :] = np.where(std > 0, windows.mean(axis=1) / std, np.nan)
+    return out
+
+
+def _fills(trades: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    return {
+        "days": np.array([trade["date"] for trade in trades], dtype="datetime64[D]"),
+        "size": np.array([trade["size"] for trade in trades], dtype=np.float64),
+        "price": np.array([trade["price"] for trade in trades], dtype=np.float64),
+        "pnl": np.array([trade["pnl"] for trade in trades if trade["pnl"] is not None], dtype=np.float64),
+    }
+
+
+def _finite(value) -> Optional[float]:
+    return float(value) if value is not None and math.isfinite(value) else None
+
+
+def _trade_metrics(pnl: np.ndarray) -> Dict[str, Optional[float]]:
+    if not pnl.size:
+        return {"closed_trades": 0, "win_rate": None, "profit_factor": None}
+    losses = -pnl[pnl < 0].sum()
+    return {
+        "closed_trades": int(pnl.size),
+        "win_rate": float((pnl > 0).mean()),
+        "profit_factor": float(pnl[pnl > 0].sum() / losses) if losses > 0 else None,
+    }
+
+
+def performance_metrics(
+    initial_cash: float,
+    final_value: float,
+    dates: Optional[np.ndarray] = None,
+    values: Optional[np.ndarray] = None,
+    trades: Optional[Sequence[Dict[str, Any]]] = None,
+) -> Dict[str, Optional[float]]:
+    """The metrics pack of one run.
+
+    Without ``dates``/``values`` only ``return_pct`` and the trade metrics are
+    filled; without ``trades`` the trade metrics, exposure and turnover are None.
+    """
+    metrics: Dict[str, Optional[float]] = {
+        "return_pct": float(final_value / initial_cash - 1.0) if initial_cash else 0.0,
+        **dict.fromkeys(SERIES_METRICS),
+        **dict.fromkeys(TRADE_METRICS),
+    }
+    fills = _fills(trades) if trades is not None else None
+    if fills is not None:
+        metrics.update(_trade_metrics(fills["pnl"]))
+    if values is None or not len(values):
+        return metrics
+
+    days, closing = daily_closing(dates, values)
+    returns = daily_returns(closing, initial_cash)
+    downside = math.sqrt(float(np.mean(np.minimum(returns, 0.0) ** 2)))
+    drawdown = max_drawdown(values)
+    years = (days[-1] - days[0]).astype(np.int64) / 365.25
+    growth = closing[-1] / initial_cash if initial_cash else math.nan
+    cagr = (growth ** (1.0 / years) - 1.0 if growth > 0 else -1.0) if years > 0 else None
+
+    metrics.update(
+        sharpe=_finite(daily_sharpe(dates, values, initial_cash)),
+        sortino=_finite(float(returns.mean()) / downside) if downside > 0 else None,
+        cagr=_finite(cagr),
+        volatility=_finite(float(returns.std()) * math.sqrt(TRADING_DAYS)),
+        max_drawdown=drawdown,
+        max_drawdown_days=max_drawdown_duration(closing),
+        calmar=_finite(cagr / -drawdown) if cagr is not None and drawdown < 0 else None,
+    )
+    if fills is not None:
+        # Position held at the end of each day, rebuilt from the signed fill sizes.
+        held = np.r_[0.0, np.cumsum(fills["size"])][np.searchsorted(fills["days"], days, side="right")]
+        metrics["exposure"] = float(np.mean(held != 0.0))
+        metrics["turnover"] = _finite(float(np.abs(fills["size"] * fills["price"]).sum() / closing.mean()))
+    return metrics
+
+
+def rolling_metrics(
+    dates: np.ndarray, values: np.ndarray, initial_cash: float, window: int = ROLLING_WINDOW
+) -> List[Dict[str, Any]]:
+    """Per-day trailing Sharpe over ``window`` days and drawdown below the running peak."""
+    if not len(values):
+        return []
+    days, closing = daily_closing(dates, values)
+    sharpe = rolling_sharpe(daily_returns(closing, initial_cash), window)
+    return [
+        {"date": day, "sharpe": None if value != value else value, "drawdown": drawdown}
+        for day, value, drawdown in zip(
+            days.astype(object).tolist(), sharpe.tolist(), drawdown_series(closing).tolist()
+        )
+    ]
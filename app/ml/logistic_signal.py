@@ -1,8 +1,33 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_EPOCHS = 300
+# Refits that start from the previous model only need to track the drift of a rolling window.
+WARM_START_EPOCHS = 50
+
+SOLVERS = ("gd", "newton")
+NEWTON_TOL = 1e-8
+NEWTON_MAX_ITER = 50
+# Training windows per batched fit call in ``rolling_probabilities``.
+NEWTON_BATCH_SIZE = 256
+
 
+def fit_logistic(
+    features: np.ndarray,
+    labels: np.ndarray,
+    *,
+    lr: float = 0.1,
+    epochs: int = DEFAULT_EPOCHS,
+    l2: float = 1e-4,
+    initial: Optional[Tuple[np.ndarray, float]] = None,
+):
+    """Simple logistic regression trained via gradient descent.
 
-def fit_logistic(features: np.ndarray, labels: np.ndarray, *, lr: float = 0.1, epochs: int = 300, l2: float = 1e-4):
-    """Simple logistic regression trained via gradient descent."""
+    ``initial`` is a previous ``(coeffs, bias)`` to start from instead of zero weights.
+    """
     if features.ndim != 2:
         raise ValueError("features must be 2-D array")
     if labels.ndim != 1:
@@ -12,7 +37,11 @@ def fit_logistic(features: np.ndarray, labels: np.ndarray, *, lr: float = 0.1, e
 
     X = np.hstack([np.ones((features.shape[0], 1)), features])
     y = labels
-    weights = np.zeros(X.shape[1])
+    if initial is None:
+        weights = np.zeros(X.shape[1])
+    else:
+        coeffs, bias = initial
+        weights = np.concatenate(([bias], coeffs)).astype(np.float64)
 
     for _ in range(epochs):
         z = X @ weights
@@ -25,8 +54,272 @@ def fit_logistic(features: np.ndarray, labels: np.ndarray, *, lr: float = 0.1, e
     return coeffs, bias
 
 
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    with np.errstate(over="ignore"):
+        return 1.0 / (1.0 + np.exp(-z))
+
+
+def _design_batch(features: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    """``(batch, rows, 1 + dims)`` design tensor: a column of ones, then the features."""
+    if features.ndim != 3:
+        raise ValueError("features must be 3-D array")
+    if labels.ndim != 2:
+        raise ValueError("labels must be 2-D array")
+    if features.shape[:2] != labels.shape:
+        raise ValueError("features and labels size mismatch")
+    return np.concatenate([np.ones((*labels.shape, 1)), features], axis=2)
+
+
+def fit_logistic_gd_batch(
+    features: np.ndarray,
+    labels: np.ndarray,
+    *,
+    lr: float = 0.1,
+    epochs: int = DEFAULT_EPOCHS,
+    l2: float = 1e-4,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """``fit_logistic`` from zero weights on each ``(rows, dims)`` slice of ``features``.
+
+    Same updates as ``fit_logistic`` (and the same coefficients, up to rounding),
+    stepped for the whole batch at once; returns ``(batch, dims)`` coeffs and
+    ``(batch,)`` biases.
+    """
+    X = _design_batch(features, labels)
+    Xt = X.transpose(0, 2, 1)
+    weights = np.zeros((X.shape[0], X.shape[2]))
+    for _ in range(epochs):
+        z = np.matmul(X, weights[..., None])[..., 0]
+        preds = 1.0 / (1.0 + np.exp(-z))
+        gradient = np.matmul(Xt, (preds - labels)[..., None])[..., 0] / labels.shape[1] + l2 * weights
+        weights -= lr * gradient
+    return weights[:, 1:], weights[:, 0]
+
+
+def fit_logistic_newton_batch(
+    features: np.ndarray,
+    labels: np.ndarray,
+    *,
+    l2: float = 1e-4,
+    tol: float = NEWTON_TOL,
+    max_iter: int = NEWTON_MAX_ITER,
+    initial: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Newton/IRLS fit of independent logistic regressions, one per leading index.
+
+    ``features`` is ``(batch, rows, dims)`` and ``labels`` is ``(batch, rows)``;
+    returns ``(coeffs, bias)`` shaped ``(batch, dims)`` and ``(batch,)``. The
+    objective is the L2-penalized mean log-loss of ``fit_logistic``, so this is
+    the point its gradient descent converges to. Each problem stops once its
+    largest Newton step falls below ``tol`` (or after ``max_iter`` steps).
+    """
+    X = _design_batch(features, labels)
+    batch, rows, _ = X.shape
+    if initial is None:
+        weights = np.zeros((batch, X.shape[2]))
+    else:
+        coeffs, bias = initial
+        weights = np.concatenate([np.reshape(bias, (batch, 1)), np.reshape(coeffs, (batch, -1))], axis=1).astype(np.float64)
+    ridge = l2 * np.eye(X.shape[2])
+
+    # Converged problems leave the active set, so each one runs exactly the steps it would run alone.
+    active = np.arange(batch)
+    Xa, ya = X, labels
+    for _ in range(max_iter):
+        wa = weights[active]
+        preds = _sigmoid(np.matmul(Xa, wa[..., None])[..., 0])
+        Xt = Xa.transpose(0, 2, 1)
+        gradient = np.matmul(Xt, (preds - ya)[..., None])[..., 0] / rows + l2 * wa
+        hessian = np.matmul(Xt * (preds * (1.0 - preds))[:, None, :], Xa) / rows + ridge
+        step = np.linalg.solve(hessian, gradient[..., None])[..., 0]
+        weights[active] = wa - step
+
+        moving = np.abs(step).max(axis=1) >= tol
+        if not moving.all():
+            active, Xa, ya = active[moving], Xa[moving], ya[moving]
+            if not active.size:
+                break
+
+    return weights[:, 1:], weights[:, 0]
+
+
+def fit_logistic_newton(
+    features: np.ndarray,
+    labels: np.ndarray,
+    *,
+    l2: float = 1e-4,
+    tol: float = NEWTON_TOL,
+    max_iter: int = NEWTON_MAX_ITER,
+    initial: Optional[Tuple[np.ndarray, float]] = None,
+):
+    """``fit_logistic_newton_batch`` for a single problem; same arguments and result as ``fit_logistic``."""
+    if features.ndim != 2:
+        raise ValueError("features must be 2-D array")
+    if labels.ndim != 1:
+        raise ValueError("labels must be 1-D array")
+    if initial is not None:
+        initial = (np.asarray(initial[0])[None], np.asarray([initial[1]]))
+    coeffs, bias = fit_logistic_newton_batch(features[None], labels[None], l2=l2, tol=tol, max_iter=max_iter, initial=initial)
+    return coeffs[0], bias[0]
+
+
 def predict_proba(features: np.ndarray, coeffs: np.ndarray, bias: float) -> np.ndarray:
     if features.ndim == 1:
         features = features.reshape(1, -1)
     z = features @ coeffs + bias
-    return 1.0 / (1.0 + np.exp(-z))
\ No newline at end of file
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def momentum_training_set(log_returns: np.ndarray, lookback: int, train_window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Features ``log_returns[i : i + lookback]`` and whether the next return is positive, for ``i < train_window``.
+
+    The features are a read-only strided view over ``log_returns``.
+    """
+    features = sliding_window_view(log_returns, lookback)[:train_window]
+    labels = (log_returns[lookback : lookback + train_window] > 0).astype(np.float64)
+    return features, labels
+
+
+def _batched_fits(
+    log_returns: np.ndarray, n: int, lookback: int, train_window: int, retrain_every: int, solver: str
+) -> Dict[int, Tuple[np.ndarray, float]]:
+    """Cold-start model of every bar on which ``rolling_probabilities`` refits.
+
+    Whether a bar refits depends only on which training windows are finite, so
+    the schedule is known before fitting and the windows are stacked into a
+    ``(batch, train_window, lookback)`` tensor instead of being fit one by one.
+    """
+    count = train_window + lookback + 1
+    windows = sliding_window_view(log_returns, lookback)
+    nonfinite = np.concatenate([[0], np.cumsum(~np.isfinite(windows).all(axis=1))])
+
+    refits: List[int] = []
+    for idx in range(count - 1, n):
+        if refits and idx - refits[-1] < retrain_every:
+            continue
+        first = idx - count + 1
+        if nonfinite[first + train_window] == nonfinite[first]:
+            refits.append(idx)
+    if not refits:
+        return {}
+
+    fit_batch = fit_logistic_newton_batch if solver == "newton" else fit_logistic_gd_batch
+    stacked = sliding_window_view(windows, train_window, axis=0).transpose(0, 2, 1)
+    labels = sliding_window_view((log_returns[lookback:] > 0).astype(np.float64), train_window)
+    models: Dict[int, Tuple[np.ndarray, float]] = {}
+    for offset in range(0, len(refits), NEWTON_BATCH_SIZE):
+        chunk = np.asarray(refits[offset : offset + NEWTON_BATCH_SIZE])
+        firsts = chunk - count + 1
+        coeffs, bias = fit_batch(stacked[firsts], labels[firsts])
+        models.update((int(idx), (coeffs[row], bias[row])) for row, idx in enumerate(chunk))
+    return models
+
+
+def rolling_probabilities(
+    close: np.ndarray,
+    lookback: int,
+    train_window: int,
+    retrain_every: int = 1,
+    warm_start: bool = False,
+    solver: str = "gd",
+) -> np.ndarray:
+    """``LogisticMomentumRisk._train_if_ready`` for every bar of ``close``; NaN until the first fit.
+
+    The value at bar ``i`` only uses ``close[: i + 1]``. The model is refit
+    every ``retrain_every`` bars and predicts on the bars in between. A refit
+    whose training window has non-finite features keeps the previous model
+    and probability, and is retried on the next bar, as the strategy does.
+    Without ``warm_start`` the refits are independent and are solved in
+    batches up front.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"solver '{solver}' invalido. Opcoes: {', '.join(SOLVERS)}.")
+    n = close.shape[0]
+    count = train_window + lookback + 1
+    probs = np.full(n, np.nan)
+    if n < count:
+        return probs
+
+    log_returns = np.diff(np.log(close))
+    refits = None if warm_start else _batched_fits(log_returns, n, lookback, train_window, retrain_every, solver)
+    prob, model, last_fit = 0.0, None, 0
+    for idx in range(count - 1, n):
+        recent = log_returns[idx - lookback : idx]
+        if model is not None and idx - last_fit < retrain_every:
+            prob = float(predict_proba(recent, *model)[0])
+        elif refits is not None:
+            if idx in refits:
+                model, last_fit = refits[idx], idx
+                prob = float(predict_proba(recent, *model)[0])
+        else:
+            first = idx - count + 1
+            features, labels = momentum_training_set(log_returns[first : idx], lookback, train_window)
+            if np.isfinite(features).all():
+                # Warm start: each refit starts from the previous model.
+                if solver == "newton":
+                    model = fit_logistic_newton(features, labels, initial=model)
+                elif model is not None:
+                    model = fit_logistic(features, labels, epochs=WARM_START_EPOCHS, initial=model)
+                else:
+                    model = fit_logistic(features, labels)
+                last_fit = idx
+                prob = float(predict_proba(recent, *model)[0])
+        if model is not None:
+            probs[idx] = prob
+    return probs
+
+
+@dataclass(frozen=True)
+class MomentumProbabilitySpec:
+    """``rolling_probabilities`` as a series of the ``indicators`` table (name ``ML_PROB``).
+
+    Quacks like ``app.indicators.IndicatorSpec``, so the indicator service can
+    persist and refresh it and the strategies can receive it as a feed line.
+    """
+
+    lookback: int
+    train_window: int
+    retrain_every: int = 1
+    warm_start: bool = False
+    solver: str = "gd"
+
+    name = "ML_PROB"
+    inputs = ("close",)
+    recursive = False
+
+    def __post_init__(self):
+        if self.solver not in SOLVERS:
+            raise ValueError(f"solver '{self.solver}' invalido. Opcoes: {', '.join(SOLVERS)}.")
+        if self.lookback < 1 or self.train_window < 1 or self.retrain_every < 1:
+            raise ValueError(f"Parametros invalidos para {self.name}: {self.params}")
+
+    @property
+    def params(self) -> str:
+        return (
+            f"lookback={self.lookback},train_window={self.train_window},retrain_every={self.retrain_every},"
+            f"warm_start={int(self.warm_start)},solver={self.solver}"
+        )
+
+    @property
+    def line_name(self) -> str:
+        warm = "_warm" if self.warm_start else ""
+        return f"ml_prob_{self.lookback}_{self.train_window}_{self.retrain_every}{warm}_{self.solver}"
+
+    @property
+    def warmup(self) -> Optional[int]:
+        """Bars before the first new value a refresh must reload; None when it needs the whole history.
+
+        Sparse or warm-started refits depend on every earlier fit, so their
+        series can only be extended by recomputing it from the first bar.
+        """
+        if self.retrain_every > 1 or self.warm_start:
+            return None
+        return self.train_window + self.lookback
+
+    @property
+    def first_valid(self) -> int:
+        return self.train_window + self.lookback
+
+    def compute(self, columns: Dict[str, np.ndarray], seed=None) -> np.ndarray:
+        return rolling_probabilities(
+            columns["close"], self.lookback, self.train_window, self.retrain_every, self.warm_start, self.solver
+        )
@@ -1,27 +1,53 @@
 from __future__ import annotations
 
+import hashlib
+import itertools
+import json
+import os
+import sys
+import threading
+from concurrent.futures import Future
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Callable, Dict, Optional, Tuple, Any
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Any
 
 import backtrader as bt
+import numpy as np
 import pandas as pd
 import structlog
 from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
 
+from app.core.config import settings
 from app.db.session import SessionLocal
-from app.db.models.price import Price
-from app.db.models.symbol import Symbol
 from app.db.models.backtest import Backtest
 from app.db.models.backtest_trade import BacktestTrade
 from app.db.models.backtest_position import BacktestPosition
+from app.metrics import ROLLING_WINDOW, performance_metrics, rolling_metrics
+from app.services.bar_store import is_intraday
+from app.services.indicator_service import load_indicator_frame
+from app.services.price_cache import price_cache, warm_up_price_cache as _warm_up_price_cache
+from app.services.price_mirror import mirror_enabled, read_price_mirror, write_price_mirror
+from app.services.vectorized_engine import run_vectorized
+from app.services.price_loader import PRICE_COLUMNS, PriceArrays, iter_price_rows, load_bar_arrays, load_price_arrays, load_price_arrays_batch, load_price_frame
+from app.services.streaming_feed import StreamingPriceFeed
 
 logger = structlog.get_logger(__name__)
 
 from app.strategies import SMACrossRisk, DonchianBreakoutRisk, MomentumRisk, LogisticMomentumRisk
 from app.strategies.base import RiskManagedStrategy
+from app.strategies.capture import CAPTURE_LEVELS, downsample_rows
 
 
+ENGINES = ("backtrader", "vectorized")
+
+# Part of the result cache key: bump when an engine's output changes for the same inputs.
+ENGINE_VERSIONS: Dict[str, str] = {
+    "backtrader": f"backtrader-{bt.__version__}-1",
+    "vectorized": "vectorized-1",
+}
+
 RISK_DEFAULTS: Dict[str, Any] = {
     "atr_period": 14,
     "atr_mult": 2.0,
@@ -78,54 +104,110 @@ STRATEGY_REGISTRY: Dict[str, StrategyConfig] = {
     ),
     "ml_momentum": StrategyConfig(
         cls=LogisticMomentumRisk,
-        defaults={"lookback": 10, "train_window": 120, "entry_threshold": 0.6, "exit_threshold": 0.4},
+        defaults={
+            "lookback": 10,
+            "train_window": 120,
+            "entry_threshold": 0.6,
+            "exit_threshold": 0.4,
+            "retrain_every": 1,
+            "warm_start": False,
+            "solver": "gd",
+        },
         required={"lookback", "train_window"},
         min_history=_ml_history,
     ),
 }
 
 
-def load_price_data_from_db(
-    ticker: str, start: Optional[str] = None, end: Optional[str] = None
-) -> pd.DataFrame:
+def _load_full_price_history(ticker: str) -> PriceArrays:
+    mirrored = read_price_mirror(ticker)
+    if mirrored is not None:
+        return mirrored
+
     db = SessionLocal()
     try:
-        symbol = db.execute(
-            select(Symbol).where(Symbol.ticker == ticker)
-        ).scalar_one_or_none()
-        if symbol is None:
-            raise ValueError(f"Ticker '{ticker}' nao encontrado no banco.")
+        arrays = load_price_arrays(ticker, db=db)
+    finally:
+        db.close()
+    if mirror_enabled():
+        write_price_mirror(ticker, arrays)
+    return arrays
 
-        query = (
-            select(Price)
-            .where(Price.symbol_id == symbol.id)
-            .order_by(Price.date.asc())
-        )
-        if start:
-            query = query.where(Price.date >= start)
-        if end:
-            query = query.where(Price.date <= end)
 
-        prices = db.execute(query).scalars().all()
-        if not prices:
+def load_price_data_from_db(
+    ticker: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    columns: Sequence[str] = PRICE_COLUMNS,
+    interval: Optional[str] = "1d",
+) -> pd.DataFrame:
+    if is_intraday(interval):
+        # Intraday histories are too large for the per-symbol cache/mirror; read the range directly.
+        db = SessionLocal()
+        try:
+            return load_bar_arrays(ticker, interval, start, end, columns=columns, db=db).to_frame()
+        finally:
+            db.close()
+
+    if price_cache.enabled:
+        history = price_cache.get_or_load(ticker, _load_full_price_history)
+    else:
+        history = read_price_mirror(ticker)
+
+    if history is not None:
+        arrays = history.slice(start, end)
+        if not len(arrays):
             raise ValueError(f"Nenhum dado encontrado para {ticker} no periodo.")
+        return arrays.select(columns).to_frame()
 
-        df = pd.DataFrame(
-            [
-                {
-                    "datetime": p.date,
-                    "open": p.open,
-                    "high": p.high,
-                    "low": p.low,
-                    "close": p.close,
-                    "volume": p.volume,
-                }
-                for p in prices
-            ]
-        )
-        df["datetime"] = pd.to_datetime(df["datetime"])
-        df.set_index("datetime", inplace=True)
-        return df
+    db = SessionLocal()
+    try:
+        return load_price_frame(ticker, start, end, columns=columns, db=db)
+    finally:
+        db.close()
+
+
+def load_price_data_batch(
+    tickers: Sequence[str],
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    columns: Sequence[str] = PRICE_COLUMNS,
+) -> Dict[str, pd.DataFrame]:
+    """Per-ticker frames for many tickers; cache/mirror hits skip the DB, misses share chunked queries."""
+    histories: Dict[str, PriceArrays] = {}
+    pending: List[str] = []
+    for ticker in dict.fromkeys(tickers):
+        history = price_cache.get(ticker) if price_cache.enabled else None
+        if history is None:
+            history = read_price_mirror(ticker)
+        if history is None:
+            pending.append(ticker)
+        else:
+            histories[ticker] = history
+
+    frames: Dict[str, pd.DataFrame] = {}
+    for ticker, history in histories.items():
+        arrays = history.slice(start, end)
+        if len(arrays):
+            frames[ticker] = arrays.select(columns).to_frame()
+
+    if pending:
+        db = SessionLocal()
+        try:
+            loaded = load_price_arrays_batch(pending, start, end, columns=columns, db=db)
+        finally:
+            db.close()
+        for ticker in pending:
+            if ticker in loaded:
+                frames[ticker] = loaded[ticker].to_frame()
+
+    return frames
+
+
+def warm_up_price_cache(top_n: int) -> List[str]:
+    db = SessionLocal()
+    try:
+        return _warm_up_price_cache(_load_full_price_history, top_n, db=db)
     finally:
         db.close()
 
@@ -147,53 +229,89 @@ def _resolve_strategy(strategy_type: str, user_params: Optional[Dict[str, Any]])
     return config.cls, params, config
 
 
-def _extract_metrics_from_strategy(
-    strat: RiskManagedStrategy, initial_cash: float, final_value: float
-) -> Dict[str, Optional[float]]:
-    ret_pct = (final_value / initial_cash - 1.0) if initial_cash else 0.0
-    sharpe = None
-    max_dd = None
-    try:
-        sharpe = strat.analyzers.sharpe.get_analysis().get("sharperatio")
-    except Exception:
-        pass
-    try:
-        dd_info = strat.analyzers.drawdown.get_analysis()
-        if "max" in dd_info and "drawdown" in dd_info["max"]:
-            max_dd = -float(dd_info["max"]["drawdown"]) / 100.0
-    except Exception:
-        pass
-
+def _extract_metrics_from_strategy(strat: RiskManagedStrategy) -> Dict[str, Optional[float]]:
+    """``sharpe`` and ``max_drawdown`` as reported by the SharpeRatio and DrawDown analyzers."""
+    sharpe = strat.analyzers.sharpe.get_analysis().get("sharperatio")
+    drawdown = strat.analyzers.drawdown.get_analysis().max.drawdown
     return {
-        "return_pct": float(ret_pct),
         "sharpe": float(sharpe) if sharpe is not None else None,
-        "max_drawdown": float(max_dd) if max_dd is not None else None,
+        "max_drawdown": -float(drawdown) / 100.0,
     }
 
 
-def _serialize_trades(trades):
-    return [
-        {
-            "date": trade["date"],
-            "operation": trade["operation"],
-            "price": trade["price"],
-            "size": trade["size"],
-            "pnl": trade["pnl"],
-        }
-        for trade in trades
-    ]
+def _feed_timeframe(interval: Optional[str]) -> Tuple[int, int]:
+    if interval and interval.endswith("m"):
+        return bt.TimeFrame.Minutes, int(interval[:-1])
+    if interval and interval.endswith("h"):
+        return bt.TimeFrame.Minutes, 60 * int(interval[:-1])
+    return bt.TimeFrame.Days, 1
 
 
-def _serialize_positions(positions):
-    return [
-        {
-            "date": pos["date"],
-            "position": pos["position"],
-            "value": pos["value"],
-            "equity": pos["equity"],
-        }
-        for pos in positions
-    ]
+@lru_cache(maxsize=None)
+def _indicator_feed_class(line_names: Tuple[str, ...]) -> type:
+    """``PandasData`` carrying ``line_names`` as extra lines read from same-named columns."""
+    return type(
+        "IndicatorPandasData",
+        (bt.feeds.PandasData,),
+        {"lines": line_names, "params": tuple((name, -1) for name in line_names)},
+    )
+
+
+def _make_feed(df: pd.DataFrame, timeframe: int, compression: int):
+    extra = tuple(col for col in df.columns if col not in PRICE_COLUMNS)
+    feed_cls = _indicator_feed_class(extra) if extra else bt.feeds.PandasData
+    return feed_cls(dataname=df, timeframe=timeframe, compression=compression)
+
+
+def attach_stored_indicators(
+    df: pd.DataFrame,
+    ticker: str,
+    strategy_type: str,
+    strategy_params: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
+    """Copy of ``df`` with the strategy's indicators from ``indicators`` as extra columns.
+
+    Missing values are computed and persisted first. Each series is blanked
+    over the first bars of ``df`` where Backtrader, computing it from the
+    start of the window, would not have a value yet, so the strategies keep
+    their warm-up behaviour.
+    """
+    strategy_cls, params, _ = _resolve_strategy(strategy_type, strategy_params)
+    specs = list(dict.fromkeys(strategy_cls.indicator_specs(params).values()))
+    if df.empty or not specs:
+        return df
+
+    db = SessionLocal()
+    try:
+        stored = load_indicator_frame(ticker, specs, df.index[0], df.index[-1], db=db)
+    finally:
+        db.close()
+
+    out = df.copy()
+    days = df.index.normalize()
+    for spec in specs:
+        values = stored[spec.line_name].reindex(days).to_numpy(dtype=np.float64, copy=True)
+        values[: spec.first_valid] = np.nan
+        out[spec.line_name] = values
+    return out
+
+
+def attach_precomputed_lines(
+    df: pd.DataFrame, strategy_cls: type[RiskManagedStrategy], params: Dict[str, Any]
+) -> pd.DataFrame:
+    """Copy of ``df`` with the series of ``strategy_cls.precomputed_specs`` as extra columns.
+
+    Series already attached (e.g. by ``attach_stored_indicators``) are kept.
+    """
+    specs = [spec for spec in strategy_cls.precomputed_specs(params).values() if spec.line_name not in df.columns]
+    if df.empty or not specs:
+        return df
+
+    columns = {col: df[col].to_numpy(dtype=np.float64, na_value=np.nan) for spec in specs for col in spec.inputs}
+    out = df.copy()
+    for spec in specs:
+        out[spec.line_name] = spec.compute(columns)
+    return out
 
 
 def _run_backtrader(
@@ -203,19 +321,54 @@ def _run_backtrader(
     initial_cash: float,
     commission: Optional[float],
     min_history: int,
+    interval: Optional[str] = "1d",
+    capture: str = "full",
+    analyzers: Optional[bool] = None,
+):
+    timeframe, compression = _feed_timeframe(interval)
+    feed = _make_feed(attach_precomputed_lines(df, strategy_cls, strategy_kwargs), timeframe, compression)
+    runonce = len(df) > min_history if min_history else False
+    return _run_cerebro(
+        feed, strategy_cls, strategy_kwargs, initial_cash, commission, capture=capture, runonce=runonce, analyzers=analyzers
+    )
+
+
+def _run_cerebro(
+    feed,
+    strategy_cls: type[RiskManagedStrategy],
+    strategy_kwargs: Dict[str, Any],
+    initial_cash: float,
+    commission: Optional[float],
+    *,
+    capture: str = "full",
+    runonce: bool = True,
+    low_memory: bool = False,
+    analyzers: Optional[bool] = None,
 ):
-    cerebro = bt.Cerebro()
-    feed = bt.feeds.PandasData(dataname=df)
+    full = capture == "full"
+    # The metrics come from the strategy's per-bar value series after the run. Backtrader's
+    # analyzers are only added on request, by default in low-memory runs, where that series
+    # would grow with the history and is not recorded.
+    use_analyzers = low_memory if analyzers is None else analyzers
+    # Observers only feed plots.
+    cerebro = bt.Cerebro(stdstats=full and not low_memory, exactbars=1 if low_memory else False)
     cerebro.adddata(feed)
 
-    cerebro.addstrategy(strategy_cls, **strategy_kwargs)
-    cerebro.addanalyzer(
-        bt.analyzers.SharpeRatio,
-        _name="sharpe",
-        timeframe=bt.TimeFrame.Days,
-        riskfreerate=0.0,
+    cerebro.addstrategy(
+        strategy_cls,
+        capture=capture,
+        low_memory=low_memory,
+        capture_values=not (low_memory and use_analyzers),
+        **strategy_kwargs,
     )
-    cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
+    if use_analyzers:
+        cerebro.addanalyzer(
+            bt.analyzers.SharpeRatio,
+            _name="sharpe",
+            timeframe=bt.TimeFrame.Days,
+            riskfreerate=0.0,
+        )
+        cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
 
     cerebro.broker.setcash(initial_cash)
     final_commission = (
@@ -225,23 +378,52 @@ def _run_backtrader(
     )
     cerebro.broker.setcommission(commission=final_commission)
 
-    runonce = len(df) > min_history if min_history else False
     run = cerebro.run(runonce=runonce)
     strat: RiskManagedStrategy = run[0]
     final_value = float(cerebro.broker.getvalue())
 
-    metrics = _extract_metrics_from_strategy(strat, initial_cash, final_value)
-    trades = _serialize_trades(strat.captured_trades)
-    positions = _serialize_positions(strat.captured_positions)
-    equity_curve = [
-        {"date": point["date"], "equity": point["equity"]}
-        for point in strat.captured_equity_curve
-    ]
+    trades = strat.trade_capture.trades()
+    values = strat.value_capture
+    if values is not None:
+        metrics = performance_metrics(initial_cash, final_value, values.dates(), values.view("value"), trades)
+    else:
+        metrics = performance_metrics(initial_cash, final_value, trades=trades)
+    if use_analyzers:
+        metrics.update(_extract_metrics_from_strategy(strat))
+    if capture == "metrics_only":
+        trades = []
+    # Low-memory runs already thinned the bars while recording them.
+    rows = downsample_rows(strat.bar_capture.count) if capture == "equity_downsampled" and not low_memory else None
+    positions = strat.bar_capture.positions(rows)
+    equity_curve = strat.bar_capture.equity_curve(rows)
 
     return final_value, metrics, trades, positions, equity_curve
 
 
-def run_backtest(
+def _check_capture(capture: str) -> None:
+    if capture not in CAPTURE_LEVELS:
+        raise ValueError(f"Nivel de captura '{capture}' nao suportado. Opcoes: {', '.join(CAPTURE_LEVELS)}.")
+
+
+def _check_analyzers(engine: str, analyzers: Optional[bool]) -> None:
+    if analyzers and engine != "backtrader":
+        raise ValueError("analyzers so estao disponiveis para o engine backtrader.")
+
+
+def _check_low_memory(engine: str, use_stored_indicators: bool) -> None:
+    if engine != "backtrader":
+        raise ValueError("low_memory so esta disponivel para o engine backtrader.")
+    if use_stored_indicators:
+        raise ValueError("low_memory nao suporta use_stored_indicators.")
+
+
+def _check_engine(engine: str) -> None:
+    if engine not in ENGINES:
+        raise ValueError(f"Engine '{engine}' nao suportada. Opcoes: {', '.join(ENGINES)}.")
+
+
+def run_backtest_on_frame(
+    df: pd.DataFrame,
     *,
     ticker: str,
     strategy_type: str,
@@ -251,22 +433,35 @@ def run_backtest(
     initial_cash: float = 100000.0,
     commission: Optional[float] = None,
     timeframe: Optional[str] = "1d",
+    engine: str = "backtrader",
+    capture: str = "full",
+    analyzers: Optional[bool] = None,
 ) -> Dict[str, Any]:
-    df = load_price_data_from_db(ticker, start, end)
     strategy_cls, params, config = _resolve_strategy(strategy_type, strategy_params)
+    _check_engine(engine)
+    _check_capture(capture)
+    _check_analyzers(engine, analyzers)
 
     if commission is not None:
         params["commission"] = commission
 
-    min_history = config.min_history(params)
-    final_value, metrics, trades, positions, equity_curve = _run_backtrader(
-        df=df,
-        strategy_cls=strategy_cls,
-        strategy_kwargs=params,
-        initial_cash=initial_cash,
-        commission=commission,
-        min_history=min_history,
-    )
+    if engine == "vectorized":
+        final_value, metrics, trades, positions, equity_curve = run_vectorized(
+            df, strategy_cls, params, initial_cash, capture=capture
+        )
+    else:
+        min_history = config.min_history(params)
+        final_value, metrics, trades, positions, equity_curve = _run_backtrader(
+            df=df,
+            strategy_cls=strategy_cls,
+            strategy_kwargs=params,
+            initial_cash=initial_cash,
+            commission=commission,
+            min_history=min_history,
+            interval=timeframe,
+            capture=capture,
+            analyzers=analyzers,
+        )
 
     return {
         "ticker": ticker,
@@ -275,6 +470,8 @@ def run_backtest(
         "start": start,
         "end": end,
         "timeframe": timeframe,
+        "engine": engine,
+        "capture": capture,
         "initial_cash": initial_cash,
         "final_value": final_value,
         "metrics": metrics,
@@ -284,7 +481,64 @@ def run_backtest(
     }
 
 
-def run_backtest_and_save(
+def _peak_rss_mb() -> Optional[float]:
+    """Lifetime high-water mark of this process' resident memory, in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and in bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _current_rss_mb() -> Optional[float]:
+    """Resident memory of this process right now, in MB (None without ``/proc``)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class _RssSampler:
+    """Highest resident memory seen while the block runs, sampled every ``interval`` seconds.
+
+    Unlike the process high-water mark it only covers this block and does not
+    reset anything other runs rely on; spikes shorter than ``interval`` can be
+    missed. ``peak_mb`` is None where the RSS cannot be read.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak_mb: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _sample(self) -> None:
+        rss = _current_rss_mb()
+        if rss is not None and (self.peak_mb is None or rss > self.peak_mb):
+            self.peak_mb = rss
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> "_RssSampler":
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        if self.peak_mb is not None:
+            self.peak_mb = round(self.peak_mb, 1)
+
+
+def run_backtest_streaming(
     *,
     ticker: str,
     strategy_type: str,
@@ -294,9 +548,132 @@ def run_backtest_and_save(
     initial_cash: float = 100000.0,
     commission: Optional[float] = None,
     timeframe: Optional[str] = "1d",
+    capture: str = "equity_downsampled",
+    analyzers: Optional[bool] = None,
 ) -> Dict[str, Any]:
-    logger.info("backtest.run.start", ticker=ticker, strategy_type=strategy_type)
-    result = run_backtest(
+    """Low-memory Backtrader run: rows stream from a server-side cursor and lines keep ``exactbars`` buffers.
+
+    Memory stays roughly flat as the history grows unless ``capture="full"``,
+    whose positions and equity curve hold one row per bar. By default Sharpe
+    and drawdown come from Backtrader's analyzers and the other series
+    metrics are None; ``analyzers=False`` records the per-bar value (16 bytes
+    per bar) for the full ``app.metrics`` pack. The result carries
+    ``peak_rss_mb``, the highest resident memory sampled while Cerebro runs
+    (see ``_RssSampler``; None where it cannot be read). Other threads of the
+    process count towards it, but nothing outside the run does.
+    """
+    strategy_cls, params, _ = _resolve_strategy(strategy_type, strategy_params)
+    _check_capture(capture)
+    if commission is not None:
+        params["commission"] = commission
+
+    feed_timeframe, compression = _feed_timeframe(timeframe)
+    db = SessionLocal()
+    rows = iter_price_rows(ticker, timeframe, start, end, fetch_rows=settings.LOW_MEMORY_FETCH_ROWS, db=db)
+    try:
+        # Pull the first row here so that an empty range fails before Cerebro starts.
+        first = next(rows)
+        feed = StreamingPriceFeed(dataname=itertools.chain([first], rows), timeframe=feed_timeframe, compression=compression)
+        with _RssSampler() as sampler:
+            final_value, metrics, trades, positions, equity_curve = _run_cerebro(
+                feed,
+                strategy_cls,
+                params,
+                initial_cash,
+                commission,
+                capture=capture,
+                runonce=False,
+                low_memory=True,
+                analyzers=analyzers,
+            )
+    finally:
+        rows.close()
+        db.close()
+
+    peak_rss_mb = sampler.peak_mb
+    logger.info("backtest.run.low_memory", ticker=ticker, strategy_type=strategy_type, bars=len(feed), peak_rss_mb=peak_rss_mb)
+    return {
+        "ticker": ticker,
+        "strategy_type": strategy_type,
+        "strategy_params": params,
+        "start": start,
+        "end": end,
+        "timeframe": timeframe,
+        "engine": "backtrader",
+        "capture": capture,
+        "low_memory": True,
+        "peak_rss_mb": peak_rss_mb,
+        "initial_cash": initial_cash,
+        "final_value": final_value,
+        "metrics": metrics,
+        "trades": trades,
+        "positions": positions,
+        "equity_curve": equity_curve,
+    }
+
+
+def _with_stored_indicators(
+    df: pd.DataFrame,
+    ticker: str,
+    strategy_type: str,
+    strategy_params: Optional[Dict[str, Any]],
+    timeframe: Optional[str],
+) -> pd.DataFrame:
+    if is_intraday(timeframe):
+        raise ValueError("Indicadores armazenados so estao disponiveis para barras diarias.")
+    return attach_stored_indicators(df, ticker, strategy_type, strategy_params)
+
+
+def run_backtest(
+    *,
+    ticker: str,
+    strategy_type: str,
+    strategy_params: Optional[Dict[str, Any]] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    initial_cash: float = 100000.0,
+    commission: Optional[float] = None,
+    timeframe: Optional[str] = "1d",
+    use_stored_indicators: bool = False,
+    engine: str = "backtrader",
+    capture: str = "full",
+    low_memory: bool = False,
+    analyzers: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """Run one backtest.
+
+    With ``use_stored_indicators`` the strategy reads its indicators from the
+    ``indicators`` table (daily bars only) instead of computing them.
+    ``engine="vectorized"`` replays the strategy with NumPy instead of
+    Backtrader (see ``app.services.vectorized_engine``). ``capture`` picks what
+    is recorded besides the metrics (see ``app.strategies.capture.CAPTURE_LEVELS``).
+    ``low_memory`` streams the bars instead of loading them (see ``run_backtest_streaming``).
+    The metrics are computed after the run (``app.metrics``); ``analyzers=True``
+    takes Sharpe and drawdown from Backtrader's analyzers instead (the default
+    in low-memory runs only).
+    """
+    _check_engine(engine)
+    _check_capture(capture)
+    _check_analyzers(engine, analyzers)
+    if low_memory:
+        _check_low_memory(engine, use_stored_indicators)
+        return run_backtest_streaming(
+            ticker=ticker,
+            strategy_type=strategy_type,
+            strategy_params=strategy_params,
+            start=start,
+            end=end,
+            initial_cash=initial_cash,
+            commission=commission,
+            timeframe=timeframe,
+            capture=capture,
+            analyzers=analyzers,
+        )
+    df = load_price_data_from_db(ticker, start, end, interval=timeframe)
+    if use_stored_indicators:
+        df = _with_stored_indicators(df, ticker, strategy_type, strategy_params, timeframe)
+    return run_backtest_on_frame(
+        df,
         ticker=ticker,
         strategy_type=strategy_type,
         strategy_params=strategy_params,
@@ -305,70 +682,385 @@ def run_backtest_and_save(
         initial_cash=initial_cash,
         commission=commission,
         timeframe=timeframe,
+        engine=engine,
+        capture=capture,
+        analyzers=analyzers,
+    )
+
+
+def load_frames_for_tickers(
+    tickers: Sequence[str],
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    timeframe: Optional[str] = "1d",
+) -> Dict[str, pd.DataFrame]:
+    """Price frames keyed by ticker; tickers without data in the period are left out."""
+    if not is_intraday(timeframe):
+        return load_price_data_batch(tickers, start, end)
+
+    frames = {}
+    for ticker in dict.fromkeys(tickers):
+        try:
+            frames[ticker] = load_price_data_from_db(ticker, start, end, interval=timeframe)
+        except ValueError:
+            continue
+    return frames
+
+
+def run_backtest_batch(
+    *,
+    tickers: Sequence[str],
+    strategy_type: str,
+    strategy_params: Optional[Dict[str, Any]] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    initial_cash: float = 100000.0,
+    commission: Optional[float] = None,
+    timeframe: Optional[str] = "1d",
+    engine: str = "backtrader",
+    capture: str = "full",
+) -> Dict[str, Dict[str, Any]]:
+    """Run one strategy over many tickers, loading all prices up front.
+
+    Per-ticker failures are reported as ``{"error": ...}`` instead of aborting the batch.
+    """
+    _resolve_strategy(strategy_type, strategy_params)
+    _check_engine(engine)
+    _check_capture(capture)
+    frames = load_frames_for_tickers(tickers, start, end, timeframe)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for ticker in dict.fromkeys(tickers):
+        df = frames.get(ticker)
+        if df is None:
+            results[ticker] = {"error": f"Nenhum dado encontrado para {ticker} no periodo."}
+            continue
+        try:
+            results[ticker] = run_backtest_on_frame(
+                df,
+                ticker=ticker,
+                strategy_type=strategy_type,
+                strategy_params=strategy_params,
+                start=start,
+                end=end,
+                initial_cash=initial_cash,
+                commission=commission,
+                timeframe=timeframe,
+                engine=engine,
+                capture=capture,
+            )
+        except Exception as exc:
+            logger.exception("backtest.batch.ticker_failed", ticker=ticker, strategy_type=strategy_type)
+            results[ticker] = {"error": str(exc)}
+    return results
+
+
+def save_backtest_result(db, result: Dict[str, Any]) -> Backtest:
+    """Add a ``run_backtest`` result with its trades and positions; the caller commits."""
+    params = result["strategy_params"]
+    backtest = Backtest(
+        ticker=result["ticker"],
+        strategy_type=result["strategy_type"],
+        strategy_params=params,
+        fast_period=params.get("fast_period"),
+        slow_period=params.get("slow_period"),
+        start=result["start"],
+        end=result["end"],
+        initial_cash=result["initial_cash"],
+        final_value=result["final_value"],
+        status="completed",
+        metrics=result["metrics"],
+        capture=result.get("capture", "full"),
     )
+    db.add(backtest)
+    db.flush()
+
+    trades_rows = [
+        BacktestTrade(
+            backtest_id=backtest.id,
+            date=trade["date"],
+            operation=trade["operation"],
+            price=trade["price"],
+            size=trade["size"],
+            pnl=trade["pnl"],
+        )
+        for trade in result["trades"]
+    ]
+    if trades_rows:
+        db.add_all(trades_rows)
+
+    positions_rows = [
+        BacktestPosition(
+            backtest_id=backtest.id,
+            date=pos["date"],
+            position=pos["position"],
+            value=pos["value"],
+            equity=pos["equity"],
+        )
+        for pos in result["positions"]
+    ]
+    if positions_rows:
+        db.add_all(positions_rows)
+    return backtest
+
+
+def price_fingerprint(df: pd.DataFrame) -> str:
+    """Digest of the bars a run reads; changes whenever a bar in the range is added or revised."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(df.index.to_numpy(dtype="datetime64[ns]").view(np.int64).tobytes())
+    columns = [col for col in PRICE_COLUMNS if col in df.columns]
+    digest.update(",".join(columns).encode())
+    digest.update(np.ascontiguousarray(df[columns].to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+
+def indicator_fingerprint(df: pd.DataFrame) -> str:
+    """Digest of the indicator lines attached to ``df`` (every column besides the prices)."""
+    digest = hashlib.blake2b(digest_size=16)
+    columns = sorted(col for col in df.columns if col not in PRICE_COLUMNS)
+    digest.update(",".join(columns).encode())
+    digest.update(np.ascontiguousarray(df[columns].to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+
+def backtest_cache_key(
+    df: pd.DataFrame,
+    *,
+    ticker: str,
+    strategy_type: str,
+    params: Dict[str, Any],
+    start: Optional[str],
+    end: Optional[str],
+    initial_cash: float,
+    commission: Optional[float],
+    timeframe: Optional[str],
+    engine: str,
+    capture: str = "full",
+    use_stored_indicators: bool = False,
+) -> str:
+    """Content address of a run: its inputs, the engine version and the price data it reads.
+
+    With ``use_stored_indicators`` ``df`` carries the attached indicator lines,
+    which are fingerprinted too: stored series are computed over the full
+    history, so over a bounded range they can differ from a recompute.
+    """
+    inputs = {
+        "ticker": ticker,
+        "strategy_type": strategy_type,
+        "params": params,
+        "start": start,
+        "end": end,
+        "initial_cash": float(initial_cash),
+        "commission": commission,
+        "timeframe": timeframe,
+        "engine": ENGINE_VERSIONS[engine],
+        "prices": price_fingerprint(df),
+    }
+    if capture != "full":
+        # Only added below "full" so the keys of runs stored before capture levels still match.
+        inputs["capture"] = capture
+    if use_stored_indicators:
+        inputs["use_stored_indicators"] = True
+        inputs["indicators"] = indicator_fingerprint(df)
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+# Runs currently executing in this process, by cache key; identical requests wait on the same future.
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
 
+def _backtest_summary(backtest: Backtest, timeframe: Optional[str], cached: bool) -> Dict[str, Any]:
+    return {
+        "id": backtest.id,
+        "ticker": backtest.ticker,
+        "strategy_type": backtest.strategy_type,
+        "strategy_params": backtest.strategy_params,
+        "start": backtest.start,
+        "end": backtest.end,
+        "timeframe": timeframe,
+        "initial_cash": backtest.initial_cash,
+        "final_value": backtest.final_value,
+        "status": backtest.status,
+        "cached": cached,
+    }
+
+
+def _find_cached_backtest(cache_key: str, timeframe: Optional[str]) -> Optional[Dict[str, Any]]:
     db = SessionLocal()
     try:
-        backtest = Backtest(
+        backtest = db.execute(select(Backtest).where(Backtest.cache_key == cache_key)).scalars().first()
+        return _backtest_summary(backtest, timeframe, cached=True) if backtest is not None else None
+    finally:
+        db.close()
+
+
+def run_backtest_and_save(
+    *,
+    ticker: str,
+    strategy_type: str,
+    strategy_params: Optional[Dict[str, Any]] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    initial_cash: float = 100000.0,
+    commission: Optional[float] = None,
+    timeframe: Optional[str] = "1d",
+    use_stored_indicators: bool = False,
+    engine: str = "backtrader",
+    use_cache: bool = True,
+    capture: str = "full",
+    low_memory: bool = False,
+    analyzers: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """Run a backtest and persist it, or return the stored run with the same cache key.
+
+    Identical submissions that arrive while the first one is still running wait
+    for it instead of running again. ``low_memory`` runs are never cached: the
+    key fingerprints the loaded prices, which a streamed run does not load.
+    ``analyzers`` is left out of the key: both sources give the same figures.
+    """
+    _check_engine(engine)
+    _check_capture(capture)
+    _check_analyzers(engine, analyzers)
+    _, params, _ = _resolve_strategy(strategy_type, strategy_params)
+    if commission is not None:
+        params["commission"] = commission
+
+    if low_memory:
+        _check_low_memory(engine, use_stored_indicators)
+        return _run_and_save(
+            None,
+            cache_key=None,
             ticker=ticker,
             strategy_type=strategy_type,
-            strategy_params=result["strategy_params"],
-            fast_period=result["strategy_params"].get("fast_period"),
-            slow_period=result["strategy_params"].get("slow_period"),
+            strategy_params=strategy_params,
             start=start,
             end=end,
             initial_cash=initial_cash,
-            final_value=result["final_value"],
-            status="completed",
-            metrics=result["metrics"],
+            commission=commission,
+            timeframe=timeframe,
+            engine=engine,
+            capture=capture,
+            low_memory=True,
+            analyzers=analyzers,
         )
-        db.add(backtest)
-        db.commit()
-        db.refresh(backtest)
-
-        trades_rows = [
-            BacktestTrade(
-                backtest_id=backtest.id,
-                date=trade["date"],
-                operation=trade["operation"],
-                price=trade["price"],
-                size=trade["size"],
-                pnl=trade["pnl"],
-            )
-            for trade in result["trades"]
-        ]
-        if trades_rows:
-            db.add_all(trades_rows)
-
-        positions_rows = [
-            BacktestPosition(
-                backtest_id=backtest.id,
-                date=pos["date"],
-                position=pos["position"],
-                value=pos["value"],
-                equity=pos["equity"],
-            )
-            for pos in result["positions"]
-        ]
-        if positions_rows:
-            db.add_all(positions_rows)
 
-        db.commit()
+    df = load_price_data_from_db(ticker, start, end, interval=timeframe)
+    if use_stored_indicators:
+        df = _with_stored_indicators(df, ticker, strategy_type, strategy_params, timeframe)
+    cache_key = backtest_cache_key(
+        df,
+        ticker=ticker,
+        strategy_type=strategy_type,
+        params=params,
+        start=start,
+        end=end,
+        initial_cash=initial_cash,
+        commission=commission,
+        timeframe=timeframe,
+        engine=engine,
+        capture=capture,
+        use_stored_indicators=use_stored_indicators,
+    )
 
-        summary = {
-            "id": backtest.id,
-            "ticker": ticker,
-            "strategy_type": strategy_type,
-            "strategy_params": result["strategy_params"],
-            "start": start,
-            "end": end,
-            "timeframe": timeframe,
-            "initial_cash": initial_cash,
-            "final_value": result["final_value"],
-            "status": "completed",
-        }
+    owner = True
+    if use_cache:
+        cached = _find_cached_backtest(cache_key, timeframe)
+        if cached is not None:
+            logger.info("backtest.run.cache_hit", backtest_id=cached["id"], ticker=ticker, strategy_type=strategy_type)
+            return cached
+        with _inflight_lock:
+            future = _inflight.get(cache_key)
+            owner = future is None
+            if owner:
+                future = _inflight[cache_key] = Future()
+        if not owner:
+            logger.info("backtest.run.coalesced", ticker=ticker, strategy_type=strategy_type)
+            return {**future.result(), "cached": True}
+
+    try:
+        summary = _run_and_save(
+            df,
+            cache_key=cache_key if use_cache else None,
+            ticker=ticker,
+            strategy_type=strategy_type,
+            strategy_params=strategy_params,
+            start=start,
+            end=end,
+            initial_cash=initial_cash,
+            commission=commission,
+            timeframe=timeframe,
+            engine=engine,
+            capture=capture,
+            analyzers=analyzers,
+        )
+    except BaseException as exc:
+        if use_cache:
+            future.set_exception(exc)
+        raise
+    else:
+        if use_cache:
+            future.set_result(summary)
+        return summary
+    finally:
+        if use_cache:
+            with _inflight_lock:
+                _inflight.pop(cache_key, None)
+
+
+def _run_and_save(
+    df: Optional[pd.DataFrame],
+    *,
+    cache_key: Optional[str],
+    ticker: str,
+    strategy_type: str,
+    strategy_params: Optional[Dict[str, Any]],
+    start: Optional[str],
+    end: Optional[str],
+    initial_cash: float,
+    commission: Optional[float],
+    timeframe: Optional[str],
+    engine: str,
+    capture: str,
+    low_memory: bool = False,
+    analyzers: Optional[bool] = None,
+) -> Dict[str, Any]:
+    logger.info("backtest.run.start", ticker=ticker, strategy_type=strategy_type, engine=engine, low_memory=low_memory)
+    run_kwargs = dict(
+        ticker=ticker,
+        strategy_type=strategy_type,
+        strategy_params=strategy_params,
+        start=start,
+        end=end,
+        initial_cash=initial_cash,
+        commission=commission,
+        timeframe=timeframe,
+        capture=capture,
+        analyzers=analyzers,
+    )
+    if low_memory:
+        result = run_backtest_streaming(**run_kwargs)
+    else:
+        # Stored indicators, if any, are already attached to ``df`` (they are part of the cache key).
+        result = run_backtest_on_frame(df, engine=engine, **run_kwargs)
+
+    db = SessionLocal()
+    try:
+        backtest = save_backtest_result(db, result)
+        backtest.cache_key = cache_key
+        db.commit()
+        summary = _backtest_summary(backtest, timeframe, cached=False)
+        if low_memory:
+            summary["peak_rss_mb"] = result["peak_rss_mb"]
         logger.info("backtest.run.completed", backtest_id=backtest.id, ticker=ticker, strategy_type=strategy_type, final_value=result["final_value"])
         return summary
+    except IntegrityError:
+        # Another process stored the same cache key first; return its run.
+        db.rollback()
+        cached = _find_cached_backtest(cache_key, timeframe) if cache_key else None
+        if cached is None:
+            raise
+        return cached
     except Exception:
         db.rollback()
         logger.exception("backtest.run.error", ticker=ticker, strategy_type=strategy_type)
@@ -429,7 +1121,124 @@ def list_backtests(
         db.close()
 
 
-def get_backtest_results(backtest_id: int) -> Optional[Dict[str, Any]]:
+RESULT_FIELDS = ("metrics", "trades", "positions", "equity_curve", "rolling_metrics")
+RESULT_ROWS = {
+    "trades": (BacktestTrade, ("date", "operation", "price", "size", "pnl")),
+    "positions": (BacktestPosition, ("date", "position", "value", "equity")),
+}
+RESULT_PAGE_SIZE = 1000
+RESULT_MAX_PAGE_SIZE = 10_000
+
+
+def _check_fields(fields: Optional[Sequence[str]], options: Sequence[str]) -> Tuple[str, ...]:
+    if not fields:
+        return tuple(options)
+    unknown = [name for name in fields if name not in options]
+    if unknown:
+        raise ValueError(f"fields invalidos: {', '.join(unknown)}. Opcoes: {', '.join(options)}.")
+    return tuple(name for name in options if name in fields)
+
+
+def _row_query(kind: str, backtest_id: int, fields: Tuple[str, ...], after: Optional[int]):
+    # Rows are inserted in bar order, so the primary key is also the chronological order.
+    model, _ = RESULT_ROWS[kind]
+    query = (
+        select(model.id, *[getattr(model, name) for name in fields])
+        .where(model.backtest_id == backtest_id)
+        .order_by(model.id.asc())
+    )
+    return query if after is None else query.where(model.id > after)
+
+
+def _row_payload(fields: Tuple[str, ...], values) -> Dict[str, Any]:
+    row = dict(zip(fields, values))
+    if "date" in row:
+        row["date"] = row["date"].isoformat()
+    return row
+
+
+def _backtest_exists(db, backtest_id: int) -> bool:
+    return db.execute(select(Backtest.id).where(Backtest.id == backtest_id)).first() is not None
+
+
+def get_backtest_rows(
+    backtest_id: int,
+    kind: str,
+    *,
+    after: Optional[int] = None,
+    limit: int = RESULT_PAGE_SIZE,
+    fields: Optional[Sequence[str]] = None,
+) -> Optional[Dict[str, Any]]:
+    """One keyset page of a stored run's ``trades`` or ``positions``.
+
+    ``after`` is the ``next_after`` of the previous page (None for the first
+    one); ``next_after`` is None on the last page.
+    """
+    columns = _check_fields(fields, RESULT_ROWS[kind][1])
+    db = SessionLocal()
+    try:
+        if not _backtest_exists(db, backtest_id):
+            return None
+        rows = db.execute(_row_query(kind, backtest_id, columns, after).limit(limit + 1)).all()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            "backtest_id": backtest_id,
+            "items": [_row_payload(columns, row[1:]) for row in rows],
+            "next_after": rows[-1][0] if more else None,
+        }
+    finally:
+        db.close()
+
+
+def iter_backtest_rows(
+    backtest_id: int,
+    kind: str,
+    *,
+    after: Optional[int] = None,
+    fields: Optional[Sequence[str]] = None,
+    fetch_rows: Optional[int] = None,
+) -> Optional[Iterator[Dict[str, Any]]]:
+    """Check the request, then return an iterator over every ``trades``/``positions`` row after ``after``.
+
+    Validation errors are raised here and a missing backtest returns None, so
+    both happen before the first row. Rows are read with ``yield_per``
+    (``LOW_MEMORY_FETCH_ROWS`` per fetch by default), a server-side cursor on
+    PostgreSQL, so memory does not grow with the number of rows.
+    """
+    columns = _check_fields(fields, RESULT_ROWS[kind][1])
+    db = SessionLocal()
+    try:
+        exists = _backtest_exists(db, backtest_id)
+    finally:
+        db.close()
+    if not exists:
+        return None
+
+    def rows() -> Iterator[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            query = _row_query(kind, backtest_id, columns, after)
+            for row in db.execute(query.execution_options(yield_per=fetch_rows or settings.LOW_MEMORY_FETCH_ROWS)):
+                yield _row_payload(columns, row[1:])
+        finally:
+            db.close()
+
+    return rows()
+
+
+def get_backtest_results(
+    backtest_id: int,
+    rolling_window: int = ROLLING_WINDOW,
+    fields: Optional[Sequence[str]] = None,
+) -> Optional[Dict[str, Any]]:
+    """A stored run with its trades and positions, plus rolling Sharpe/drawdown of its equity.
+
+    ``rolling_metrics`` is None for ``equity_downsampled`` runs, whose stored
+    positions are thinned. ``fields`` restricts the payload to some of ``RESULT_FIELDS`` (the run's
+    summary is always included); rows that no requested field needs are not read.
+    """
+    selected = _check_fields(fields, RESULT_FIELDS)
     db = SessionLocal()
     try:
         backtest = db.execute(
@@ -438,45 +1247,7 @@ def get_backtest_results(backtest_id: int) -> Optional[Dict[str, Any]]:
         if not backtest:
             return None
 
-        trades = db.execute(
-            select(BacktestTrade)
-            .where(BacktestTrade.backtest_id == backtest_id)
-            .order_by(BacktestTrade.date.asc())
-        ).scalars().all()
-
-        positions = db.execute(
-            select(BacktestPosition)
-            .where(BacktestPosition.backtest_id == backtest_id)
-            .order_by(BacktestPosition.date.asc())
-        ).scalars().all()
-
-        trades_payload = [
-            {
-                "date": t.date.isoformat(),
-                "operation": t.operation,
-                "price": t.price,
-                "size": t.size,
-                "pnl": t.pnl,
-            }
-            for t in trades
-        ]
-
-        positions_payload = [
-            {
-                "date": p.date.isoformat(),
-                "position": p.position,
-                "value": p.value,
-                "equity": p.equity,
-            }
-            for p in positions
-        ]
-
-        equity_curve = [
-            {"date": item["date"], "equity": item["equity"]}
-            for item in positions_payload
-        ]
-
-        return {
+        payload: Dict[str, Any] = {
             "id": backtest.id,
             "ticker": backtest.ticker,
             "strategy_type": backtest.strategy_type,
@@ -486,11 +1257,37 @@ def get_backtest_results(backtest_id: int) -> Optional[Dict[str, Any]]:
             "initial_cash": backtest.initial_cash,
             "final_value": backtest.final_value,
             "status": backtest.status,
-            "metrics": backtest.metrics or {},
-            "trades": trades_payload,
-            "positions": positions_payload,
-            "equity_curve": equity_curve,
+            "capture": backtest.capture,
             "created_at": backtest.created_at.isoformat() if backtest.created_at else None,
         }
+        if "metrics" in selected:
+            payload["metrics"] = backtest.metrics or {}
+
+        if "trades" in selected:
+            columns = RESULT_ROWS["trades"][1]
+            trades = db.execute(_row_query("trades", backtest_id, columns, None)).all()
+            payload["trades"] = [_row_payload(columns, row[1:]) for row in trades]
+
+        if not {"positions", "equity_curve", "rolling_metrics"} & set(selected):
+            return payload
+        columns = RESULT_ROWS["positions"][1]
+        positions = db.execute(_row_query("positions", backtest_id, columns, None)).all()
+        if "positions" in selected:
+            payload["positions"] = [_row_payload(columns, row[1:]) for row in positions]
+        if "equity_curve" in selected:
+            payload["equity_curve"] = [{"date": row.date.isoformat(), "equity": row.equity} for row in positions]
+        if "rolling_metrics" in selected and backtest.capture == "equity_downsampled":
+            # Thinned rows are not daily closes: returns would span several days
+            # and the window would count samples, so there is no series to give.
+            payload["rolling_metrics"] = None
+        elif "rolling_metrics" in selected:
+            rolling = rolling_metrics(
+                np.array([row.date for row in positions], dtype="datetime64[D]"),
+                np.array([row.equity for row in positions], dtype=np.float64),
+                backtest.initial_cash,
+                rolling_window,
+            )
+            payload["rolling_metrics"] = [{**row, "date": row["date"].isoformat()} for row in rolling]
+        return payload
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,60 @@
+"""Storage for intraday bars keyed by ``(symbol_id, interval, ts)``.
+
+Daily bars keep living in ``prices``; anything finer goes to ``bars``, which on
+PostgreSQL is range-partitioned by month on ``ts``.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Optional
+
+import pandas as pd
+from sqlalchemy import func, select, text
+
+from app.db.bulk import BulkInsertResult, bulk_insert_ignore_duplicates
+from app.db.models.bar import Bar
+
+INTRADAY_INTERVALS = {"1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h"}
+
+
+def is_intraday(interval: Optional[str]) -> bool:
+    return interval in INTRADAY_INTERVALS
+
+
+def _month_starts(first: datetime, last: datetime) -> List[pd.Timestamp]:
+    start = pd.Timestamp(first).to_period("M").to_timestamp()
+    stop = pd.Timestamp(last).to_period("M").to_timestamp()
+    return list(pd.date_range(start, stop, freq="MS"))
+
+
+def ensure_bar_partitions(db, first: datetime, last: datetime) -> int:
+    """Create the monthly ``bars`` partitions covering ``[first, last]`` (PostgreSQL only)."""
+    if db.get_bind().dialect.name != "postgresql":
+        return 0
+
+    created = 0
+    for month in _month_starts(first, last):
+        upper = month + pd.offsets.MonthBegin(1)
+        name = f"bars_p{month:%Y%m}"
+        db.execute(
+            text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF bars '
+                f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+            )
+        )
+        created += 1
+    return created
+
+
+def get_bar_watermark(db, symbol_id: int, interval: str):
+    return db.execute(
+        select(func.max(Bar.ts)).where(Bar.symbol_id == symbol_id, Bar.interval == interval)
+    ).scalar()
+
+
+def save_bars_bulk_ignore_duplicates(db, rows: List[dict]) -> BulkInsertResult:
+    if not rows:
+        return BulkInsertResult(inserted=0, skipped=0)
+    timestamps = [row["ts"] for row in rows]
+    ensure_bar_partitions(db, min(timestamps), max(timestamps))
+    return bulk_insert_ignore_duplicates(db, Bar.__table__, rows, conflict_columns=["symbol_id", "interval", "ts"])
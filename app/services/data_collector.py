@@ -1,17 +1,30 @@
 from __future__ import annotations
 
 import argparse
-from datetime import datetime
-from typing import Iterable, List, Optional
+import math
+from datetime import datetime, timedelta
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional
 
+import numpy as np
 import pandas as pd
+import structlog
 import yfinance as yf
-from sqlalchemy import select
-from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import bindparam, func, select, update
 
+from app.core.config import settings
+from app.db.bulk import bulk_insert_ignore_duplicates
 from app.db.session import SessionLocal
 from app.db.models.symbol import Symbol
 from app.db.models.price import Price
+from app.services.bar_store import get_bar_watermark, is_intraday, save_bars_bulk_ignore_duplicates
+from app.services.indicator_service import invalidate_indicators_since
+from app.services.price_cache import price_cache
+from app.services.price_mirror import refresh_price_mirror
+
+logger = structlog.get_logger(__name__)
+
+PRICE_VALUE_COLUMNS = ("open", "high", "low", "close", "volume")
 
 
 def _normalize_datestr(date_str: Optional[str]) -> Optional[str]:
@@ -71,67 +84,173 @@ def fetch_prices_yf(
 
 
 
+_SOURCE_COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+
+
+def _column_for_insert(df: pd.DataFrame, name: str) -> np.ndarray:
+    """Coerce one downloaded column to floats, with NaN/unparseable values as None (NULL)."""
+    if name not in df.columns:
+        return np.full(len(df), None, dtype=object)
+    column = df[name]
+    if isinstance(column, pd.DataFrame):
+        # Duplicated labels after flattening yfinance's MultiIndex: keep the first one.
+        column = column.iloc[:, 0]
+    values = pd.to_numeric(column, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    result = values.astype(object)
+    result[np.isnan(values)] = None
+    return result
+
+
 def _prepare_rows_for_insert(df: pd.DataFrame, symbol_id: int) -> List[dict]:
     if df.empty:
         return []
 
-    rows: List[dict] = []
-    for ts, row in df.iterrows():
-        d = ts.date()
+    dates = pd.DatetimeIndex(df.index).date
+    keys = ("symbol_id", "date", *PRICE_VALUE_COLUMNS)
+    columns = [_column_for_insert(df, _SOURCE_COLUMNS[col]) for col in PRICE_VALUE_COLUMNS]
+    return [dict(zip(keys, record)) for record in zip(repeat(symbol_id), dates, *columns)]
 
-        def safe_float(value):
-            try:
-                if hasattr(value, "iloc"):
-                    return float(value.iloc[0])
-                return float(value)
-            except Exception:
-                return None
-
-        rows.append(
-            {
-                "symbol_id": symbol_id,
-                "date": d,
-                "open": safe_float(row.get("Open")),
-                "high": safe_float(row.get("High")),
-                "low": safe_float(row.get("Low")),
-                "close": safe_float(row.get("Close")),
-                "volume": safe_float(row.get("Volume")),
-            }
-        )
-    return rows
+
+def _prepare_bar_rows(df: pd.DataFrame, symbol_id: int, interval: str) -> List[dict]:
+    if df.empty:
+        return []
+
+    timestamps = pd.DatetimeIndex(df.index).to_pydatetime()
+    keys = ("symbol_id", "interval", "ts", *PRICE_VALUE_COLUMNS)
+    columns = [_column_for_insert(df, _SOURCE_COLUMNS[col]) for col in PRICE_VALUE_COLUMNS]
+    return [dict(zip(keys, record)) for record in zip(repeat(symbol_id), repeat(interval), timestamps, *columns)]
+
+
+def _load_existing_rows(db, symbol_id: int, first, last) -> Dict:
+    q = select(Price.date, *[getattr(Price, col) for col in PRICE_VALUE_COLUMNS]).where(
+        Price.symbol_id == symbol_id,
+        Price.date >= first,
+        Price.date <= last,
+    )
+    return {row[0]: row[1:] for row in db.execute(q).all()}
 
 
 def _filter_already_existing_dates(
     db, symbol_id: int, candidate_dates: Iterable
 ) -> List:
+    candidate_dates = list(candidate_dates)
     if not candidate_dates:
         return []
 
-    candidate_dates = list(candidate_dates)
+    # A range scan on (symbol_id, date) instead of shipping every date in an IN list.
     q = select(Price.date).where(
         Price.symbol_id == symbol_id,
-        Price.date.in_(candidate_dates),
+        Price.date >= min(candidate_dates),
+        Price.date <= max(candidate_dates),
     )
     existing = set(db.scalars(q).all())
     return [d for d in candidate_dates if d not in existing]
 
 
-def save_prices_bulk_ignore_duplicates(db, rows: List[dict]) -> int:
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _values_differ(stored, candidate) -> bool:
+    for old, new in zip(stored, candidate):
+        if _is_missing(old) or _is_missing(new):
+            if _is_missing(old) != _is_missing(new):
+                return True
+            continue
+        if not math.isclose(old, new, rel_tol=1e-9, abs_tol=1e-12):
+            return True
+    return False
+
+
+def _split_new_and_revised(db, symbol_id: int, candidate_rows: List[dict]):
+    if not candidate_rows:
+        return [], []
+    dates = [r["date"] for r in candidate_rows]
+    existing = _load_existing_rows(db, symbol_id, min(dates), max(dates))
+
+    new_rows: List[dict] = []
+    revised_rows: List[dict] = []
+    for row in candidate_rows:
+        stored = existing.get(row["date"])
+        if stored is None:
+            new_rows.append(row)
+        elif _values_differ(stored, [row[col] for col in PRICE_VALUE_COLUMNS]):
+            revised_rows.append(row)
+    return new_rows, revised_rows
+
+
+def _apply_revisions(db, rows: List[dict]) -> int:
     if not rows:
         return 0
-    stmt = pg_insert(Price).values(rows)
-    stmt = stmt.on_conflict_do_nothing(index_elements=["symbol_id", "date"])
-    db.execute(stmt)
+    stmt = (
+        update(Price.__table__)
+        .where(Price.symbol_id == bindparam("b_symbol_id"), Price.date == bindparam("b_date"))
+        .values({col: bindparam(f"b_{col}") for col in PRICE_VALUE_COLUMNS})
+    )
+    db.execute(stmt, [{f"b_{key}": value for key, value in row.items()} for row in rows])
     return len(rows)
 
 
+def get_price_watermark(db, symbol_id: int):
+    return db.execute(select(func.max(Price.date)).where(Price.symbol_id == symbol_id)).scalar()
+
+
+def save_prices_bulk_ignore_duplicates(db, rows: List[dict]) -> int:
+    """Insert price rows (COPY on PostgreSQL) and return how many were actually inserted."""
+    if not rows:
+        return 0
+    result = bulk_insert_ignore_duplicates(db, Price.__table__, rows, conflict_columns=["symbol_id", "date"])
+    return result.inserted
+
+
+def _update_bars_for_symbol(db, symbol, start, end, interval: str, incremental: bool) -> dict:
+    if incremental and start is None:
+        watermark = get_bar_watermark(db, symbol.id, interval)
+        if watermark is not None:
+            start = watermark.date().isoformat()
+
+    df = fetch_prices_yf(ticker=symbol.ticker, start=start, end=end, interval=interval)
+    if df.empty:
+        return {
+            "ticker": symbol.ticker,
+            "interval": interval,
+            "downloaded": 0,
+            "inserted": 0,
+            "revised": 0,
+            "skipped": 0,
+            "message": "Nenhum dado retornado do Yahoo Finance.",
+        }
+
+    rows = _prepare_bar_rows(df, symbol_id=symbol.id, interval=interval)
+    result = save_bars_bulk_ignore_duplicates(db, rows)
+    db.commit()
+
+    return {
+        "ticker": symbol.ticker,
+        "interval": interval,
+        "downloaded": len(rows),
+        "inserted": result.inserted,
+        "revised": 0,
+        "skipped": result.skipped,
+        "message": "Barras intraday atualizadas com sucesso.",
+    }
+
+
 def update_prices_for_ticker(
     ticker: str,
     start: Optional[str] = None,
     end: Optional[str] = None,
     interval: str = "1d",
-    db=None
+    db=None,
+    incremental: bool = False,
 ) -> dict:
+    """Download and store OHLCV bars for ``ticker``.
+
+    With ``incremental=True`` and no explicit ``start``, only bars from the stored
+    watermark (max date) minus ``PRICE_REFRESH_OVERLAP_DAYS`` are downloaded, and
+    stored bars inside that overlap whose values changed upstream are updated.
+    Intraday intervals are stored in ``bars`` instead of ``prices``.
+    """
     close_db = False
     if db is None:
         db = SessionLocal()
@@ -145,6 +264,14 @@ def update_prices_for_ticker(
         if symbol is None:
             raise ValueError(f"Ticker '{ticker}' nAo encontrado na base.")
 
+        if is_intraday(interval):
+            return _update_bars_for_symbol(db, symbol, start, end, interval, incremental)
+
+        if incremental and start is None:
+            watermark = get_price_watermark(db, symbol.id)
+            if watermark is not None:
+                start = (watermark - timedelta(days=settings.PRICE_REFRESH_OVERLAP_DAYS)).isoformat()
+
         df = fetch_prices_yf(ticker=ticker, start=start, end=end, interval=interval)
 
         if df.empty:
@@ -152,23 +279,42 @@ def update_prices_for_ticker(
                 "ticker": ticker,
                 "downloaded": 0,
                 "inserted": 0,
+                "revised": 0,
                 "skipped": 0,
                 "message": "Nenhum dado retornado do Yahoo Finance.",
             }
 
         candidate_rows = _prepare_rows_for_insert(df, symbol_id=symbol.id)
-        candidate_dates = [r["date"] for r in candidate_rows]
-        new_dates = _filter_already_existing_dates(db, symbol_id=symbol.id, candidate_dates=candidate_dates)
-        rows_new_only = [r for r in candidate_rows if r["date"] in new_dates]
+        if incremental:
+            rows_new_only, revised_rows = _split_new_and_revised(db, symbol.id, candidate_rows)
+        else:
+            new_dates = set(
+                _filter_already_existing_dates(db, symbol_id=symbol.id, candidate_dates=[r["date"] for r in candidate_rows])
+            )
+            rows_new_only = [r for r in candidate_rows if r["date"] in new_dates]
+            revised_rows = []
 
         inserted_attempts = save_prices_bulk_ignore_duplicates(db, rows_new_only)
+        revised = _apply_revisions(db, revised_rows)
+        if revised:
+            # Stored indicators only refresh past their last date; drop the values the revision changed.
+            invalidated = invalidate_indicators_since(db, symbol.id, min(r["date"] for r in revised_rows))
+            logger.info("prices.revised", ticker=ticker, revised=revised, indicators_invalidated=invalidated)
         db.commit()
+        if inserted_attempts or revised:
+            price_cache.invalidate(ticker)
+            try:
+                changed_since = min(r["date"] for r in rows_new_only + revised_rows)
+                refresh_price_mirror(ticker, since=changed_since, db=db)
+            except Exception:
+                logger.exception("price_mirror.refresh_failed", ticker=ticker)
 
         return {
             "ticker": ticker,
             "downloaded": len(candidate_rows),
             "inserted": inserted_attempts,
-            "skipped": len(candidate_rows) - inserted_attempts,
+            "revised": revised,
+            "skipped": len(candidate_rows) - inserted_attempts - revised,
             "message": "Precos atualizados com sucesso.",
         }
     finally:
@@ -181,7 +327,8 @@ def main():
     parser.add_argument("--ticker", required=True, help="Ticker (ex.: PETR4.SA)")
     parser.add_argument("--start", required=False, default=None, help="Data inicial (YYYY-MM-DD)")
     parser.add_argument("--end", required=False, default=None, help="Data final (YYYY-MM-DD)")
-    parser.add_argument("--interval", required=False, default="1d", help="Intervalo (ex.: 1d, 1wk, 1mo)")
+    parser.add_argument("--interval", required=False, default="1d", help="Intervalo (ex.: 1d, 1wk, 1mo, 5m, 1h)")
+    parser.add_argument("--incremental", action="store_true", help="Baixa apenas a partir da ultima data armazenada")
 
     args = parser.parse_args()
 
@@ -190,6 +337,7 @@ def main():
         start=args.start,
         end=args.end,
         interval=args.interval,
+        incremental=args.incremental,
     )
     print(summary)
 
@@ -1,18 +1,113 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
 import pandas as pd
-from sqlalchemy import select
-from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import delete, func, select
 
+from app.core.config import settings
+from app.db.bulk import bulk_insert_ignore_duplicates
 from app.db.session import SessionLocal
 from app.db.models.symbol import Symbol
 from app.db.models.price import Price
 from app.db.models.indicator import Indicator
+from app.indicators import INDICATORS, IndicatorSpec, parse_indicator_specs
 
 
 def calculate_sma(prices: pd.DataFrame, window: int) -> pd.Series:
     return prices["close"].rolling(window=window).mean()
 
 
-def update_sma_for_ticker(ticker: str, window: int = 20, db=None) -> dict:
+def get_indicator_watermark(db, symbol_id: int, name: str, params: str):
+    return db.execute(
+        select(func.max(Indicator.date)).where(
+            Indicator.symbol_id == symbol_id,
+            Indicator.name == name,
+            Indicator.params == params,
+        )
+    ).scalar()
+
+
+def _get_watermarks(db, symbol_id: int, specs: Sequence[IndicatorSpec]) -> Dict[IndicatorSpec, object]:
+    """Last stored date per spec, in one grouped query."""
+    rows = db.execute(
+        select(Indicator.name, Indicator.params, func.max(Indicator.date))
+        .where(
+            Indicator.symbol_id == symbol_id,
+            Indicator.name.in_({spec.name for spec in specs}),
+        )
+        .group_by(Indicator.name, Indicator.params)
+    ).all()
+    stored = {(name, params): last for name, params, last in rows}
+    return {spec: stored.get((spec.name, spec.params)) for spec in specs}
+
+
+def _get_indicator_value(db, symbol_id: int, spec: IndicatorSpec, on):
+    return db.execute(
+        select(Indicator.value).where(
+            Indicator.symbol_id == symbol_id,
+            Indicator.name == spec.name,
+            Indicator.params == spec.params,
+            Indicator.date == on,
+        )
+    ).scalar()
+
+
+def _load_price_columns(db, symbol_id: int, columns: Sequence[str], after=None, trailing: int = 0) -> pd.DataFrame:
+    """Price columns after ``after`` (all when None), preceded by ``trailing`` bars on/before it."""
+    selected = [getattr(Price, col) for col in columns]
+    q = select(Price.date, *selected).where(Price.symbol_id == symbol_id).order_by(Price.date.asc())
+    if after is not None:
+        q = q.where(Price.date > after)
+    rows = db.execute(q).all()
+
+    if after is not None and trailing > 0 and rows:
+        history = db.execute(
+            select(Price.date, *selected)
+            .where(Price.symbol_id == symbol_id, Price.date <= after)
+            .order_by(Price.date.desc())
+            .limit(trailing)
+        ).all()
+        rows = list(reversed(history)) + list(rows)
+
+    return pd.DataFrame(rows, columns=["date", *columns]).set_index("date")
+
+
+def _new_values(db, symbol_id: int, spec: IndicatorSpec, dates: np.ndarray, columns: Dict[str, np.ndarray], last_date):
+    """Values of ``spec`` for the bars after ``last_date`` (every bar when None)."""
+    if last_date is None:
+        return dates, spec.compute(columns)
+
+    first_new = int(np.searchsorted(dates, np.datetime64(last_date, "D"), side="right"))
+    if first_new >= dates.shape[0]:
+        return dates[:0], np.empty(0)
+
+    lo = 0 if spec.warmup is None else max(first_new - spec.warmup, 0)
+    seed = _get_indicator_value(db, symbol_id, spec, last_date) if spec.recursive else None
+    window = {col: values[lo:] for col, values in columns.items()}
+    values = spec.compute(window, seed=seed)
+    return dates[first_new:], values[first_new - lo :]
+
+
+def update_indicators_for_ticker(
+    ticker: str,
+    specs: Optional[Sequence[IndicatorSpec]] = None,
+    db=None,
+    incremental: bool = True,
+) -> dict:
+    """Persist every indicator in ``specs`` for ``ticker`` from a single price load.
+
+    Defaults to ``settings.SCHEDULER_INDICATORS``. In incremental mode the load
+    starts at the oldest watermark among the specs, preceded by the largest
+    warm-up any of them needs, and each spec only emits bars after its own
+    watermark. EMA/ATR continue from their last stored value. Specs whose
+    ``warmup`` is None (e.g. ``ML_PROB`` with sparse refits) depend on the
+    whole history, which is then loaded from the first bar.
+    """
+    specs = list(specs) if specs is not None else parse_indicator_specs(settings.SCHEDULER_INDICATORS)
+    if not specs:
+        raise ValueError("Nenhum indicador informado.")
+    label = ", ".join(dict.fromkeys(spec.name for spec in specs))
+
     close_db = False
     if db is None:
         db = SessionLocal()
@@ -26,47 +121,158 @@ def update_sma_for_ticker(ticker: str, window: int = 20, db=None) -> dict:
         if symbol is None:
             raise ValueError(f"Ticker '{ticker}' não encontrado no banco.")
 
-        q = select(Price).where(Price.symbol_id == symbol.id).order_by(Price.date.asc())
-        prices = db.execute(q).scalars().all()
-        if not prices:
+        watermarks = _get_watermarks(db, symbol.id, specs) if incremental else dict.fromkeys(specs)
+        stored = [last for last in watermarks.values() if last is not None]
+        full_history = any(spec.warmup is None for spec in specs)
+        after = min(stored) if len(stored) == len(specs) and not full_history else None
+        inputs = list(dict.fromkeys(col for spec in specs for col in spec.inputs))
+
+        trailing = max(spec.warmup or 0 for spec in specs)
+        df = _load_price_columns(db, symbol.id, inputs, after=after, trailing=trailing)
+        if df.empty:
             return {
                 "ticker": ticker,
                 "inserted": 0,
-                "message": "Nenhum preço encontrado."
+                "message": "Nenhum preço encontrado." if after is None else "Nenhum preço novo desde o último cálculo."
             }
 
-        df = pd.DataFrame([{"date": p.date, "close": p.close} for p in prices]).set_index("date")
-        sma_series = calculate_sma(df, window)
+        dates = pd.to_datetime(df.index).values.astype("datetime64[D]")
+        columns = {col: df[col].to_numpy(dtype=np.float64, na_value=np.nan) for col in inputs}
 
         rows = []
-        for date, value in sma_series.dropna().items():
-            rows.append({
-                "symbol_id": symbol.id,
-                "date": date,
-                "name": "SMA",
-                "value": float(value),
-                "params": f"window={window}"
-            })
+        for spec in specs:
+            spec_dates, values = _new_values(db, symbol.id, spec, dates, columns, watermarks[spec])
+            valid = np.isfinite(values)
+            rows.extend(
+                {
+                    "symbol_id": symbol.id,
+                    "date": day,
+                    "name": spec.name,
+                    "value": value,
+                    "params": spec.params,
+                }
+                for day, value in zip(spec_dates[valid].tolist(), values[valid].tolist())
+            )
 
         if not rows:
             return {
                 "ticker": ticker,
                 "inserted": 0,
-                "message": "Nenhum valor de SMA calculado."
+                "message": f"Nenhum valor de {label} calculado."
             }
 
-        stmt = pg_insert(Indicator).values(rows)
-        stmt = stmt.on_conflict_do_nothing(
-            index_elements=["symbol_id", "date", "name", "params"]
+        result = bulk_insert_ignore_duplicates(
+            db, Indicator.__table__, rows, conflict_columns=["symbol_id", "date", "name", "params"]
         )
-        result = db.execute(stmt)
         db.commit()
 
         return {
             "ticker": ticker,
-            "inserted": result.rowcount if result.rowcount is not None else len(rows),
-            "message": "SMA atualizado com sucesso."
+            "inserted": result.inserted,
+            "skipped": result.skipped,
+            "message": f"{label} atualizado com sucesso."
         }
     finally:
         if close_db:
-            db.close()
\ No newline at end of file
+            db.close()
+
+
+def update_sma_for_ticker(ticker: str, window: int = 20, db=None, incremental: bool = True) -> dict:
+    """Persist SMA(window) values for ``ticker``.
+
+    In incremental mode only bars after the last stored value are computed,
+    using the ``window - 1`` preceding bars as warm-up.
+    """
+    return update_indicators_for_ticker(ticker, [IndicatorSpec("SMA", window)], db=db, incremental=incremental)
+
+
+def _stored_warmup(name: str, params: Optional[str]) -> Optional[int]:
+    """``warmup`` of a stored series; None when it depends on the whole history or is unknown (e.g. ``ML_PROB``)."""
+    definition = INDICATORS.get(name)
+    _, _, period = (params or "").partition("=")
+    if definition is None or not period.isdigit():
+        return None
+    return definition.warmup(int(period))
+
+
+def invalidate_indicators_since(db, symbol_id: int, since) -> int:
+    """Delete stored values that bars dated on/after ``since`` may have changed; the caller commits.
+
+    Each series loses its values from ``warmup`` bars before ``since`` onward,
+    or all of them when its ``warmup`` is None, so the next refresh recomputes
+    them from the revised prices. Returns the number of rows deleted.
+    """
+    series = db.execute(
+        select(Indicator.name, Indicator.params).where(Indicator.symbol_id == symbol_id).distinct()
+    ).all()
+    deleted = 0
+    for name, params in series:
+        stmt = delete(Indicator).where(
+            Indicator.symbol_id == symbol_id, Indicator.name == name, Indicator.params == params
+        )
+        warmup = _stored_warmup(name, params)
+        if warmup is not None:
+            earlier = db.execute(
+                select(Price.date)
+                .where(Price.symbol_id == symbol_id, Price.date < since)
+                .order_by(Price.date.desc())
+                .limit(warmup)
+            ).scalars().all()
+            stmt = stmt.where(Indicator.date >= (earlier[-1] if earlier else since))
+        deleted += db.execute(stmt).rowcount
+    return deleted
+
+
+def load_indicator_frame(
+    ticker: str,
+    specs: Sequence[IndicatorSpec],
+    start=None,
+    end=None,
+    db=None,
+    refresh: bool = True,
+) -> pd.DataFrame:
+    """Stored values of ``specs`` for ``ticker``, one ``spec.line_name`` column each.
+
+    With ``refresh`` any spec whose last stored value is older than the last
+    price is brought up to date (and persisted) first.
+    """
+    specs = list(dict.fromkeys(specs))
+    close_db = False
+    if db is None:
+        db = SessionLocal()
+        close_db = True
+
+    try:
+        symbol = db.execute(
+            select(Symbol).where(Symbol.ticker == ticker)
+        ).scalar_one_or_none()
+
+        if symbol is None:
+            raise ValueError(f"Ticker '{ticker}' não encontrado no banco.")
+
+        if refresh and specs:
+            last_price = db.execute(select(func.max(Price.date)).where(Price.symbol_id == symbol.id)).scalar()
+            watermarks = _get_watermarks(db, symbol.id, specs)
+            stale = [spec for spec, last in watermarks.items() if last is None or (last_price and last < last_price)]
+            if stale:
+                update_indicators_for_ticker(ticker, stale, db=db)
+
+        q = select(Indicator.date, Indicator.name, Indicator.params, Indicator.value).where(
+            Indicator.symbol_id == symbol.id,
+            Indicator.name.in_({spec.name for spec in specs}),
+        )
+        if start is not None:
+            q = q.where(Indicator.date >= pd.Timestamp(start).date())
+        if end is not None:
+            q = q.where(Indicator.date <= pd.Timestamp(end).date())
+        rows = pd.DataFrame(db.execute(q).all(), columns=["date", "name", "params", "value"])
+
+        frame = pd.DataFrame(index=pd.DatetimeIndex(pd.to_datetime(rows["date"]).unique(), name="datetime").sort_values())
+        for spec in specs:
+            selected = rows[(rows["name"] == spec.name) & (rows["params"] == spec.params)]
+            series = pd.Series(selected["value"].to_numpy(dtype=np.float64), index=pd.to_datetime(selected["date"]))
+            frame[spec.line_name] = series.reindex(frame.index)
+        return frame
+    finally:
+        if close_db:
+            db.close()
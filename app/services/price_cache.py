@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import structlog
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db.models.backtest import Backtest
+from app.db.models.symbol import Symbol
+from app.services.price_loader import PriceArrays
+
+logger = structlog.get_logger(__name__)
+
+
+class PriceCache:
+    """Bounded LRU of full per-symbol price histories, held as read-only float blocks."""
+
+    def __init__(self, max_symbols: int):
+        self.max_symbols = max(int(max_symbols), 0)
+        self._entries: "OrderedDict[str, PriceArrays]" = OrderedDict()
+        # Bumped by ``invalidate``: a load that started before the bump holds stale prices.
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_symbols > 0
+
+    def get(self, ticker: str) -> Optional[PriceArrays]:
+        with self._lock:
+            arrays = self._entries.get(ticker)
+            if arrays is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(ticker)
+            self.hits += 1
+            return arrays
+
+    def put(self, ticker: str, arrays: PriceArrays, generation: Optional[int] = None) -> None:
+        """Cache ``arrays``; with ``generation``, only if ``ticker`` was not invalidated since."""
+        if not self.enabled:
+            return
+        arrays.dates.setflags(write=False)
+        arrays.values.setflags(write=False)
+        with self._lock:
+            if generation is not None and self._generations.get(ticker, 0) != generation:
+                logger.info("price_cache.stale_load_dropped", ticker=ticker)
+                return
+            self._entries[ticker] = arrays
+            self._entries.move_to_end(ticker)
+            while len(self._entries) > self.max_symbols:
+                evicted, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+                logger.info("price_cache.evicted", ticker=evicted)
+
+    def get_or_load(self, ticker: str, loader: Callable[[str], PriceArrays]) -> PriceArrays:
+        with self._lock:
+            generation = self._generations.get(ticker, 0)
+        arrays = self.get(ticker)
+        if arrays is None:
+            arrays = loader(ticker)
+            self.put(ticker, arrays, generation=generation)
+        return arrays
+
+    def invalidate(self, ticker: str) -> None:
+        with self._lock:
+            self._generations[ticker] = self._generations.get(ticker, 0) + 1
+            if self._entries.pop(ticker, None) is not None:
+                self.invalidations += 1
+                logger.info("price_cache.invalidated", ticker=ticker)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.invalidations = 0
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "max_symbols": self.max_symbols,
+                "size": len(self._entries),
+                "bytes": int(sum(a.values.nbytes + a.dates.nbytes for a in self._entries.values())),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "tickers": list(self._entries.keys()),
+            }
+
+
+price_cache = PriceCache(settings.PRICE_CACHE_MAX_SYMBOLS)
+
+
+def most_used_tickers(limit: int, db=None) -> List[str]:
+    close_db = False
+    if db is None:
+        db = SessionLocal()
+        close_db = True
+
+    try:
+        usage = func.count(Backtest.id)
+        query = (
+            select(Backtest.ticker)
+            .join(Symbol, Symbol.ticker == Backtest.ticker)
+            .group_by(Backtest.ticker)
+            .order_by(usage.desc(), Backtest.ticker.asc())
+            .limit(limit)
+        )
+        return list(db.execute(query).scalars().all())
+    finally:
+        if close_db:
+            db.close()
+
+
+def warm_up_price_cache(loader: Callable[[str], PriceArrays], top_n: int, db=None) -> List[str]:
+    """Preload the ``top_n`` tickers with the most stored backtests."""
+    if not price_cache.enabled or top_n <= 0:
+        return []
+
+    loaded: List[str] = []
+    for ticker in most_used_tickers(min(top_n, price_cache.max_symbols), db=db):
+        try:
+            price_cache.get_or_load(ticker, loader)
+            loaded.append(ticker)
+        except Exception:
+            logger.exception("price_cache.warmup_failed", ticker=ticker)
+    logger.info("price_cache.warmed_up", tickers=loaded)
+    return loaded
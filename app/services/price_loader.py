@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.db.models.bar import Bar
+from app.db.models.price import Price
+from app.db.models.symbol import Symbol
+from app.services.bar_store import is_intraday
+
+
+PRICE_COLUMNS: Tuple[str, ...] = ("open", "high", "low", "close", "volume")
+BATCH_CHUNK_SIZE = 100
+
+
+@dataclass(frozen=True)
+class PriceArrays:
+    """Columnar price history: one date vector plus a 2-D float block (bars x columns)."""
+
+    dates: np.ndarray
+    values: np.ndarray
+    columns: Tuple[str, ...] = PRICE_COLUMNS
+
+    def __len__(self) -> int:
+        return int(self.dates.shape[0])
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, self.columns.index(name)]
+
+    def select(self, columns: Sequence[str]) -> "PriceArrays":
+        columns = _validate_columns(columns)
+        if columns == self.columns:
+            return self
+        positions = [self.columns.index(col) for col in columns]
+        return PriceArrays(dates=self.dates, values=self.values[:, positions], columns=columns)
+
+    def slice(self, start: Optional[str] = None, end: Optional[str] = None) -> "PriceArrays":
+        """Return the bars within ``[start, end]`` (inclusive) as views over the same buffers."""
+        lo = 0
+        hi = len(self)
+        if start:
+            lo = int(np.searchsorted(self.dates, _to_day(start), side="left"))
+        if end:
+            hi = int(np.searchsorted(self.dates, _to_day(end), side="right"))
+        return PriceArrays(dates=self.dates[lo:hi], values=self.values[lo:hi], columns=self.columns)
+
+    def to_frame(self) -> pd.DataFrame:
+        index = pd.DatetimeIndex(self.dates, name="datetime")
+        return pd.DataFrame(self.values, index=index, columns=list(self.columns), copy=True)
+
+
+def _to_day(value) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(value).date(), "D")
+
+
+def _validate_columns(columns: Sequence[str]) -> Tuple[str, ...]:
+    unknown = [col for col in columns if col not in PRICE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Colunas de preco invalidas: {', '.join(unknown)}")
+    return tuple(columns)
+
+
+def _arrays_from_rows(rows, columns: Tuple[str, ...], date_dtype: str = "datetime64[D]") -> PriceArrays:
+    return _arrays_from_transposed(list(zip(*rows)), columns, date_dtype)
+
+
+def _arrays_from_transposed(transposed, columns: Tuple[str, ...], date_dtype: str = "datetime64[D]") -> PriceArrays:
+    dates = np.array(transposed[0], dtype=date_dtype)
+    values = np.empty((dates.shape[0], len(columns)), dtype=np.float64)
+    for idx in range(len(columns)):
+        # None (NULL) becomes NaN on float conversion.
+        values[:, idx] = np.array(transposed[idx + 1], dtype=np.float64)
+    return PriceArrays(dates=dates, values=values, columns=columns)
+
+
+def load_price_arrays(
+    ticker: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    columns: Sequence[str] = PRICE_COLUMNS,
+    db=None,
+) -> PriceArrays:
+    """Select only the requested columns as plain rows, without hydrating ``Price`` objects."""
+    columns = _validate_columns(columns)
+    close_db = False
+    if db is None:
+        db = SessionLocal()
+        close_db = True
+
+    try:
+        query = (
+            select(Price.date, *[getattr(Price, col) for col in columns])
+            .join(Symbol, Symbol.id == Price.symbol_id)
+            .where(Symbol.ticker == ticker)
+            .order_by(Price.date.asc())
+        )
+        if start:
+            query = query.where(Price.date >= start)
+        if end:
+            query = query.where(Price.date <= end)
+
+        rows = db.execute(query).all()
+        if not rows:
+            symbol_id = db.execute(
+                select(Symbol.id).where(Symbol.ticker == ticker)
+            ).scalar_one_or_none()
+            if symbol_id is None:
+                raise ValueError(f"Ticker '{ticker}' nao encontrado no banco.")
+            raise ValueError(f"Nenhum dado encontrado para {ticker} no periodo.")
+
+        return _arrays_from_rows(rows, columns)
+    finally:
+        if close_db:
+            db.close()
+
+
+def load_price_arrays_batch(
+    tickers: Iterable[str],
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    columns: Sequence[str] = PRICE_COLUMNS,
+    chunk_size: int = BATCH_CHUNK_SIZE,
+    db=None,
+) -> Dict[str, PriceArrays]:
+    """Load many tickers with one symbol lookup plus one price query per ``chunk_size`` symbols.
+
+    Tickers that are unknown or have no bars in the range are absent from the result.
+    """
+    columns = _validate_columns(columns)
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+
+    close_db = False
+    if db is None:
+        db = SessionLocal()
+        close_db = True
+
+    try:
+        symbol_rows = db.execute(
+            select(Symbol.id, Symbol.ticker).where(Symbol.ticker.in_(tickers))
+        ).all()
+        ticker_by_id = {symbol_id: ticker for symbol_id, ticker in symbol_rows}
+        symbol_ids: List[int] = sorted(ticker_by_id)
+
+        result: Dict[str, PriceArrays] = {}
+        for offset in range(0, len(symbol_ids), chunk_size):
+            chunk = symbol_ids[offset : offset + chunk_size]
+            query = (
+                select(Price.symbol_id, Price.date, *[getattr(Price, col) for col in columns])
+                .where(Price.symbol_id.in_(chunk))
+                .order_by(Price.symbol_id.asc(), Price.date.asc())
+            )
+            if start:
+                query = query.where(Price.date >= start)
+            if end:
+                query = query.where(Price.date <= end)
+
+            rows = db.execute(query).all()
+            if not rows:
+                continue
+
+            transposed = list(zip(*rows))
+            ids = np.array(transposed[0], dtype=np.int64)
+            arrays = _arrays_from_transposed(transposed[1:], columns)
+            bounds = np.flatnonzero(np.diff(ids)) + 1
+            for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(rows)]):
+                result[ticker_by_id[int(ids[lo])]] = PriceArrays(
+                    dates=arrays.dates[lo:hi],
+                    values=arrays.values[lo:hi],
+                    columns=columns,
+                )
+        return result
+    finally:
+        if close_db:
+            db.close()
+
+
+def _end_bound(end) -> pd.Timestamp:
+    bound = pd.Timestamp(end)
+    # A bare date means "through the end of that day".
+    if bound == bound.normalize() and len(str(end)) <= 10:
+        return bound + pd.Timedelta(days=1)
+    return bound + pd.Timedelta(microseconds=1)
+
+
+def load_bar_arrays(
+    ticker: str,
+    interval: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    columns: Sequence[str] = PRICE_COLUMNS,
+    db=None,
+) -> PriceArrays:
+    """Intraday counterpart of ``load_price_arrays`` reading from the ``bars`` table."""
+    columns = _validate_columns(columns)
+    close_db = False
+    if db is None:
+        db = SessionLocal()
+        close_db = True
+
+    try:
+        query = (
+            select(Bar.ts, *[getattr(Bar, col) for col in columns])
+            .join(Symbol, Symbol.id == Bar.symbol_id)
+            .where(Symbol.ticker == ticker, Bar.interval == interval)
+            .order_by(Bar.ts.asc())
+        )
+        if start:
+            query = query.where(Bar.ts >= pd.Timestamp(start).to_pydatetime())
+        if end:
+            query = query.where(Bar.ts < _end_bound(end).to_pydatetime())
+
+        rows = db.execute(query).all()
+        if not rows:
+            raise ValueError(f"Nenhum dado encontrado para {ticker} ({interval}) no periodo.")
+
+        return _arrays_from_rows(rows, columns, date_dtype="datetime64[us]")
+    finally:
+        if close_db:
+            db.close()
+
+
+def iter_price_rows(
+    ticker: str,
+    interval: Optional[str] = "1d",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    fetch_rows: int = 10_000,
+    db=None,
+) -> Iterator[tuple]:
+    """Yield ``(date or ts, open, high, low, close, volume)`` rows in order, ``fetch_rows`` at a time.
+
+    The query runs with ``yield_per``, which uses a server-side cursor on
+    PostgreSQL, so memory does not grow with the length of the range. Daily
+    intervals read ``prices`` and intraday ones read ``bars``, with the same
+    range rules as ``load_price_arrays``/``load_bar_arrays``.
+    """
+    close_db = False
+    if db is None:
+        db = SessionLocal()
+        close_db = True
+
+    try:
+        if is_intraday(interval):
+            query = (
+                select(Bar.ts, *[getattr(Bar, col) for col in PRICE_COLUMNS])
+                .join(Symbol, Symbol.id == Bar.symbol_id)
+                .where(Symbol.ticker == ticker, Bar.interval == interval)
+                .order_by(Bar.ts.asc())
+            )
+            if start:
+                query = query.where(Bar.ts >= pd.Timestamp(start).to_pydatetime())
+            if end:
+                query = query.where(Bar.ts < _end_bound(end).to_pydatetime())
+        else:
+            query = (
+                select(Price.date, *[getattr(Price, col) for col in PRICE_COLUMNS])
+                .join(Symbol, Symbol.id == Price.symbol_id)
+                .where(Symbol.ticker == ticker)
+                .order_by(Price.date.asc())
+            )
+            if start:
+                query = query.where(Price.date >= start)
+            if end:
+                query = query.where(Price.date <= end)
+
+        empty = True
+        for row in db.execute(query.execution_options(yield_per=fetch_rows)):
+            empty = False
+            yield tuple(row)
+        if empty:
+            raise ValueError(f"Nenhum dado encontrado para {ticker} no periodo.")
+    finally:
+        if close_db:
+            db.close()
+
+
+def load_price_frame(
+    ticker: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    columns: Sequence[str] = PRICE_COLUMNS,
+    db=None,
+) -> pd.DataFrame:
+    return load_price_arrays(ticker, start, end, columns=columns, db=db).to_frame()
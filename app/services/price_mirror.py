@@ -0,0 +1,162 @@
+"""On-disk Arrow IPC mirror of the ``prices`` table, one file per symbol.
+
+Files are read through ``pyarrow.memory_map`` so concurrent workers share the
+OS page cache instead of each pulling the same history from Postgres. The bars
+are stored as one fixed-size-list column that maps straight onto the
+``PriceArrays`` block, so reading a file copies nothing.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:
+    pa = None
+    pa_ipc = None
+
+import numpy as np
+import structlog
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db.models.symbol import Symbol
+from app.services.price_loader import PRICE_COLUMNS, PriceArrays, load_price_arrays
+
+logger = structlog.get_logger(__name__)
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+
+# ``day``: days since 1970-01-01 (``datetime64[D]``); ``ohlcv``: the bars x PRICE_COLUMNS block, row-major.
+_MIRROR_SCHEMA = (
+    pa.schema([("day", pa.int64()), ("ohlcv", pa.list_(pa.float64(), len(PRICE_COLUMNS)))]) if pa is not None else None
+)
+
+
+def mirror_enabled() -> bool:
+    return pa is not None and bool(settings.PRICE_MIRROR_DIR)
+
+
+def mirror_path(ticker: str) -> Path:
+    return Path(settings.PRICE_MIRROR_DIR) / f"{_UNSAFE_CHARS.sub('_', ticker)}.arrow"
+
+
+def read_price_mirror(ticker: str) -> Optional[PriceArrays]:
+    if not mirror_enabled():
+        return None
+    path = mirror_path(ticker)
+    if not path.exists():
+        return None
+
+    with pa.memory_map(str(path), "r") as source:
+        table = pa_ipc.open_file(source).read_all()
+    if table.num_rows == 0:
+        return None
+    if table.schema.names != list(_MIRROR_SCHEMA.names):
+        # Files from the older one-column-per-field layout are rebuilt by the caller.
+        return None
+
+    # Both columns are written as a single chunk without validity bitmaps, so the
+    # returned arrays are read-only views over the mapped file (the page cache).
+    days = table.column("day").chunk(0).to_numpy(zero_copy_only=True)
+    block = table.column("ohlcv").chunk(0).flatten().to_numpy(zero_copy_only=True)
+    return PriceArrays(
+        dates=days.view("datetime64[D]"),
+        values=block.reshape(table.num_rows, len(PRICE_COLUMNS)),
+        columns=PRICE_COLUMNS,
+    )
+
+
+def write_price_mirror(ticker: str, arrays: PriceArrays) -> Path:
+    if pa is None:
+        raise RuntimeError("pyarrow nao instalado; espelho de precos indisponivel.")
+
+    arrays = arrays.select(PRICE_COLUMNS)
+    days = np.ascontiguousarray(arrays.dates.astype("datetime64[D]").view(np.int64))
+    block = np.ascontiguousarray(arrays.values, dtype=np.float64).reshape(-1)
+    table = pa.Table.from_arrays(
+        [
+            pa.array(days, type=pa.int64()),
+            pa.FixedSizeListArray.from_arrays(pa.array(block, type=pa.float64()), len(PRICE_COLUMNS)),
+        ],
+        schema=_MIRROR_SCHEMA,
+    )
+
+    path = mirror_path(ticker)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".arrow.tmp{os.getpid()}")
+    with pa.OSFile(str(tmp_path), "wb") as sink:
+        with pa_ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def refresh_price_mirror(ticker: str, since=None, db=None) -> int:
+    """Bring the mirror up to date, re-reading only bars dated on/after ``since``.
+
+    Without ``since`` only bars after the last mirrored date are fetched.
+    Returns the number of bars read from the database.
+    """
+    if not mirror_enabled():
+        return 0
+
+    existing = read_price_mirror(ticker)
+    if existing is None:
+        try:
+            arrays = load_price_arrays(ticker, db=db)
+        except ValueError:
+            return 0
+        write_price_mirror(ticker, arrays)
+        logger.info("price_mirror.rebuilt", ticker=ticker, rows=len(arrays))
+        return len(arrays)
+
+    cutoff = existing.dates[-1] + np.timedelta64(1, "D")
+    if since is not None:
+        cutoff = min(cutoff, np.datetime64(since, "D"))
+
+    try:
+        fresh = load_price_arrays(ticker, start=str(cutoff), db=db)
+    except ValueError:
+        return 0
+
+    keep = int(np.searchsorted(existing.dates, cutoff, side="left"))
+    merged = PriceArrays(
+        dates=np.concatenate([existing.dates[:keep], fresh.dates]),
+        values=np.concatenate([existing.values[:keep], fresh.values]),
+        columns=PRICE_COLUMNS,
+    )
+    write_price_mirror(ticker, merged)
+    logger.info("price_mirror.refreshed", ticker=ticker, rows=len(fresh), since=str(cutoff))
+    return len(fresh)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Atualiza o espelho Arrow IPC da tabela de precos.")
+    parser.add_argument("--ticker", required=False, default=None, help="Ticker (ex.: PETR4.SA); omita para todos")
+    parser.add_argument("--rebuild", action="store_true", help="Reescreve os arquivos a partir do banco")
+    args = parser.parse_args()
+
+    if not mirror_enabled():
+        raise SystemExit("Defina PRICE_MIRROR_DIR e instale pyarrow para usar o espelho.")
+
+    db = SessionLocal()
+    try:
+        tickers = [args.ticker] if args.ticker else list(db.execute(select(Symbol.ticker)).scalars().all())
+        for ticker in tickers:
+            if args.rebuild and mirror_path(ticker).exists():
+                mirror_path(ticker).unlink()
+            rows = refresh_price_mirror(ticker, db=db)
+            print(f"{ticker}: {rows} barras atualizadas")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
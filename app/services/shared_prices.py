@@ -0,0 +1,120 @@
+"""Price frames published in ``multiprocessing.shared_memory`` for worker processes.
+
+The parent copies each frame once into a segment laid out as the int64 index
+followed by the float64 bars x columns block (the ``PriceArrays`` layout).
+Workers receive only the small ``SharedPriceHandle`` and rebuild the frame as
+views over the segment, so OHLCV data is neither pickled per task nor
+duplicated per process.
+
+``SharedPriceStore`` owns the segments: leaving its ``with`` block closes and
+unlinks every segment, including when a worker or the parent raises. If the
+parent dies before that, the ``resource_tracker`` started with it unlinks
+them at shutdown.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+_ITEMSIZE = 8  # int64 index and float64 values
+
+
+@dataclass(frozen=True)
+class SharedPriceHandle:
+    """Picklable description of a published frame."""
+
+    name: str
+    length: int
+    columns: Tuple[str, ...]
+    date_dtype: str
+    tz: Optional[str] = None
+    index_name: Optional[str] = None
+
+
+def _views(buf, handle: SharedPriceHandle) -> Tuple[np.ndarray, np.ndarray]:
+    n = handle.length
+    dates = np.ndarray((n,), dtype=np.int64, buffer=buf)
+    values = np.ndarray((n, len(handle.columns)), dtype=np.float64, buffer=buf, offset=n * _ITEMSIZE)
+    return dates, values
+
+
+class SharedPriceStore:
+    """Creates and owns shared-memory segments; use as a context manager."""
+
+    def __init__(self):
+        self._segments: Dict[str, SharedMemory] = {}
+
+    def publish(self, df: pd.DataFrame) -> SharedPriceHandle:
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise ValueError("Indice de datas (DatetimeIndex) obrigatorio para memoria compartilhada.")
+
+        index = df.index
+        dates = index.tz_convert("UTC").tz_localize(None) if index.tz is not None else index
+        raw_dates = dates.values
+        size = max(len(df) * (1 + df.shape[1]) * _ITEMSIZE, 1)
+        segment = SharedMemory(create=True, size=size)
+        self._segments[segment.name] = segment
+
+        handle = SharedPriceHandle(
+            name=segment.name,
+            length=len(df),
+            columns=tuple(df.columns),
+            date_dtype=raw_dates.dtype.str,
+            tz=str(index.tz) if index.tz is not None else None,
+            index_name=index.name,
+        )
+        shared_dates, shared_values = _views(segment.buf, handle)
+        shared_dates[:] = raw_dates.view(np.int64)
+        shared_values[:] = df.to_numpy(dtype=np.float64)
+        del shared_dates, shared_values
+        return handle
+
+    def close(self) -> None:
+        for segment in self._segments.values():
+            segment.close()
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+        self._segments.clear()
+
+    def __enter__(self) -> "SharedPriceStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _attach_segment(name: str) -> SharedMemory:
+    # Only the creating process may track the segment, otherwise each worker's
+    # resource_tracker unlinks it (or warns about a leak) when the worker exits.
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 has no ``track``; skip the registration instead.
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args: None
+        try:
+            return SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def attach_frame(handle: SharedPriceHandle) -> Tuple[SharedMemory, pd.DataFrame]:
+    """Read-only frame backed by the shared segment.
+
+    The returned ``SharedMemory`` must be kept alive as long as the frame is used.
+    """
+    segment = _attach_segment(handle.name)
+    dates, values = _views(segment.buf, handle)
+    values.flags.writeable = False
+
+    index = pd.DatetimeIndex(dates.view(handle.date_dtype), name=handle.index_name)
+    if handle.tz is not None:
+        index = index.tz_localize("UTC").tz_convert(handle.tz)
+    df = pd.DataFrame(values, index=index, columns=list(handle.columns), copy=False)
+    return segment, df
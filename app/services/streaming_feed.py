@@ -0,0 +1,44 @@
+"""Backtrader feed that reads bars from a row iterator instead of a DataFrame.
+
+Used by low-memory runs: rows come from ``iter_price_rows`` (a server-side
+cursor) and are pulled one at a time as Cerebro advances, so together with
+``exactbars`` neither the feed nor the lines grow with the history length.
+Datetimes are converted exactly like ``bt.feeds.PandasData`` does for a naive
+index, so both feeds produce the same bars.
+"""
+from __future__ import annotations
+
+import math
+from datetime import datetime
+
+import backtrader as bt
+
+
+def _value(raw) -> float:
+    # NULL columns become NaN, as in the PandasData path.
+    return float(raw) if raw is not None else math.nan
+
+
+class StreamingPriceFeed(bt.feed.DataBase):
+    """``dataname`` is an iterable of ``(date or ts, open, high, low, close, volume)`` rows in order."""
+
+    def start(self):
+        super().start()
+        self._rows = iter(self.p.dataname)
+
+    def _load(self) -> bool:
+        row = next(self._rows, None)
+        if row is None:
+            return False
+
+        ts, open_, high, low, close, volume = row
+        if not isinstance(ts, datetime):
+            ts = datetime(ts.year, ts.month, ts.day)
+        lines = self.lines
+        lines.datetime[0] = bt.date2num(ts)
+        lines.open[0] = _value(open_)
+        lines.high[0] = _value(high)
+        lines.low[0] = _value(low)
+        lines.close[0] = _value(close)
+        lines.volume[0] = _value(volume)
+        return True
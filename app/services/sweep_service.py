@@ -0,0 +1,327 @@
+"""Parameter sweeps: one strategy, one ticker, many ``strategy_params`` combinations.
+
+Prices are loaded once in the parent and published in shared memory (see
+``app.services.shared_prices``); workers attach to the segment in the pool
+initializer and only send back a compact metrics row per combination. Trades
+and positions are persisted only for the top-N combinations, which are re-run
+in the parent after ranking.
+"""
+from __future__ import annotations
+
+import itertools
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+import structlog
+
+from app.core.config import settings
+from app.db.models.backtest_sweep import BacktestSweep
+from app.db.models.backtest_sweep_result import BacktestSweepResult
+from app.services import backtest_service
+from app.services.backtest_service import (
+    _check_engine,
+    _resolve_strategy,
+    load_price_data_from_db,
+    run_backtest_on_frame,
+    save_backtest_result,
+)
+from app.services.shared_prices import SharedPriceHandle, SharedPriceStore, attach_frame
+
+logger = structlog.get_logger(__name__)
+
+RANK_METRICS = ("sharpe", "return_pct", "max_drawdown", "final_value")
+
+# Set in each worker by ``_init_worker``: the shared segment, the frame viewing it and the fixed run kwargs.
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _range_values(name: str, spec: Dict[str, Any]) -> List[Any]:
+    try:
+        start, stop = spec["start"], spec["stop"]
+    except KeyError as exc:
+        raise ValueError(f"Intervalo de '{name}' precisa de start e stop.") from exc
+    step = spec.get("step", 1)
+    if step <= 0:
+        raise ValueError(f"Passo invalido para '{name}': {step}")
+
+    count = int(math.floor((stop - start) / step + 1e-9)) + 1
+    if all(isinstance(value, int) for value in (start, stop, step)):
+        return [start + idx * step for idx in range(max(count, 0))]
+    # Rounded so that 0.1 steps give 0.3 instead of 0.30000000000000004.
+    return [round(start + idx * step, 10) for idx in range(max(count, 0))]
+
+
+def expand_param_grid(param_grid: Dict[str, Any], max_combinations: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Cartesian product of ``param_grid``.
+
+    Each value is either a list of candidates or ``{"start", "stop", "step"}``
+    (``stop`` inclusive).
+    """
+    if not param_grid:
+        raise ValueError("param_grid vazio.")
+
+    names: List[str] = []
+    axes: List[List[Any]] = []
+    for name, spec in param_grid.items():
+        if isinstance(spec, dict):
+            values = _range_values(name, spec)
+        elif isinstance(spec, (list, tuple)):
+            values = list(dict.fromkeys(spec))
+        else:
+            values = [spec]
+        if not values:
+            raise ValueError(f"Nenhum valor para '{name}'.")
+        names.append(name)
+        axes.append(values)
+
+    limit = settings.SWEEP_MAX_COMBINATIONS if max_combinations is None else max_combinations
+    total = math.prod(len(values) for values in axes)
+    if total > limit:
+        raise ValueError(f"Grade com {total} combinacoes excede o limite de {limit}.")
+
+    return [dict(zip(names, combo)) for combo in itertools.product(*axes)]
+
+
+def _worker_count(requested: Optional[int], combinations: int) -> int:
+    workers = requested if requested is not None else settings.SWEEP_MAX_WORKERS
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, combinations))
+
+
+def _pool_context():
+    """Start method for worker pools: forking the threaded API process could copy a held lock."""
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def _init_worker(handle: SharedPriceHandle, run_kwargs: Dict[str, Any]) -> None:
+    _WORKER_STATE["segment"], _WORKER_STATE["df"] = attach_frame(handle)
+    _WORKER_STATE["run_kwargs"] = run_kwargs
+
+
+def _run_one(df: pd.DataFrame, run_kwargs: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    fixed = run_kwargs.get("strategy_params") or {}
+    # Only the trade count is kept per combination; the top-N are re-run at full capture.
+    kwargs = {**run_kwargs, "strategy_params": {**fixed, **params}, "capture": "trades"}
+    try:
+        result = run_backtest_on_frame(df, **kwargs)
+    except Exception as exc:
+        return {"strategy_params": params, "error": str(exc)}
+    metrics = result["metrics"]
+    return {
+        "strategy_params": params,
+        "final_value": result["final_value"],
+        "return_pct": metrics.get("return_pct"),
+        "sharpe": metrics.get("sharpe"),
+        "max_drawdown": metrics.get("max_drawdown"),
+        "trades": len(result["trades"]),
+    }
+
+
+def _run_chunk(combos: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    df, run_kwargs = _WORKER_STATE["df"], _WORKER_STATE["run_kwargs"]
+    return [_run_one(df, run_kwargs, params) for params in combos]
+
+
+def _iter_rows(
+    df: pd.DataFrame, run_kwargs: Dict[str, Any], combos: List[Dict[str, Any]], workers: int
+) -> Iterator[Dict[str, Any]]:
+    if workers <= 1:
+        for params in combos:
+            yield _run_one(df, run_kwargs, params)
+        return
+
+    # A few chunks per worker keeps the pool busy without paying IPC per combination.
+    chunk_size = max(1, math.ceil(len(combos) / (workers * 4)))
+    chunks = [combos[idx : idx + chunk_size] for idx in range(0, len(combos), chunk_size)]
+    # The store unlinks the segment after the pool shut down, also when a worker raises
+    # or the consumer stops iterating early.
+    with SharedPriceStore() as store:
+        handle = store.publish(df)
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=_pool_context(), initializer=_init_worker, initargs=(handle, run_kwargs)
+        ) as pool:
+            futures = [pool.submit(_run_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                yield from future.result()
+
+
+def _rank_key(rank_by: str):
+    def key(row: Dict[str, Any]):
+        value = row.get(rank_by)
+        return (value is None, -(value or 0.0))
+
+    return key
+
+
+def stream_sweep(
+    *,
+    ticker: str,
+    strategy_type: str,
+    param_grid: Dict[str, Any],
+    strategy_params: Optional[Dict[str, Any]] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    initial_cash: float = 100000.0,
+    commission: Optional[float] = None,
+    timeframe: Optional[str] = "1d",
+    engine: str = "backtrader",
+    top_n: int = 5,
+    rank_by: str = "sharpe",
+    max_workers: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Validate the sweep and load prices, then return an iterator of events.
+
+    Validation errors are raised here, before the first event. The iterator
+    yields ``{"event": "result", ...}`` per combination as they finish and a
+    final ``{"event": "summary", ...}`` once everything is persisted, or a
+    final ``{"event": "error", "detail": ...}`` if the run fails midway.
+    """
+    if rank_by not in RANK_METRICS:
+        raise ValueError(f"rank_by '{rank_by}' invalido. Opcoes: {', '.join(RANK_METRICS)}.")
+    _check_engine(engine)
+    combos = expand_param_grid(param_grid)
+    for params in combos:
+        _resolve_strategy(strategy_type, {**(strategy_params or {}), **params})
+
+    df = load_price_data_from_db(ticker, start, end, interval=timeframe)
+    run_kwargs = {
+        "ticker": ticker,
+        "strategy_type": strategy_type,
+        "strategy_params": strategy_params,
+        "start": start,
+        "end": end,
+        "initial_cash": initial_cash,
+        "commission": commission,
+        "timeframe": timeframe,
+        "engine": engine,
+    }
+    workers = _worker_count(max_workers, len(combos))
+
+    def events() -> Iterator[Dict[str, Any]]:
+        logger.info(
+            "backtest.sweep.start", ticker=ticker, strategy_type=strategy_type, combinations=len(combos), workers=workers
+        )
+        rows: List[Dict[str, Any]] = []
+        try:
+            for row in _iter_rows(df, run_kwargs, combos, workers):
+                rows.append(row)
+                yield {"event": "result", **row}
+
+            summary = _persist_sweep(df, run_kwargs, param_grid, rows, top_n=top_n, rank_by=rank_by)
+        except Exception as exc:
+            # The response status is already sent: report the failure as the last line.
+            logger.exception("backtest.sweep.stream_failed", ticker=ticker, strategy_type=strategy_type, results=len(rows))
+            yield {"event": "error", "detail": str(exc)}
+            return
+        logger.info("backtest.sweep.completed", sweep_id=summary["id"], ticker=ticker, strategy_type=strategy_type)
+        yield {"event": "summary", **summary}
+
+    return events()
+
+
+def run_sweep(**kwargs) -> Dict[str, Any]:
+    """Run a sweep to completion and return its summary (see ``stream_sweep``)."""
+    summary: Dict[str, Any] = {}
+    for event in stream_sweep(**kwargs):
+        if event["event"] == "error":
+            raise RuntimeError(event["detail"])
+        if event["event"] == "summary":
+            summary = event
+    summary.pop("event", None)
+    return summary
+
+
+def _persist_sweep(
+    df: pd.DataFrame,
+    run_kwargs: Dict[str, Any],
+    param_grid: Dict[str, Any],
+    rows: List[Dict[str, Any]],
+    *,
+    top_n: int,
+    rank_by: str,
+) -> Dict[str, Any]:
+    ranked = sorted((row for row in rows if "error" not in row), key=_rank_key(rank_by))
+    failed = [row for row in rows if "error" in row]
+
+    db = backtest_service.SessionLocal()
+    try:
+        sweep = BacktestSweep(
+            ticker=run_kwargs["ticker"],
+            strategy_type=run_kwargs["strategy_type"],
+            strategy_params=run_kwargs["strategy_params"],
+            param_grid=param_grid,
+            start=run_kwargs["start"],
+            end=run_kwargs["end"],
+            timeframe=run_kwargs["timeframe"],
+            engine=run_kwargs["engine"],
+            initial_cash=run_kwargs["initial_cash"],
+            rank_by=rank_by,
+            top_n=top_n,
+            combinations=len(rows),
+            status="completed",
+        )
+        db.add(sweep)
+        db.flush()
+
+        results = []
+        for rank, row in enumerate(ranked, start=1):
+            backtest_id = None
+            if rank <= top_n:
+                fixed = run_kwargs["strategy_params"] or {}
+                full = run_backtest_on_frame(df, **{**run_kwargs, "strategy_params": {**fixed, **row["strategy_params"]}})
+                backtest_id = save_backtest_result(db, full).id
+            results.append(
+                BacktestSweepResult(
+                    sweep_id=sweep.id,
+                    rank=rank,
+                    strategy_params=row["strategy_params"],
+                    final_value=row["final_value"],
+                    return_pct=row["return_pct"],
+                    sharpe=row["sharpe"],
+                    max_drawdown=row["max_drawdown"],
+                    trades=row["trades"],
+                    backtest_id=backtest_id,
+                )
+            )
+        results.extend(
+            BacktestSweepResult(sweep_id=sweep.id, strategy_params=row["strategy_params"], error=row["error"])
+            for row in failed
+        )
+        db.add_all(results)
+        db.commit()
+
+        top = [
+            {
+                "rank": result.rank,
+                "strategy_params": result.strategy_params,
+                "final_value": result.final_value,
+                "return_pct": result.return_pct,
+                "sharpe": result.sharpe,
+                "max_drawdown": result.max_drawdown,
+                "trades": result.trades,
+                "backtest_id": result.backtest_id,
+            }
+            for result in results[: min(top_n, len(ranked))]
+        ]
+        return {
+            "id": sweep.id,
+            "ticker": sweep.ticker,
+            "strategy_type": sweep.strategy_type,
+            "combinations": len(rows),
+            "failed": len(failed),
+            "rank_by": rank_by,
+            "top": top,
+            "status": "completed",
+        }
+    except Exception:
+        db.rollback()
+        logger.exception("backtest.sweep.error", ticker=run_kwargs["ticker"], strategy_type=run_kwargs["strategy_type"])
+        raise
+    finally:
+        db.close()
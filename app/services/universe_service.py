@@ -0,0 +1,206 @@
+"""Universe runs: one strategy configuration over many tickers (or every row in ``symbols``).
+
+Prices for all tickers are loaded up front with the batched loaders and
+published in shared memory; worker processes attach to a ticker's segment the
+first time they receive it. Results are persisted as they arrive, one
+transaction per ``batch_size`` backtests, and a failing ticker (or batch) is
+reported in ``errors`` instead of aborting the run.
+"""
+from __future__ import annotations
+
+import math
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import pandas as pd
+import structlog
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.models.symbol import Symbol
+from app.services import backtest_service
+from app.services.backtest_service import (
+    _check_capture,
+    _check_engine,
+    _resolve_strategy,
+    load_frames_for_tickers,
+    run_backtest_on_frame,
+    save_backtest_result,
+)
+from app.services.shared_prices import SharedPriceHandle, SharedPriceStore, attach_frame
+from app.services.sweep_service import RANK_METRICS, _pool_context, _rank_key, _worker_count
+
+logger = structlog.get_logger(__name__)
+
+# Set in each worker by ``_init_worker``: handles per ticker, attached frames and the fixed run kwargs.
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def resolve_universe(tickers: Union[str, Sequence[str]], db=None) -> List[str]:
+    """``"all"`` expands to every ticker in ``symbols``; lists are deduplicated in order."""
+    if isinstance(tickers, str):
+        if tickers.lower() != "all":
+            raise ValueError("tickers deve ser uma lista ou 'all'.")
+        close_db = False
+        if db is None:
+            db = backtest_service.SessionLocal()
+            close_db = True
+        try:
+            resolved = list(db.execute(select(Symbol.ticker).order_by(Symbol.ticker)).scalars())
+        finally:
+            if close_db:
+                db.close()
+    else:
+        resolved = list(dict.fromkeys(tickers))
+
+    if not resolved:
+        raise ValueError("Nenhum ticker para executar.")
+    return resolved
+
+
+def _init_worker(handles: Dict[str, SharedPriceHandle], run_kwargs: Dict[str, Any]) -> None:
+    _WORKER_STATE["handles"] = handles
+    _WORKER_STATE["frames"] = {}
+    _WORKER_STATE["run_kwargs"] = run_kwargs
+
+
+def _worker_frame(ticker: str) -> pd.DataFrame:
+    frames = _WORKER_STATE["frames"]
+    if ticker not in frames:
+        frames[ticker] = attach_frame(_WORKER_STATE["handles"][ticker])
+    return frames[ticker][1]
+
+
+def _run_ticker(df: pd.DataFrame, ticker: str, run_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        result = run_backtest_on_frame(df, ticker=ticker, **run_kwargs)
+    except Exception as exc:
+        return {"ticker": ticker, "error": str(exc)}
+    # The equity curve is not persisted; keep it out of the IPC payload.
+    result.pop("equity_curve", None)
+    return result
+
+
+def _run_chunk(tickers: Sequence[str]) -> List[Dict[str, Any]]:
+    run_kwargs = _WORKER_STATE["run_kwargs"]
+    return [_run_ticker(_worker_frame(ticker), ticker, run_kwargs) for ticker in tickers]
+
+
+def _iter_results(
+    frames: Dict[str, pd.DataFrame], run_kwargs: Dict[str, Any], workers: int
+) -> Iterator[Dict[str, Any]]:
+    tickers = list(frames)
+    if workers <= 1:
+        for ticker in tickers:
+            yield _run_ticker(frames[ticker], ticker, run_kwargs)
+        return
+
+    chunk_size = max(1, math.ceil(len(tickers) / (workers * 4)))
+    chunks = [tickers[idx : idx + chunk_size] for idx in range(0, len(tickers), chunk_size)]
+    with SharedPriceStore() as store:
+        handles = {ticker: store.publish(df) for ticker, df in frames.items()}
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=_pool_context(), initializer=_init_worker, initargs=(handles, run_kwargs)
+        ) as pool:
+            futures = [pool.submit(_run_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                yield from future.result()
+
+
+def _save_batch(batch: List[Dict[str, Any]], rows: List[Dict[str, Any]], errors: List[Dict[str, Any]]) -> None:
+    db = backtest_service.SessionLocal()
+    try:
+        saved = [(result, save_backtest_result(db, result).id) for result in batch]
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        logger.exception("backtest.universe.batch_failed", tickers=[result["ticker"] for result in batch])
+        errors.extend({"ticker": result["ticker"], "error": str(exc)} for result in batch)
+        return
+    finally:
+        db.close()
+
+    for result, backtest_id in saved:
+        rows.append(
+            {
+                "ticker": result["ticker"],
+                "backtest_id": backtest_id,
+                "final_value": result["final_value"],
+                "trades": len(result["trades"]),
+                **result["metrics"],
+            }
+        )
+
+
+def run_universe(
+    *,
+    strategy_type: str,
+    tickers: Union[str, Sequence[str]] = "all",
+    strategy_params: Optional[Dict[str, Any]] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    initial_cash: float = 100000.0,
+    commission: Optional[float] = None,
+    timeframe: Optional[str] = "1d",
+    engine: str = "backtrader",
+    rank_by: str = "sharpe",
+    max_workers: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    capture: str = "full",
+) -> Dict[str, Any]:
+    """Run and persist one backtest per ticker; returns the ranked summary table."""
+    if rank_by not in RANK_METRICS:
+        raise ValueError(f"rank_by '{rank_by}' invalido. Opcoes: {', '.join(RANK_METRICS)}.")
+    _check_engine(engine)
+    _check_capture(capture)
+    _resolve_strategy(strategy_type, strategy_params)
+    universe = resolve_universe(tickers)
+    batch_size = batch_size or settings.UNIVERSE_BATCH_SIZE
+
+    frames = load_frames_for_tickers(universe, start, end, timeframe)
+    errors: List[Dict[str, Any]] = [
+        {"ticker": ticker, "error": f"Nenhum dado encontrado para {ticker} no periodo."}
+        for ticker in universe
+        if ticker not in frames
+    ]
+    run_kwargs = {
+        "strategy_type": strategy_type,
+        "strategy_params": strategy_params,
+        "start": start,
+        "end": end,
+        "initial_cash": initial_cash,
+        "commission": commission,
+        "timeframe": timeframe,
+        "engine": engine,
+        "capture": capture,
+    }
+    workers = _worker_count(max_workers, len(frames)) if frames else 1
+    logger.info("backtest.universe.start", strategy_type=strategy_type, tickers=len(universe), workers=workers)
+
+    rows: List[Dict[str, Any]] = []
+    batch: List[Dict[str, Any]] = []
+    for result in _iter_results(frames, run_kwargs, workers):
+        if "error" in result:
+            errors.append(result)
+            continue
+        batch.append(result)
+        if len(batch) >= batch_size:
+            _save_batch(batch, rows, errors)
+            batch = []
+    if batch:
+        _save_batch(batch, rows, errors)
+
+    rows.sort(key=_rank_key(rank_by))
+    for rank, row in enumerate(rows, start=1):
+        row["rank"] = rank
+
+    logger.info("backtest.universe.completed", strategy_type=strategy_type, completed=len(rows), failed=len(errors))
+    return {
+        "strategy_type": strategy_type,
+        "rank_by": rank_by,
+        "tickers": len(universe),
+        "completed": len(rows),
+        "failed": len(errors),
+        "results": rows,
+        "errors": errors,
+    }
@@ -0,0 +1,318 @@
+"""NumPy backtest engine for the strategies in ``STRATEGY_REGISTRY``.
+
+Indicators and entry/exit signals are computed as whole arrays; only the
+position/order state is stepped bar by bar, replaying what Backtrader's
+``BackBroker`` does for ``RiskManagedStrategy``:
+
+- orders placed on bar ``i`` are margin-checked at the start of bar ``i + 1``
+  against the cash left by pseudo-executing them at their creation price;
+- market orders fill at the next open, sell stops at ``min(open, stop)`` once
+  ``low <= stop``, and an opening fill that would leave negative cash is
+  rejected;
+- the protective stop is not cancelled by ``close()``, so a stale stop can
+  still fire later (and open a short), exactly as in the Backtrader run;
+- cash follows the ``shortcash`` stock rules and ``getvalue()`` is
+  ``cash + size * close``.
+
+Trades, positions, the equity curve and the ``app.metrics`` pack come out
+in the same shape as ``_run_backtrader``.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.indicators import IndicatorSpec, atr, roc_percent, rolling_max, rolling_min, sma
+from app.metrics import performance_metrics
+from app.strategies import DonchianBreakoutRisk, LogisticMomentumRisk, MomentumRisk, SMACrossRisk
+from app.strategies.capture import downsample_rows
+
+_MARKET = 0
+_STOP = 1
+
+
+@dataclass
+class Signals:
+    """Per-bar decisions of a strategy, evaluated only where ``next()`` would run."""
+
+    min_history: int
+    enter: np.ndarray
+    exit: np.ndarray
+    initial_enter: Optional[np.ndarray] = None
+
+
+def _column(df: pd.DataFrame, name: str) -> np.ndarray:
+    return df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _indicator(df: pd.DataFrame, spec: IndicatorSpec, compute: Callable[[], np.ndarray]) -> np.ndarray:
+    """Stored series attached by ``attach_stored_indicators`` when present, else ``compute()``."""
+    if spec.line_name in df.columns:
+        return _column(df, spec.line_name)
+    return compute()
+
+
+def _crossover(fast: np.ndarray, slow: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Up/down crosses as ``bt.ind.CrossOver`` signals them (+1 / -1)."""
+    diff = fast - slow
+    valid = np.flatnonzero(np.isfinite(diff))
+    nzd = pd.Series(np.where(diff != 0.0, diff, np.nan))
+    if valid.size:
+        # NonZeroDifference is seeded with the first difference even when it is zero.
+        nzd.iloc[valid[0]] = diff[valid[0]]
+        nzd.iloc[: valid[0]] = np.nan
+    previous = nzd.ffill().shift(1).to_numpy()
+    with np.errstate(invalid="ignore"):
+        up = (previous < 0.0) & (fast > slow)
+        down = (previous > 0.0) & (fast < slow)
+    return up, down
+
+
+def _shifted(values: np.ndarray) -> np.ndarray:
+    out = np.full(values.shape[0], np.nan)
+    out[1:] = values[:-1]
+    return out
+
+
+def _sma_cross_signals(df: pd.DataFrame, params: Dict[str, Any]) -> Signals:
+    specs = SMACrossRisk.indicator_specs(params)
+    close = _column(df, "close")
+    fast = _indicator(df, specs["sma_fast"], lambda: sma(close, specs["sma_fast"].period))
+    slow = _indicator(df, specs["sma_slow"], lambda: sma(close, specs["sma_slow"].period))
+    up, down = _crossover(fast, slow)
+    with np.errstate(invalid="ignore"):
+        above = fast > slow
+    return Signals(int(params["slow_period"]), enter=up, exit=down, initial_enter=above | up)
+
+
+def _donchian_signals(df: pd.DataFrame, params: Dict[str, Any]) -> Signals:
+    specs = DonchianBreakoutRisk.indicator_specs(params)
+    period = int(params["channel_period"])
+    close = _column(df, "close")
+    upper = _shifted(_indicator(df, specs["highest"], lambda: rolling_max(_column(df, "high"), period)))
+    lower = _shifted(_indicator(df, specs["lowest"], lambda: rolling_min(_column(df, "low"), period)))
+    warm = np.arange(close.shape[0]) >= period
+    with np.errstate(invalid="ignore"):
+        enter = warm & np.isfinite(upper) & (close > upper)
+        exit_ = warm & np.isfinite(lower) & (close < lower)
+    return Signals(period, enter=enter, exit=exit_)
+
+
+def _momentum_signals(df: pd.DataFrame, params: Dict[str, Any]) -> Signals:
+    specs = MomentumRisk.indicator_specs(params)
+    lookback = int(params["lookback"])
+    momentum = _indicator(df, specs["momentum"], lambda: roc_percent(_column(df, "close"), lookback))
+    with np.errstate(invalid="ignore"):
+        enter = momentum >= float(params["entry_threshold"])
+        exit_ = momentum <= float(params["exit_threshold"])
+    return Signals(lookback + 1, enter=enter, exit=exit_)
+
+
+def _ml_momentum_signals(df: pd.DataFrame, params: Dict[str, Any]) -> Signals:
+    spec = LogisticMomentumRisk.indicator_specs(params)["ml_prob"]
+    probs = _indicator(df, spec, lambda: spec.compute({"close": _column(df, "close")}))
+    with np.errstate(invalid="ignore"):
+        enter = probs >= float(params["entry_threshold"])
+        exit_ = probs <= float(params["exit_threshold"])
+    return Signals(spec.first_valid + 1, enter=enter, exit=exit_)
+
+
+SIGNAL_BUILDERS: Dict[type, Callable[[pd.DataFrame, Dict[str, Any]], Signals]] = {
+    SMACrossRisk: _sma_cross_signals,
+    DonchianBreakoutRisk: _donchian_signals,
+    MomentumRisk: _momentum_signals,
+    LogisticMomentumRisk: _ml_momentum_signals,
+}
+
+
+def _update_position(size: float, price: float, delta: float, exec_price: float):
+    """``backtrader.Position.update`` without side effects: (size, price, opened, closed)."""
+    new_size = size + delta
+    if not new_size:
+        return new_size, 0.0, 0, delta
+    if not size:
+        return new_size, exec_price, delta, 0
+    if (size > 0) == (delta > 0):
+        return new_size, (price * size + delta * exec_price) / new_size, delta, 0
+    if (new_size > 0) == (size > 0):
+        return new_size, price, 0, delta
+    return new_size, exec_price, new_size, -size
+
+
+def _check_submitted(submitted: List[list], pending: List[list], cash: float, size: float, price: float, comm: float):
+    """Accept the orders whose pseudo-execution at creation price keeps cash >= 0."""
+    for order in submitted:
+        delta, created = order[1], order[2]
+        size, price, opened, closed = _update_position(size, price, delta, created)
+        if closed:
+            cash += -closed * created
+            cash -= abs(closed) * comm * created
+        if opened:
+            cash -= opened * created
+            cash -= abs(opened) * comm * created
+        if cash >= 0.0:
+            pending.append(order)
+
+
+def run_vectorized(
+    df: pd.DataFrame,
+    strategy_cls: type,
+    params: Dict[str, Any],
+    initial_cash: float,
+    capture: str = "full",
+):
+    """Vectorized counterpart of ``_run_backtrader``; returns the same 5-tuple.
+
+    ``capture`` has the meaning of ``app.strategies.capture.CAPTURE_LEVELS``;
+    the metrics always come from the full value series and every fill.
+    """
+    if strategy_cls not in SIGNAL_BUILDERS:
+        raise ValueError(f"Estrategia {strategy_cls.__name__} nao suportada pelo engine vetorizado.")
+
+    signals = SIGNAL_BUILDERS[strategy_cls](df, params)
+    atr_spec = IndicatorSpec("ATR", int(params["atr_period"]))
+    high, low, close = _column(df, "high"), _column(df, "low"), _column(df, "close")
+    atr_values = _indicator(df, atr_spec, lambda: atr(high, low, close, atr_spec.period))
+
+    dates = df.index.to_numpy(dtype="datetime64[ns]")
+    day_list = pd.DatetimeIndex(df.index).date.tolist()
+    opens, highs, lows, closes = (arr.tolist() for arr in (_column(df, "open"), high, low, close))
+    atr_list = atr_values.tolist()
+    enter, exit_ = signals.enter.tolist(), signals.exit.tolist()
+    initial_enter = signals.initial_enter.tolist() if signals.initial_enter is not None else None
+    first_bar = signals.min_history - 1
+    record_bars = capture in ("equity_downsampled", "full")
+
+    comm = float(params["commission"])
+    atr_mult = float(params["atr_mult"])
+    risk_per_trade = float(params["risk_per_trade"])
+
+    cash = float(initial_cash)
+    size, price = 0.0, 0.0
+    trade_size, trade_price, trade_pnl = 0.0, 0.0, 0.0
+    submitted: List[list] = []
+    pending: List[list] = []
+    initial_check_done = False
+
+    values = np.empty(len(closes))
+    trades: List[Dict[str, Any]] = []
+    positions: List[Dict[str, Any]] = []
+
+    for i, day in enumerate(day_list):
+        bar_open, bar_low, bar_close = opens[i], lows[i], closes[i]
+
+        # Broker: margin check of last bar's orders, then one pass over the pending queue.
+        if submitted:
+            _check_submitted(submitted, pending, cash, size, price, comm)
+            submitted = []
+
+        completed: List[Tuple[bool, float, float]] = []
+        closed_pnls: List[float] = []
+        still_pending: List[list] = []
+        for order in pending:
+            kind, delta, created = order
+            if kind == _MARKET:
+                fill = bar_open
+            elif bar_open <= created:
+                fill = bar_open
+            elif bar_low <= created:
+                fill = created
+            else:
+                still_pending.append(order)
+                continue
+
+            _, _, opened, closed = _update_position(size, price, delta, fill)
+            pnl = -closed * (fill - price)
+            new_cash = cash
+            if closed:
+                new_cash += -closed * price + pnl
+                new_cash -= abs(closed) * comm * fill
+                cash = new_cash
+            if opened:
+                new_cash -= opened * fill
+                new_cash -= abs(opened) * comm * fill
+                if new_cash < 0.0:
+                    opened = 0
+                else:
+                    cash = new_cash
+
+            executed = closed + opened
+            if not executed:
+                continue
+            size, price, _, _ = _update_position(size, price, executed, fill)
+            if executed == delta:
+                # Order.executed.price is a size-weighted average, rounded as such.
+                completed.append((delta > 0, executed * fill / executed, executed))
+
+            if closed:
+                trade_pnl += -closed * (fill - trade_price)
+                trade_size += closed
+                if not trade_size:
+                    closed_pnls.append(trade_pnl)
+            if opened:
+                if not trade_size:
+                    trade_size, trade_price, trade_pnl = 0.0, 0.0, 0.0
+                trade_price = (trade_size * trade_price + opened * fill) / (trade_size + opened)
+                trade_size += opened
+        pending = still_pending
+
+        for is_buy, fill, executed in completed:
+            trades.append(
+                {"date": day, "operation": "buy" if is_buy else "sell", "price": float(fill), "size": float(executed), "pnl": None}
+            )
+        for pnl in closed_pnls:
+            for trade in reversed(trades):
+                if trade["date"] == day and trade["operation"] == "sell" and trade["pnl"] is None:
+                    trade["pnl"] = float(pnl)
+                    break
+
+        # BackBroker._get_value() takes long positions apart into cost and unrealized PnL.
+        position_value = size * bar_close
+        if position_value > 0:
+            unrealized = size * (bar_close - price)
+            position_value = (position_value - unrealized) + unrealized
+        value = cash + position_value
+        values[i] = value
+
+        # Strategy: RiskManagedStrategy.next().
+        if i < first_bar:
+            continue
+        atr_value = atr_list[i]
+        if not math.isfinite(atr_value) or atr_value <= 0:
+            continue
+
+        if not size:
+            should_enter = enter[i]
+            if initial_enter is not None and not initial_check_done:
+                initial_check_done = True
+                should_enter = initial_enter[i]
+            if should_enter:
+                stop_price = bar_close - atr_mult * atr_value
+                risk_per_share = bar_close - stop_price
+                if risk_per_share <= 0:
+                    continue
+                order_size = int(cash * risk_per_trade / risk_per_share)
+                if order_size <= 0:
+                    continue
+                submitted.append([_MARKET, float(order_size), bar_close])
+                submitted.append([_STOP, -float(order_size), stop_price])
+        elif exit_[i]:
+            submitted.append([_MARKET, -size, bar_close])
+
+        if record_bars:
+            positions.append(
+                {"date": day, "position": float(size), "value": float(size * bar_close) if size else 0.0, "equity": float(value)}
+            )
+
+    final_value = float(values[-1]) if len(values) else float(initial_cash)
+    metrics = performance_metrics(initial_cash, final_value, dates, values, trades)
+    if capture == "metrics_only":
+        trades = []
+    if capture == "equity_downsampled":
+        positions = [positions[row] for row in downsample_rows(len(positions)).tolist()]
+    equity_curve = [{"date": pos["date"], "equity": pos["equity"]} for pos in positions]
+    return final_value, metrics, trades, positions, equity_curve
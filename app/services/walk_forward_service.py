@@ -0,0 +1,292 @@
+"""Walk-forward optimization: rolling in-sample grid search plus out-of-sample evaluation.
+
+The price frame is loaded once and split into folds of ``train_bars`` followed
+by ``test_bars`` (rolling, or anchored at the first bar). Each fold picks the
+best combination of ``param_grid`` on its training window and replays it on
+the test window, preceded by the strategy's ``min_history`` bars so that the
+indicators are warm when the test window starts. Folds run in a process pool
+over a shared-memory copy of the frame.
+
+Finished folds are written to a JSON checkpoint under
+``WALK_FORWARD_CHECKPOINT_DIR``, keyed by a hash of the request, of the engine
+version and of every loaded bar (``price_fingerprint``, as in the result
+cache), so resubmitting an interrupted job only runs the missing folds.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import structlog
+
+from app.core.config import settings
+from app.metrics import daily_sharpe, max_drawdown
+from app.services.backtest_service import (
+    ENGINE_VERSIONS,
+    STRATEGY_REGISTRY,
+    _check_engine,
+    _resolve_strategy,
+    load_price_data_from_db,
+    price_fingerprint,
+    run_backtest_on_frame,
+)
+from app.services.shared_prices import SharedPriceHandle, SharedPriceStore, attach_frame
+from app.services.sweep_service import RANK_METRICS, _pool_context, _rank_key, _worker_count, expand_param_grid
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_GRID_SCALES = (0.5, 1.0, 1.5)
+
+# Set in each worker by ``_init_worker``: the shared segment, the frame viewing it and the fixed run kwargs.
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def default_param_grid(strategy_type: str) -> Dict[str, List[int]]:
+    """Grid around the integer defaults of ``STRATEGY_REGISTRY`` (x0.5, x1, x1.5)."""
+    _resolve_strategy(strategy_type, None)
+    defaults = STRATEGY_REGISTRY[strategy_type].defaults
+    grid: Dict[str, List[int]] = {}
+    for name, value in defaults.items():
+        if isinstance(value, int) and not isinstance(value, bool) and value > 1:
+            grid[name] = sorted({max(2, int(round(value * scale))) for scale in DEFAULT_GRID_SCALES})
+    return grid
+
+
+def build_folds(n_bars: int, train_bars: int, test_bars: int, step_bars: Optional[int] = None, anchored: bool = False) -> List[Dict[str, int]]:
+    """Bar offsets of each fold: ``train_start <= train_end == test_start < test_end`` (ends exclusive)."""
+    if train_bars < 2 or test_bars < 1:
+        raise ValueError("train_bars deve ser >= 2 e test_bars >= 1.")
+    step = step_bars or test_bars
+    if step < 1:
+        raise ValueError(f"step_bars invalido: {step}")
+
+    folds = []
+    test_start = train_bars
+    while test_start + test_bars <= n_bars:
+        folds.append(
+            {
+                "fold": len(folds),
+                "train_start": 0 if anchored else test_start - train_bars,
+                "test_start": test_start,
+                "test_end": test_start + test_bars,
+            }
+        )
+        test_start += step
+    if not folds:
+        raise ValueError(f"Historico de {n_bars} barras insuficiente para train_bars={train_bars} e test_bars={test_bars}.")
+    return folds
+
+
+def _init_worker(handle: SharedPriceHandle, run_kwargs: Dict[str, Any]) -> None:
+    _WORKER_STATE["segment"], _WORKER_STATE["df"] = attach_frame(handle)
+    _WORKER_STATE["run_kwargs"] = run_kwargs
+
+
+def _evaluate_fold(df: pd.DataFrame, run_kwargs: Dict[str, Any], fold: Dict[str, int]) -> Dict[str, Any]:
+    base = {key: value for key, value in run_kwargs.items() if key not in ("combos", "rank_by")}
+    fixed = base.pop("strategy_params") or {}
+    train = df.iloc[fold["train_start"] : fold["test_start"]]
+
+    scored = []
+    for params in run_kwargs["combos"]:
+        try:
+            result = run_backtest_on_frame(train, strategy_params={**fixed, **params}, capture="metrics_only", **base)
+        except Exception:
+            continue
+        scored.append({"strategy_params": params, **result["metrics"]})
+    if not scored:
+        return {**fold, "error": "Nenhuma combinacao executou na janela de treino."}
+    best = sorted(scored, key=_rank_key(run_kwargs["rank_by"]))[0]
+
+    config = STRATEGY_REGISTRY[base["strategy_type"]]
+    _, resolved, _ = _resolve_strategy(base["strategy_type"], {**fixed, **best["strategy_params"]})
+    warmup_start = max(0, fold["test_start"] - config.min_history(resolved))
+    test = df.iloc[warmup_start : fold["test_end"]]
+    result = run_backtest_on_frame(test, strategy_params={**fixed, **best["strategy_params"]}, **base)
+
+    test_from = df.index[fold["test_start"]].normalize()
+    curve = [point for point in result["equity_curve"] if pd.Timestamp(point["date"]) >= test_from]
+    before = [point for point in result["equity_curve"] if pd.Timestamp(point["date"]) < test_from]
+    start_equity = before[-1]["equity"] if before else base["initial_cash"]
+    end_equity = curve[-1]["equity"] if curve else start_equity
+
+    return {
+        **fold,
+        "train_from": str(df.index[fold["train_start"]].date()),
+        "test_from": str(test_from.date()),
+        "test_to": str(df.index[fold["test_end"] - 1].date()),
+        "best_params": best["strategy_params"],
+        "train_metrics": {name: best.get(name) for name in RANK_METRICS if name != "final_value"},
+        "test_return_pct": end_equity / start_equity - 1.0,
+        "start_equity": start_equity,
+        "equity_curve": [{"date": str(point["date"]), "equity": point["equity"]} for point in curve],
+    }
+
+
+def _run_fold(fold: Dict[str, int]) -> Dict[str, Any]:
+    return _evaluate_fold(_WORKER_STATE["df"], _WORKER_STATE["run_kwargs"], fold)
+
+
+def _iter_folds(df: pd.DataFrame, run_kwargs: Dict[str, Any], folds: List[Dict[str, int]], workers: int) -> Iterator[Dict[str, Any]]:
+    if workers <= 1:
+        for fold in folds:
+            yield _evaluate_fold(df, run_kwargs, fold)
+        return
+
+    with SharedPriceStore() as store:
+        handle = store.publish(df)
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=_pool_context(), initializer=_init_worker, initargs=(handle, run_kwargs)
+        ) as pool:
+            futures = [pool.submit(_run_fold, fold) for fold in folds]
+            for future in as_completed(futures):
+                yield future.result()
+
+
+def checkpoint_path(job_id: str) -> Path:
+    return Path(settings.WALK_FORWARD_CHECKPOINT_DIR) / f"{job_id}.json"
+
+
+def _load_checkpoint(job_id: str) -> Dict[str, Any]:
+    path = checkpoint_path(job_id)
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        logger.warning("backtest.walk_forward.checkpoint_unreadable", job_id=job_id, path=str(path))
+        return {}
+
+
+def _write_checkpoint(job_id: str, payload: Dict[str, Any]) -> None:
+    path = checkpoint_path(job_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(payload, default=str))
+    os.replace(tmp, path)
+
+
+def _stitch(folds: List[Dict[str, Any]], initial_cash: float) -> List[Dict[str, Any]]:
+    """Chain the out-of-sample curves, rescaling each fold to start where the previous one ended."""
+    stitched: List[Dict[str, Any]] = []
+    equity = initial_cash
+    for fold in folds:
+        scale = equity / fold["start_equity"]
+        for point in fold["equity_curve"]:
+            stitched.append({"date": point["date"], "equity": point["equity"] * scale})
+        if fold["equity_curve"]:
+            equity = stitched[-1]["equity"]
+    return stitched
+
+
+def run_walk_forward(
+    *,
+    ticker: str,
+    strategy_type: str,
+    train_bars: int,
+    test_bars: int,
+    param_grid: Optional[Dict[str, Any]] = None,
+    strategy_params: Optional[Dict[str, Any]] = None,
+    step_bars: Optional[int] = None,
+    anchored: bool = False,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    initial_cash: float = 100000.0,
+    commission: Optional[float] = None,
+    timeframe: Optional[str] = "1d",
+    engine: str = "backtrader",
+    rank_by: str = "sharpe",
+    max_workers: Optional[int] = None,
+    resume: bool = True,
+) -> Dict[str, Any]:
+    """Run (or resume) a walk-forward job and return the folds plus the stitched out-of-sample curve."""
+    if rank_by not in RANK_METRICS:
+        raise ValueError(f"rank_by '{rank_by}' invalido. Opcoes: {', '.join(RANK_METRICS)}.")
+    _check_engine(engine)
+    grid = param_grid or default_param_grid(strategy_type)
+    combos = expand_param_grid(grid)
+    for params in combos:
+        _resolve_strategy(strategy_type, {**(strategy_params or {}), **params})
+
+    df = load_price_data_from_db(ticker, start, end, interval=timeframe)
+    folds = build_folds(len(df), train_bars, test_bars, step_bars, anchored)
+
+    request = {
+        "ticker": ticker,
+        "strategy_type": strategy_type,
+        "param_grid": grid,
+        "strategy_params": strategy_params,
+        "train_bars": train_bars,
+        "test_bars": test_bars,
+        "step_bars": step_bars,
+        "anchored": anchored,
+        "start": start,
+        "end": end,
+        "initial_cash": initial_cash,
+        "commission": commission,
+        "timeframe": timeframe,
+        "engine": ENGINE_VERSIONS[engine],
+        "rank_by": rank_by,
+        "prices": price_fingerprint(df),
+    }
+    job_id = hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+    checkpoint = _load_checkpoint(job_id) if resume else {}
+    done: Dict[int, Dict[str, Any]] = {int(key): value for key, value in checkpoint.get("folds", {}).items()}
+    pending = [fold for fold in folds if fold["fold"] not in done]
+    resumed = len(done)
+
+    run_kwargs = {
+        "ticker": ticker,
+        "strategy_type": strategy_type,
+        "strategy_params": strategy_params,
+        "start": start,
+        "end": end,
+        "initial_cash": initial_cash,
+        "commission": commission,
+        "timeframe": timeframe,
+        "engine": engine,
+        "combos": combos,
+        "rank_by": rank_by,
+    }
+    workers = _worker_count(max_workers, len(pending)) if pending else 1
+    logger.info("backtest.walk_forward.start", job_id=job_id, ticker=ticker, folds=len(folds), resumed=resumed, workers=workers)
+
+    for result in _iter_folds(df, run_kwargs, pending, workers):
+        done[result["fold"]] = result
+        _write_checkpoint(job_id, {"request": request, "folds": done})
+
+    ordered = [done[fold["fold"]] for fold in folds]
+    evaluated = [fold for fold in ordered if "error" not in fold]
+    stitched = _stitch(evaluated, initial_cash)
+
+    if stitched:
+        values = np.array([point["equity"] for point in stitched], dtype=np.float64)
+        dates = pd.to_datetime([point["date"] for point in stitched]).to_numpy(dtype="datetime64[ns]")
+        sharpe = daily_sharpe(dates, values, initial_cash)
+        metrics = {
+            "return_pct": float(values[-1] / initial_cash - 1.0),
+            "sharpe": float(sharpe) if sharpe is not None and math.isfinite(sharpe) else None,
+            "max_drawdown": max_drawdown(values),
+        }
+    else:
+        metrics = {"return_pct": 0.0, "sharpe": None, "max_drawdown": None}
+
+    logger.info("backtest.walk_forward.completed", job_id=job_id, ticker=ticker, folds=len(folds))
+    return {
+        "job_id": job_id,
+        "ticker": ticker,
+        "strategy_type": strategy_type,
+        "param_grid": grid,
+        "resumed_folds": resumed,
+        "folds": [{key: value for key, value in fold.items() if key != "equity_curve"} for fold in ordered],
+        "metrics": metrics,
+        "equity_curve": stitched,
+    }
@@ -1,6 +1,11 @@
 import math
+from typing import Any, Callable, Dict
+
 import backtrader as bt
 
+from app.indicators import IndicatorSpec
+from app.strategies.capture import DOWNSAMPLED_POINTS, BarCapture, ThinnedBarCapture, TradeCapture, ValueCapture
+
 
 class RiskManagedStrategy(bt.Strategy):
     """Base strategy that handles ATR-based stops and position sizing."""
@@ -10,17 +15,58 @@ class RiskManagedStrategy(bt.Strategy):
         atr_mult=2.0,
         risk_per_trade=0.01,
         commission=0.001,
+        capture="full",  # one of app.strategies.capture.CAPTURE_LEVELS
+        low_memory=False,  # streamed feed under exactbars: bounded captures
+        capture_values=True,  # per-bar broker value for app.metrics; off when the analyzers replace it
     )
 
+    @classmethod
+    def indicator_specs(cls, params: Dict[str, Any]) -> Dict[str, IndicatorSpec]:
+        """Indicators the strategy reads, keyed by the attribute that holds them."""
+        return {"atr": IndicatorSpec("ATR", int(params["atr_period"]))}
+
+    @classmethod
+    def precomputed_specs(cls, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Entries of ``indicator_specs`` that are cheaper to compute over the whole frame before the run."""
+        return {}
+
     def __init__(self):
         data0 = self.datas[0]
-        self.atr = bt.ind.ATR(data0, period=int(self.p.atr_period))
+        self._indicator_specs = self.indicator_specs(self.p._getkwargs())
+        self.atr = self.indicator("atr", lambda: bt.ind.ATR(data0, period=int(self.p.atr_period)))
         if self.p.commission is not None:
             self.broker.setcommission(commission=float(self.p.commission))
 
-        self.captured_trades = []
-        self.captured_positions = []
-        self.captured_equity_curve = []
+        # Preloaded feeds know their length up front; otherwise the buffers grow by doubling.
+        capture = self.p.capture
+        if capture == "equity_downsampled" and self.p.low_memory:
+            # Between DOWNSAMPLED_POINTS / 2 and DOWNSAMPLED_POINTS + 1 rows, whatever the length.
+            self.bar_capture = ThinnedBarCapture(points=DOWNSAMPLED_POINTS // 2)
+        else:
+            self.bar_capture = BarCapture(capacity=data0.buflen() if capture in ("equity_downsampled", "full") else 0)
+        self.trade_capture = TradeCapture()
+        self.value_capture = ValueCapture(capacity=data0.buflen()) if self.p.capture_values else None
+        self._capture_bars = capture in ("equity_downsampled", "full")
+
+    @property
+    def captured_trades(self):
+        return self.trade_capture.trades()
+
+    @property
+    def captured_positions(self):
+        return self.bar_capture.positions()
+
+    @property
+    def captured_equity_curve(self):
+        return self.bar_capture.equity_curve()
+
+    def indicator(self, key: str, build: Callable[[], Any]):
+        """The feed's precomputed line for ``key`` when present, otherwise ``build()``."""
+        line_name = self._indicator_specs[key].line_name
+        data0 = self.datas[0]
+        if line_name in data0.lines.getlinealiases():
+            return getattr(data0.lines, line_name)
+        return build()
 
     def prenext(self):
         self.next()
@@ -40,6 +86,9 @@ class RiskManagedStrategy(bt.Strategy):
         return entry_price - self.p.atr_mult * float(self.atr[0])
 
     def next(self):
+        if self.value_capture is not None:
+            # The metrics come from this series, so record warm-up bars as well.
+            self.value_capture.append(self.datas[0].datetime[0], self.broker.getvalue())
         if len(self) < self.min_history:
             return
 
@@ -66,33 +115,20 @@ class RiskManagedStrategy(bt.Strategy):
         elif self.position and self.should_exit():
             self.close()
 
-        dt = self.datas[0].datetime.date(0)
-        pos_size = float(self.position.size) if self.position else 0.0
-        pos_value = float(pos_size * price) if pos_size else 0.0
-        equity = float(self.broker.getvalue())
-        snapshot = {"date": dt, "position": pos_size, "value": pos_value, "equity": equity}
-        self.captured_positions.append(snapshot)
-        self.captured_equity_curve.append({"date": dt, "equity": equity})
+        if self._capture_bars:
+            pos_size = float(self.position.size) if self.position else 0.0
+            pos_value = float(pos_size * price) if pos_size else 0.0
+            self.bar_capture.append(self.datas[0].datetime[0], pos_size, pos_value, self.broker.getvalue())
 
     def notify_order(self, order):
+        # Fills are recorded at every capture level: the trade metrics need them.
         if order.status not in [order.Completed]:
             return
 
-        dt = self.datas[0].datetime.date(0)
-        op = "buy" if order.isbuy() else "sell"
-        trade = {
-            "date": dt,
-            "operation": op,
-            "price": float(order.executed.price),
-            "size": float(order.executed.size),
-            "pnl": None,
-        }
-        self.captured_trades.append(trade)
+        self.trade_capture.append(
+            self.datas[0].datetime[0], order.isbuy(), order.executed.price, order.executed.size
+        )
 
     def notify_trade(self, trade):
         if trade.isclosed:
-            dt = self.datas[0].datetime.date(0)
-            for t in reversed(self.captured_trades):
-                if t["date"] == dt and t["operation"] == "sell" and t["pnl"] is None:
-                    t["pnl"] = float(trade.pnl)
-                    break
\ No newline at end of file
+            self.trade_capture.set_pnl(self.datas[0].datetime[0], trade.pnl)
\ No newline at end of file
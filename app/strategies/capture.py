@@ -0,0 +1,200 @@
+"""Struct-of-arrays buffers for the per-bar and per-order data captured by strategies.
+
+Bars are stored as Backtrader date numbers (``int(num)`` is the proleptic
+ordinal of the bar's day) and only turned into ``datetime.date`` objects when
+the records are built at the end of the run.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# ``date.toordinal()`` of 1970-01-01, the ``datetime64[D]`` epoch.
+_EPOCH_ORDINAL = 719163
+
+# What a run records, from cheapest to most complete:
+#   metrics_only        only the metrics (fills are still recorded for them, but not returned)
+#   trades              plus every completed order
+#   equity_downsampled  plus positions/equity thinned to about DOWNSAMPLED_POINTS rows
+#   full                every bar, with Backtrader's observers
+CAPTURE_LEVELS = ("metrics_only", "trades", "equity_downsampled", "full")
+DOWNSAMPLED_POINTS = 500
+
+
+def downsample_rows(count: int, points: int = DOWNSAMPLED_POINTS) -> np.ndarray:
+    """Evenly strided row indices, always keeping the last row."""
+    step = max(1, -(-count // points))
+    rows = np.arange(0, count, step)
+    if count and rows[-1] != count - 1:
+        rows = np.append(rows, count - 1)
+    return rows
+
+
+def _days(nums: np.ndarray) -> List:
+    days = nums.astype(np.int64) - _EPOCH_ORDINAL
+    return days.astype("datetime64[D]").astype(object).tolist()
+
+
+class _Columns:
+    """Equally sized 1-D arrays, exposed as attributes, filled one row at a time."""
+
+    fields: Tuple[Tuple[str, str], ...] = ()
+
+    def __init__(self, capacity: int):
+        self.count = 0
+        self.capacity = max(int(capacity), 16)
+        for name, dtype in self.fields:
+            setattr(self, name, np.empty(self.capacity, dtype=dtype))
+
+    def _grow(self) -> None:
+        self.capacity *= 2
+        for name, _ in self.fields:
+            values = getattr(self, name)
+            grown = np.empty(self.capacity, dtype=values.dtype)
+            grown[: self.count] = values[: self.count]
+            setattr(self, name, grown)
+
+    def view(self, name: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        values = getattr(self, name)[: self.count]
+        return values if rows is None else values[rows]
+
+
+class BarCapture(_Columns):
+    """Position and equity per bar; the equity curve is the ``equity`` column."""
+
+    fields = (("date", "f8"), ("position", "f8"), ("value", "f8"), ("equity", "f8"))
+
+    def append(self, date_num: float, position: float, value: float, equity: float) -> None:
+        row = self.count
+        if row == self.capacity:
+            self._grow()
+        self.date[row] = date_num
+        self.position[row] = position
+        self.value[row] = value
+        self.equity[row] = equity
+        self.count = row + 1
+
+    def positions(self, rows: Optional[np.ndarray] = None) -> List[dict]:
+        return [
+            {"date": day, "position": position, "value": value, "equity": equity}
+            for day, position, value, equity in zip(
+                _days(self.view("date", rows)),
+                self.view("position", rows).tolist(),
+                self.view("value", rows).tolist(),
+                self.view("equity", rows).tolist(),
+            )
+        ]
+
+    def equity_curve(self, rows: Optional[np.ndarray] = None) -> List[dict]:
+        return [
+            {"date": day, "equity": equity}
+            for day, equity in zip(_days(self.view("date", rows)), self.view("equity", rows).tolist())
+        ]
+
+
+class ThinnedBarCapture(BarCapture):
+    """``BarCapture`` bounded to ``2 * points + 1`` rows, for feeds of unknown length.
+
+    Rows are kept on a stride that doubles, dropping every other row, each time
+    ``2 * points`` rows are stored; the latest bar is always kept after them.
+    """
+
+    def __init__(self, points: int = DOWNSAMPLED_POINTS):
+        super().__init__(2 * points + 1)
+        self.points = points
+        self.stride = 1
+        self._seen = 0
+        self._kept = 0  # rows on the stride; the row after them, if any, is the latest bar
+
+    def append(self, date_num: float, position: float, value: float, equity: float) -> None:
+        on_stride = self._seen % self.stride == 0
+        self._seen += 1
+        row = self._kept
+        self.date[row] = date_num
+        self.position[row] = position
+        self.value[row] = value
+        self.equity[row] = equity
+        self.count = row + 1
+        if not on_stride:
+            return
+
+        self._kept = row + 1
+        if self._kept == 2 * self.points:
+            half = self.points
+            for name, _ in self.fields:
+                values = getattr(self, name)
+                latest = values[2 * half - 1]
+                values[:half] = values[: 2 * half : 2]
+                values[half] = latest
+            self._kept, self.count = half, half + 1
+            self.stride *= 2
+
+
+class ValueCapture(_Columns):
+    """Broker value on every bar, including warm-up bars; input of the metrics."""
+
+    fields = (("date", "f8"), ("value", "f8"))
+
+    def append(self, date_num: float, value: float) -> None:
+        row = self.count
+        if row == self.capacity:
+            self._grow()
+        self.date[row] = date_num
+        self.value[row] = value
+        self.count = row + 1
+
+    def dates(self) -> np.ndarray:
+        """Bar days as ``datetime64[D]``."""
+        return (self.view("date").astype(np.int64) - _EPOCH_ORDINAL).astype("datetime64[D]")
+
+
+class TradeCapture(_Columns):
+    """Completed orders; ``pnl`` is NaN until the trade it closes is notified."""
+
+    fields = (("date", "f8"), ("is_buy", "?"), ("price", "f8"), ("size", "f8"), ("pnl", "f8"))
+
+    def __init__(self, capacity: int = 64):
+        super().__init__(capacity)
+        # Rows of sells still waiting for a PnL, keyed by the bar's day.
+        self._open_sells: Dict[int, List[int]] = {}
+
+    def append(self, date_num: float, is_buy: bool, price: float, size: float) -> None:
+        row = self.count
+        if row == self.capacity:
+            self._grow()
+        self.date[row] = date_num
+        self.is_buy[row] = is_buy
+        self.price[row] = price
+        self.size[row] = size
+        self.pnl[row] = np.nan
+        self.count = row + 1
+        if not is_buy:
+            self._open_sells.setdefault(int(date_num), []).append(row)
+
+    def set_pnl(self, date_num: float, pnl: float) -> None:
+        """Attach ``pnl`` to the latest sell of that day that has none yet."""
+        day = int(date_num)
+        rows = self._open_sells.get(day)
+        if rows:
+            self.pnl[rows.pop()] = pnl
+            if not rows:
+                del self._open_sells[day]
+
+    def trades(self) -> List[dict]:
+        return [
+            {
+                "date": day,
+                "operation": "buy" if is_buy else "sell",
+                "price": price,
+                "size": size,
+                "pnl": None if pnl != pnl else pnl,
+            }
+            for day, is_buy, price, size, pnl in zip(
+                _days(self.view("date")),
+                self.view("is_buy").tolist(),
+                self.view("price").tolist(),
+                self.view("size").tolist(),
+                self.view("pnl").tolist(),
+            )
+        ]
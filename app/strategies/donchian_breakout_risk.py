@@ -1,6 +1,7 @@
 import math
 import backtrader as bt
 
+from app.indicators import IndicatorSpec
 from app.strategies.base import RiskManagedStrategy
 
 
@@ -15,12 +16,21 @@ class DonchianBreakoutRisk(RiskManagedStrategy):
         commission=0.001,
     )
 
+    @classmethod
+    def indicator_specs(cls, params):
+        period = int(params["channel_period"])
+        return {
+            **super().indicator_specs(params),
+            "highest": IndicatorSpec("HIGHEST", period),
+            "lowest": IndicatorSpec("LOWEST", period),
+        }
+
     def __init__(self):
         super().__init__()
         period = int(self.p.channel_period)
         data0 = self.datas[0]
-        self.highest = bt.ind.Highest(data0.high, period=period)
-        self.lowest = bt.ind.Lowest(data0.low, period=period)
+        self.highest = self.indicator("highest", lambda: bt.ind.Highest(data0.high, period=period))
+        self.lowest = self.indicator("lowest", lambda: bt.ind.Lowest(data0.low, period=period))
 
     @property
     def min_history(self) -> int:
@@ -3,7 +3,14 @@ from typing import Optional
 
 import numpy as np
 
-from app.ml.logistic_signal import fit_logistic, predict_proba
+from app.ml.logistic_signal import (
+    WARM_START_EPOCHS,
+    MomentumProbabilitySpec,
+    fit_logistic,
+    fit_logistic_newton,
+    momentum_training_set,
+    predict_proba,
+)
 from app.strategies.base import RiskManagedStrategy
 
 
@@ -13,66 +20,100 @@ class LogisticMomentumRisk(RiskManagedStrategy):
         train_window=120,
         entry_threshold=0.6,
         exit_threshold=0.4,
+        retrain_every=1,  # bars between refits; the current model still predicts on every bar
+        warm_start=False,  # refit from the previous weights (WARM_START_EPOCHS epochs for "gd")
+        solver="gd",  # "gd": fixed-epoch gradient descent; "newton": IRLS run to convergence
         atr_period=14,
         atr_mult=2.0,
         risk_per_trade=0.01,
         commission=0.001,
     )
 
+    @classmethod
+    def indicator_specs(cls, params):
+        return {
+            **super().indicator_specs(params),
+            "ml_prob": MomentumProbabilitySpec(
+                int(params["lookback"]),
+                int(params["train_window"]),
+                int(params["retrain_every"]),
+                bool(params["warm_start"]),
+                str(params["solver"]),
+            ),
+        }
+
+    @classmethod
+    def precomputed_specs(cls, params):
+        # Only closes up to each bar go into its probability, so the series can be built before the run.
+        return {"ml_prob": cls.indicator_specs(params)["ml_prob"]}
+
     def __init__(self):
         super().__init__()
+        # Feed line with the precomputed probabilities; without it (streamed feeds) the model trains in next().
+        self.ml_prob = self.indicator("ml_prob", lambda: None)
         self._coeffs: Optional[np.ndarray] = None
         self._bias: float = 0.0
-        self._prob: float = 0.0
+        self._prob: float = math.nan
+        self._since_fit = 0
+
+    def qbuffer(self, savemem=0, replaying=False):
+        super().qbuffer(savemem=savemem, replaying=replaying)
+        # _collect_closes reads past the indicators' periods; keep that many closes under exactbars.
+        self.data.close.minbuffer(self.min_history)
 
     @property
     def min_history(self) -> int:
         return int(self.p.train_window + self.p.lookback + 1)
 
     def _collect_closes(self, count: int) -> Optional[np.ndarray]:
+        # Checked up front: under exactbars, get() fails instead of returning a short list.
+        if len(self.data) < count:
+            return None
         values = list(self.data.close.get(size=count))
         if len(values) < count:
             return None
         return np.array(values, dtype=float)
 
     def _train_if_ready(self):
-        count = int(self.p.train_window + self.p.lookback + 1)
-        closes = self._collect_closes(count)
+        lookback = int(self.p.lookback)
+        if self._coeffs is not None and self._since_fit + 1 < int(self.p.retrain_every):
+            self._since_fit += 1
+            closes = self._collect_closes(lookback + 1)
+            self._prob = float(predict_proba(np.diff(np.log(closes)), self._coeffs, self._bias)[0])
+            return
+
+        closes = self._collect_closes(self.min_history)
         if closes is None:
             return
 
         log_returns = np.diff(np.log(closes))
-        lookback = int(self.p.lookback)
-        train_window = int(self.p.train_window)
-
-        features = []
-        labels = []
-        for idx in range(train_window):
-            window = log_returns[idx : idx + lookback]
-            target = 1.0 if log_returns[idx + lookback] > 0 else 0.0
-            features.append(window)
-            labels.append(target)
-
-        feat_arr = np.array(features)
-        label_arr = np.array(labels)
-        if not np.isfinite(feat_arr).all():
+        features, labels = momentum_training_set(log_returns, lookback, int(self.p.train_window))
+        if not np.isfinite(features).all():
             return
 
-        self._coeffs, self._bias = fit_logistic(feat_arr, label_arr)
+        initial = (self._coeffs, self._bias) if self.p.warm_start and self._coeffs is not None else None
+        if self.p.solver == "newton":
+            fitted = fit_logistic_newton(features, labels, initial=initial)
+        elif initial is not None:
+            fitted = fit_logistic(features, labels, epochs=WARM_START_EPOCHS, initial=initial)
+        else:
+            fitted = fit_logistic(features, labels)
+        self._coeffs, self._bias = fitted
+        self._since_fit = 0
 
         recent = log_returns[-lookback:]
         self._prob = float(predict_proba(recent, self._coeffs, self._bias)[0])
 
     def next(self):
-        self._train_if_ready()
+        if self.ml_prob is not None:
+            self._prob = self.ml_prob[0]
+        else:
+            self._train_if_ready()
         super().next()
 
     def should_enter(self) -> bool:
-        if self._coeffs is None:
-            return False
+        # NaN until the first fit, so neither comparison holds before it.
         return self._prob >= float(self.p.entry_threshold)
 
     def should_exit(self) -> bool:
-        if self._coeffs is None:
-            return False
-        return self._prob <= float(self.p.exit_threshold)
\ No newline at end of file
+        return self._prob <= float(self.p.exit_threshold)
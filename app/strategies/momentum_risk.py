@@ -1,6 +1,7 @@
 import math
 import backtrader as bt
 
+from app.indicators import IndicatorSpec
 from app.strategies.base import RiskManagedStrategy
 
 
@@ -17,9 +18,15 @@ class MomentumRisk(RiskManagedStrategy):
         commission=0.001,
     )
 
+    @classmethod
+    def indicator_specs(cls, params):
+        return {**super().indicator_specs(params), "momentum": IndicatorSpec("ROC", int(params["lookback"]))}
+
     def __init__(self):
         super().__init__()
-        self.momentum = bt.ind.RateOfChangePercent(self.data.close, period=int(self.p.lookback))
+        self.momentum = self.indicator(
+            "momentum", lambda: bt.ind.RateOfChange100(self.data.close, period=int(self.p.lookback))
+        )
 
     @property
     def min_history(self) -> int:
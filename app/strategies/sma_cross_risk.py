@@ -1,5 +1,6 @@
 import backtrader as bt
 
+from app.indicators import IndicatorSpec
 from app.strategies.base import RiskManagedStrategy
 
 
@@ -15,11 +16,19 @@ class SMACrossRisk(RiskManagedStrategy):
         commission=0.001,
     )
 
+    @classmethod
+    def indicator_specs(cls, params):
+        return {
+            **super().indicator_specs(params),
+            "sma_fast": IndicatorSpec("SMA", int(params["fast_period"])),
+            "sma_slow": IndicatorSpec("SMA", int(params["slow_period"])),
+        }
+
     def __init__(self):
         super().__init__()
         data0 = self.datas[0]
-        self.sma_fast = bt.ind.SMA(data0, period=int(self.p.fast_period))
-        self.sma_slow = bt.ind.SMA(data0, period=int(self.p.slow_period))
+        self.sma_fast = self.indicator("sma_fast", lambda: bt.ind.SMA(data0, period=int(self.p.fast_period)))
+        self.sma_slow = self.indicator("sma_slow", lambda: bt.ind.SMA(data0, period=int(self.p.slow_period)))
         self.crossover = bt.ind.CrossOver(self.sma_fast, self.sma_slow)
         self._initial_check_done = False
 
@@ -10,7 +10,7 @@ from sqlalchemy import select
 from app.db.session import SessionLocal
 from app.db.models.symbol import Symbol
 from app.services.data_collector import update_prices_for_ticker
-from app.services.indicator_service import update_sma_for_ticker
+from app.services.indicator_service import update_indicators_for_ticker
 
 import structlog
 
@@ -30,8 +30,8 @@ def refresh_indicators_job():
         for symbol in symbols:
             ticker = symbol.ticker
             try:
-                update_prices_for_ticker(ticker, db=session)
-                update_sma_for_ticker(ticker, db=session)
+                update_prices_for_ticker(ticker, db=session, incremental=True)
+                update_indicators_for_ticker(ticker, db=session)
                 logger.info("scheduler.indicator_update", ticker=ticker)
             except Exception:
                 logger.exception("scheduler.indicator_update_failed", ticker=ticker)
@@ -0,0 +1,148 @@
+"""Per-bar overhead and peak memory of strategy capture: dict lists vs the NumPy buffers.
+
+The legacy side reproduces the previous ``RiskManagedStrategy`` capture (two
+dicts appended per bar, reverse scan to attach PnL); both sides are replayed
+with the same call sequence over a daily series and then serialized to records,
+and both are also swapped into a full Backtrader run.
+
+Usage:
+    python -m scripts.benchmarks.bench_capture --years 30 --repeat 5
+"""
+import argparse
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+import app.strategies.base as strategy_base
+from app.services.backtest_service import run_backtest_on_frame
+from app.strategies.capture import BarCapture, TradeCapture
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark strategy capture buffers.")
+    parser.add_argument("--years", type=int, default=30, help="Years of business-day bars")
+    parser.add_argument("--trade-every", type=int, default=5, help="Bars between fills in the replay")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per implementation")
+    return parser
+
+
+class LegacyBarCapture:
+    def __init__(self, capacity: int = 0):
+        self.rows, self.curve = [], []
+
+    def append(self, date_num, position, value, equity):
+        dt = bt.num2date(date_num).date()
+        self.rows.append({"date": dt, "position": position, "value": value, "equity": float(equity)})
+        self.curve.append({"date": dt, "equity": float(equity)})
+
+    def positions(self):
+        return [dict(row) for row in self.rows]
+
+    def equity_curve(self):
+        return [{"date": point["date"], "equity": point["equity"]} for point in self.curve]
+
+
+class LegacyTradeCapture:
+    def __init__(self, capacity: int = 0):
+        self.rows = []
+
+    def append(self, date_num, is_buy, price, size):
+        op = "buy" if is_buy else "sell"
+        self.rows.append({"date": bt.num2date(date_num).date(), "operation": op, "price": float(price), "size": float(size), "pnl": None})
+
+    def set_pnl(self, date_num, pnl):
+        dt = bt.num2date(date_num).date()
+        for t in reversed(self.rows):
+            if t["date"] == dt and t["operation"] == "sell" and t["pnl"] is None:
+                t["pnl"] = float(pnl)
+                break
+
+    def trades(self):
+        return [dict(row) for row in self.rows]
+
+
+def synthetic_prices(n_bars: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0002, 0.015, n_bars)))
+    return pd.DataFrame(
+        {"open": close, "high": close * 1.01, "low": close * 0.99, "close": close, "volume": 1.0},
+        index=pd.date_range("1990-01-01", periods=n_bars, freq="B", name="datetime"),
+    )
+
+
+def replay(bar_cls, trade_cls, date_nums: np.ndarray, trade_every: int, serialize: bool = True):
+    bars, trades = bar_cls(len(date_nums)), trade_cls()
+    for idx, num in enumerate(date_nums.tolist()):
+        if idx % trade_every == 0:
+            trades.append(num, True, 100.0, 10.0)
+        elif idx % trade_every == trade_every // 2:
+            trades.append(num, False, 101.0, -10.0)
+            trades.set_pnl(num, 10.0)
+        bars.append(num, 10.0, 1000.0, 100000.0 + idx)
+    if not serialize:
+        return bars, trades
+    return bars.positions(), bars.equity_curve(), trades.trades()
+
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def peak_mb(func) -> float:
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+@contextmanager
+def capture_classes(bar_cls, trade_cls):
+    original = strategy_base.BarCapture, strategy_base.TradeCapture
+    strategy_base.BarCapture, strategy_base.TradeCapture = bar_cls, trade_cls
+    try:
+        yield
+    finally:
+        strategy_base.BarCapture, strategy_base.TradeCapture = original
+
+
+def main():
+    args = build_parser().parse_args()
+    df = synthetic_prices(args.years * 261)
+    date_nums = np.array([bt.date2num(ts.to_pydatetime()) for ts in df.index])
+
+    legacy_out = replay(LegacyBarCapture, LegacyTradeCapture, date_nums, args.trade_every)
+    array_out = replay(BarCapture, TradeCapture, date_nums, args.trade_every)
+    assert legacy_out == array_out
+
+    results = {}
+    for name, classes in (("dict lists", (LegacyBarCapture, LegacyTradeCapture)), ("numpy", (BarCapture, TradeCapture))):
+        elapsed = best_of(lambda: replay(*classes, date_nums, args.trade_every), args.repeat)
+        held = peak_mb(lambda: replay(*classes, date_nums, args.trade_every, serialize=False))
+        memory = peak_mb(lambda: replay(*classes, date_nums, args.trade_every))
+        with capture_classes(*classes):
+            run = lambda: run_backtest_on_frame(df, ticker="BENCH", strategy_type="sma_cross", strategy_params={"fast_period": 3, "slow_period": 8})
+            reference = run()
+            full = best_of(run, max(1, args.repeat // 2))
+        results[name] = (elapsed, held, memory, full, reference)
+
+    assert results["dict lists"][-1]["trades"] == results["numpy"][-1]["trades"]
+    print(f"bars: {len(df)} ({args.years} years), fills in full run: {len(results['numpy'][-1]['trades'])}")
+    for name, (elapsed, held, memory, full, _) in results.items():
+        print(
+            f"{name:10s}: capture {elapsed / len(df) * 1e9:6.0f} ns/bar  "
+            f"peak during run {held:6.2f} MB  with records {memory:6.2f} MB  full run {full * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
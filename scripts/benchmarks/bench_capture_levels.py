@@ -0,0 +1,44 @@
+"""Throughput of each capture level, per engine, on the same series.
+
+Usage:
+    python -m scripts.benchmarks.bench_capture_levels --bars 20000 --engine backtrader
+"""
+import argparse
+
+from app.services.backtest_service import ENGINES, STRATEGY_REGISTRY, run_backtest_on_frame
+from app.strategies.capture import CAPTURE_LEVELS
+from scripts.benchmarks.bench_engines import best_of, synthetic_prices
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark backtest capture levels.")
+    parser.add_argument("--bars", type=int, default=10_000, help="Number of daily bars")
+    parser.add_argument("--strategy", default="sma_cross", choices=sorted(STRATEGY_REGISTRY))
+    parser.add_argument("--engine", choices=ENGINES, help="Only this engine (default: both)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per level")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    df = synthetic_prices(args.bars)
+
+    for engine in [args.engine] if args.engine else ENGINES:
+
+        def run(capture):
+            return run_backtest_on_frame(df, ticker="BENCH", strategy_type=args.strategy, engine=engine, capture=capture)
+
+        full = run("full")
+        print(f"{engine} ({args.strategy}, {args.bars} bars)")
+        for capture in CAPTURE_LEVELS:
+            result = run(capture)
+            assert result["metrics"] == full["metrics"], capture
+            elapsed = best_of(lambda: run(capture), args.repeat)
+            print(
+                f"  {capture:<20} {elapsed * 1000:9.2f} ms  {args.bars / elapsed:12,.0f} bars/s"
+                f"  {len(result['trades']):6d} fills  {len(result['positions']):6d} positions"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Throughput of the Backtrader and vectorized backtest engines on the same series.
+
+Usage:
+    python -m scripts.benchmarks.bench_engines --bars 20000 --strategy donchian_breakout
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest_service import STRATEGY_REGISTRY, run_backtest_on_frame
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark backtest engines.")
+    parser.add_argument("--bars", type=int, default=10_000, help="Number of daily bars")
+    parser.add_argument("--strategy", default="sma_cross", choices=sorted(STRATEGY_REGISTRY))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per engine")
+    return parser
+
+
+def synthetic_prices(n_bars: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0002, 0.015, n_bars)))
+    open_ = close * (1 + rng.normal(0, 0.005, n_bars))
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n_bars)),
+            "low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n_bars)),
+            "close": close,
+            "volume": 1.0,
+        },
+        index=pd.date_range("1950-01-02", periods=n_bars, freq="B", name="datetime"),
+    )
+
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    args = build_parser().parse_args()
+    df = synthetic_prices(args.bars)
+
+    def run(engine):
+        return run_backtest_on_frame(df, ticker="BENCH", strategy_type=args.strategy, engine=engine)
+
+    reference, vectorized = run("backtrader"), run("vectorized")
+    for key in ("final_value", "trades", "positions", "metrics"):
+        assert reference[key] == vectorized[key], key
+
+    legacy = best_of(lambda: run("backtrader"), args.repeat)
+    fast = best_of(lambda: run("vectorized"), args.repeat)
+
+    print(f"strategy:   {args.strategy} ({args.bars} bars, {len(reference['trades'])} fills)")
+    print(f"backtrader: {legacy * 1000:9.2f} ms  {args.bars / legacy:12,.0f} bars/s")
+    print(f"vectorized: {fast * 1000:9.2f} ms  {args.bars / fast:12,.0f} bars/s")
+    print(f"speedup:    {legacy / fast:9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
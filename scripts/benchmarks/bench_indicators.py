@@ -0,0 +1,103 @@
+"""Benchmark of ``app.indicators`` against the Backtrader indicators used by the strategies.
+
+Both sides compute SMA, EMA, ATR, Highest, Lowest and RateOfChange100 over the
+same synthetic series; the Backtrader side is a bare ``Cerebro`` run whose
+strategy only instantiates the indicators.
+
+Usage:
+    python -m scripts.benchmarks.bench_indicators --bars 20000 --repeat 3
+"""
+import argparse
+import time
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+import app.indicators as ind
+
+PERIOD = 20
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark NumPy indicators against Backtrader.")
+    parser.add_argument("--bars", type=int, default=10_000, help="Number of daily bars")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per implementation")
+    return parser
+
+
+def synthetic_prices(n_bars: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    return pd.DataFrame(
+        {
+            "open": closes,
+            "high": closes * (1 + rng.uniform(0, 0.01, n_bars)),
+            "low": closes * (1 - rng.uniform(0, 0.01, n_bars)),
+            "close": closes,
+            "volume": 1.0,
+        },
+        index=pd.date_range("1980-01-01", periods=n_bars, freq="D", name="datetime"),
+    )
+
+
+class _IndicatorsOnly(bt.Strategy):
+    def __init__(self):
+        self.outputs = {
+            "sma": bt.ind.SMA(self.data.close, period=PERIOD),
+            "ema": bt.ind.EMA(self.data.close, period=PERIOD),
+            "atr": bt.ind.ATR(self.data, period=PERIOD),
+            "highest": bt.ind.Highest(self.data.high, period=PERIOD),
+            "lowest": bt.ind.Lowest(self.data.low, period=PERIOD),
+            "roc": bt.ind.RateOfChange100(self.data.close, period=PERIOD),
+        }
+
+
+def backtrader_indicators(df: pd.DataFrame) -> dict:
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(bt.feeds.PandasData(dataname=df))
+    cerebro.addstrategy(_IndicatorsOnly)
+    strategy = cerebro.run()[0]
+    return {name: np.asarray(line.array) for name, line in strategy.outputs.items()}
+
+
+def numpy_indicators(df: pd.DataFrame) -> dict:
+    high, low, close = (df[col].to_numpy() for col in ("high", "low", "close"))
+    return {
+        "sma": ind.sma(close, PERIOD),
+        "ema": ind.ema(close, PERIOD),
+        "atr": ind.atr(high, low, close, PERIOD),
+        "highest": ind.rolling_max(high, PERIOD),
+        "lowest": ind.rolling_min(low, PERIOD),
+        "roc": ind.roc_percent(close, PERIOD),
+    }
+
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    args = build_parser().parse_args()
+    df = synthetic_prices(args.bars)
+
+    reference = backtrader_indicators(df)
+    for name, values in numpy_indicators(df).items():
+        np.testing.assert_allclose(values, reference[name], rtol=1e-9, equal_nan=True, err_msg=name)
+
+    legacy = best_of(lambda: backtrader_indicators(df), args.repeat)
+    vectorized = best_of(lambda: numpy_indicators(df), args.repeat)
+
+    print(f"bars: {args.bars}")
+    print(f"backtrader: {legacy * 1000:9.2f} ms")
+    print(f"numpy:      {vectorized * 1000:9.2f} ms")
+    print(f"speedup:    {legacy / vectorized:9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Logistic refits of ``ml_momentum``, one window at a time vs batched, per solver and training window.
+
+Every solver fits the same rolling windows of a synthetic series; each row
+also reports how far the batched coefficients are from the
+one-window-at-a-time ones (expected: rounding only).
+
+Usage:
+    python -m scripts.benchmarks.bench_logistic --windows 60 120 250 500 --fits 200
+"""
+import argparse
+
+import numpy as np
+
+from app.ml.logistic_signal import (
+    fit_logistic,
+    fit_logistic_gd_batch,
+    fit_logistic_newton,
+    fit_logistic_newton_batch,
+    momentum_training_set,
+)
+from scripts.benchmarks.bench_engines import best_of, synthetic_prices
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark logistic solvers.")
+    parser.add_argument("--windows", type=int, nargs="+", default=[60, 120, 250, 500], help="train_window sizes")
+    parser.add_argument("--lookback", type=int, default=10)
+    parser.add_argument("--fits", type=int, default=200, help="Rolling windows fit per size")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per solver")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    close = synthetic_prices(max(args.windows) + args.lookback + args.fits + 1)["close"].to_numpy()
+    log_returns = np.diff(np.log(close))
+
+    print(f"{args.fits} refits, lookback={args.lookback}")
+    for train_window in args.windows:
+        windows = [momentum_training_set(log_returns[first:], args.lookback, train_window) for first in range(args.fits)]
+        features = np.stack([f for f, _ in windows])
+        labels = np.stack([l for _, l in windows])
+
+        timings = {}
+        for solver, single_fit, batch_fit in (
+            ("gd", fit_logistic, fit_logistic_gd_batch),
+            ("newton", fit_logistic_newton, fit_logistic_newton_batch),
+        ):
+            single = best_of(lambda: [single_fit(f, l) for f, l in windows], args.repeat)
+            batched = best_of(lambda: batch_fit(features, labels), args.repeat)
+            expected = np.stack([single_fit(f, l)[0] for f, l in windows])
+            gap = float(np.abs(batch_fit(features, labels)[0] - expected).max())
+            timings[solver] = (single, batched, gap)
+
+        print(f"  train_window={train_window}")
+        for solver, (single, batched, gap) in timings.items():
+            print(
+                f"    {solver:<7} one by one: {single * 1000:8.1f} ms  batched: {batched * 1000:8.1f} ms"
+                f"  ({timings['gd'][0] / batched:6.1f}x vs gd one by one, batch gap {gap:.1e})"
+            )
+
+
+if __name__ == "__main__":
+    main()
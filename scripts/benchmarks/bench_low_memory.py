@@ -0,0 +1,148 @@
+"""Peak RSS of loaded vs low-memory (streamed) backtests as the history grows.
+
+Each run happens in a fresh subprocess so that ``ru_maxrss`` measures only
+that run. Bars are synthetic 1-minute bars in a temporary SQLite file unless
+``--database-url`` points at an existing database.
+
+Usage:
+    python -m scripts.benchmarks.bench_low_memory --bars 50000 100000 200000
+    python -m scripts.benchmarks.bench_low_memory --database-url postgresql+psycopg2://... --ticker PETR4.SA --interval 1m
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models.bar import Bar
+from app.db.models.symbol import Symbol
+
+MODES = ("loaded", "low_memory")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark low-memory backtests.")
+    parser.add_argument("--database-url", default=None, help="Existing database (defaults to a temporary SQLite file)")
+    parser.add_argument("--ticker", default="BENCH", help="Ticker to run")
+    parser.add_argument("--interval", default="1m", help="Bar interval")
+    parser.add_argument("--bars", type=int, nargs="+", default=[25_000, 50_000, 100_000], help="History lengths (SQLite only)")
+    parser.add_argument("--strategy", default="sma_cross")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--end", default=None, help=argparse.SUPPRESS)
+    return parser
+
+
+def seed_synthetic(url: str, ticker: str, interval: str, n_bars: int) -> None:
+    engine = create_engine(url, future=True)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    symbol = Symbol(ticker=ticker, name=ticker)
+    session.add(symbol)
+    session.flush()
+
+    rng = np.random.default_rng(42)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n_bars)))
+    start = datetime(2000, 1, 3, 10, 0)
+    chunk = 50_000
+    for offset in range(0, n_bars, chunk):
+        session.execute(
+            Bar.__table__.insert(),
+            [
+                {
+                    "symbol_id": symbol.id,
+                    "interval": interval,
+                    "ts": start + timedelta(minutes=idx),
+                    "open": float(closes[idx] * 0.9995),
+                    "high": float(closes[idx] * 1.001),
+                    "low": float(closes[idx] * 0.999),
+                    "close": float(closes[idx]),
+                    "volume": 100.0,
+                }
+                for idx in range(offset, min(offset + chunk, n_bars))
+            ],
+        )
+    session.commit()
+    session.close()
+
+
+def run_child(args) -> None:
+    from app.services import backtest_service
+
+    backtest_service.SessionLocal = sessionmaker(bind=create_engine(args.database_url, future=True))
+    baseline = backtest_service._peak_rss_mb()
+    started = time.perf_counter()
+    result = backtest_service.run_backtest(
+        ticker=args.ticker,
+        strategy_type=args.strategy,
+        timeframe=args.interval,
+        end=args.end,
+        low_memory=args.child == "low_memory",
+        capture="equity_downsampled" if args.child == "low_memory" else "full",
+    )
+    elapsed = time.perf_counter() - started
+    print(
+        json.dumps(
+            {
+                "seconds": elapsed,
+                "baseline_mb": baseline,
+                "peak_mb": backtest_service._peak_rss_mb(),
+                "positions": len(result["positions"]),
+                "final_value": result["final_value"],
+            }
+        )
+    )
+
+
+def measure(args, url: str, mode: str, end=None) -> dict:
+    command = [
+        sys.executable, "-m", "scripts.benchmarks.bench_low_memory",
+        "--child", mode,
+        "--database-url", url,
+        "--ticker", args.ticker,
+        "--interval", args.interval,
+        "--strategy", args.strategy,
+    ]
+    if end:
+        command += ["--end", end]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def report(label: str, runs: dict) -> None:
+    loaded, streamed = runs["loaded"], runs["low_memory"]
+    assert loaded["final_value"] == streamed["final_value"]
+    print(
+        f"{label:>10}  loaded: {loaded['peak_mb'] - loaded['baseline_mb']:8.1f} MB {loaded['seconds']:7.2f} s"
+        f"  low_memory: {streamed['peak_mb'] - streamed['baseline_mb']:8.1f} MB {streamed['seconds']:7.2f} s"
+        f"  ({streamed['positions']} positions)"
+    )
+
+
+def main():
+    args = build_parser().parse_args()
+    if args.child:
+        run_child(args)
+        return
+
+    print(f"peak RSS above the interpreter baseline ({args.strategy}, {args.interval})")
+    if args.database_url:
+        report(args.ticker, {mode: measure(args, args.database_url, mode) for mode in MODES})
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_bars in args.bars:
+            url = f"sqlite:///{Path(tmp) / f'bench_{n_bars}.db'}"
+            seed_synthetic(url, args.ticker, args.interval, n_bars)
+            report(f"{n_bars} bars", {mode: measure(args, url, mode) for mode in MODES})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Cost of Backtrader's Sharpe/DrawDown analyzers vs the post-run metrics pack of ``app.metrics``.
+
+Each row times the same Backtrader run with the default post-run metrics and
+with ``analyzers=True``, and the metrics pack alone on a series of the same
+length; the analyzer overhead is the difference between the two runs.
+
+Usage:
+    python -m scripts.benchmarks.bench_metrics --bars 2000 10000 50000
+"""
+import argparse
+
+from app.metrics import performance_metrics, rolling_metrics
+from app.services.backtest_service import STRATEGY_REGISTRY, run_backtest_on_frame
+from scripts.benchmarks.bench_engines import best_of, synthetic_prices
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark analyzers vs post-run metrics.")
+    parser.add_argument("--bars", type=int, nargs="+", default=[2_000, 10_000, 50_000], help="Numbers of daily bars")
+    parser.add_argument("--strategy", default="sma_cross", choices=sorted(STRATEGY_REGISTRY))
+    parser.add_argument("--capture", default="metrics_only", help="Capture level of both runs")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per variant")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    print(f"{args.strategy}, capture={args.capture}")
+    for n_bars in args.bars:
+        df = synthetic_prices(n_bars)
+
+        def run(analyzers):
+            return run_backtest_on_frame(
+                df, ticker="BENCH", strategy_type=args.strategy, capture=args.capture, analyzers=analyzers
+            )
+
+        post_run, analyzed = run(False), run(True)
+        assert post_run["metrics"]["sharpe"] == analyzed["metrics"]["sharpe"]
+        assert post_run["metrics"]["max_drawdown"] == analyzed["metrics"]["max_drawdown"]
+
+        dates = df.index.to_numpy(dtype="datetime64[ns]")
+        values = 100000.0 * df["close"].to_numpy() / df["close"].iloc[0]
+        trades = run_backtest_on_frame(df, ticker="BENCH", strategy_type=args.strategy, capture="trades")["trades"]
+
+        plain = best_of(lambda: run(False), args.repeat)
+        with_analyzers = best_of(lambda: run(True), args.repeat)
+        pack = best_of(lambda: performance_metrics(100000.0, float(values[-1]), dates, values, trades), args.repeat)
+        rolling = best_of(lambda: rolling_metrics(dates, values, 100000.0), args.repeat)
+        print(
+            f"  {n_bars:>7} bars  run: {plain * 1000:9.1f} ms  with analyzers: {with_analyzers * 1000:9.1f} ms"
+            f"  (+{(with_analyzers - plain) * 1000:7.1f} ms)  metrics pack: {pack * 1000:6.2f} ms"
+            f"  rolling: {rolling * 1000:6.2f} ms  ({len(trades)} fills)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Micro-benchmark of ``_prepare_rows_for_insert`` against the old ``iterrows()`` version.
+
+Usage:
+    python -m scripts.benchmarks.bench_prepare_rows --rows 100000 --repeat 5
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.data_collector import _prepare_rows_for_insert
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark price row preparation.")
+    parser.add_argument("--rows", type=int, default=50_000, help="Number of downloaded bars")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per implementation")
+    return parser
+
+
+def iterrows_prepare(df: pd.DataFrame, symbol_id: int):
+    rows = []
+    for ts, row in df.iterrows():
+        def safe_float(value):
+            try:
+                if hasattr(value, "iloc"):
+                    return float(value.iloc[0])
+                return float(value)
+            except Exception:
+                return None
+
+        rows.append(
+            {
+                "symbol_id": symbol_id,
+                "date": ts.date(),
+                "open": safe_float(row.get("Open")),
+                "high": safe_float(row.get("High")),
+                "low": safe_float(row.get("Low")),
+                "close": safe_float(row.get("Close")),
+                "volume": safe_float(row.get("Volume")),
+            }
+        )
+    return rows
+
+
+def synthetic_download(n_rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n_rows)))
+    return pd.DataFrame(
+        {
+            "Open": closes * 0.999,
+            "High": closes * 1.001,
+            "Low": closes * 0.998,
+            "Close": closes,
+            "Volume": rng.integers(100, 10_000, n_rows),
+        },
+        index=pd.date_range("2000-01-03", periods=n_rows, freq="min"),
+    )
+
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    args = build_parser().parse_args()
+    df = synthetic_download(args.rows)
+
+    assert _prepare_rows_for_insert(df, 1) == iterrows_prepare(df, 1)
+
+    legacy = best_of(lambda: iterrows_prepare(df, 1), args.repeat)
+    vectorized = best_of(lambda: _prepare_rows_for_insert(df, 1), args.repeat)
+
+    print(f"rows: {args.rows}")
+    print(f"iterrows:   {legacy * 1000:9.2f} ms")
+    print(f"vectorized: {vectorized * 1000:9.2f} ms")
+    print(f"speedup:    {legacy / vectorized:9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Compare the ORM-hydrating price loader with the columnar one.
+
+Usage:
+    python -m scripts.benchmarks.bench_price_loader --years 25 --repeat 20
+    python -m scripts.benchmarks.bench_price_loader --database-url postgresql+psycopg2://... --ticker PETR4.SA
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models.price import Price
+from app.db.models.symbol import Symbol
+from app.services.price_loader import load_price_frame
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark price loading paths.")
+    parser.add_argument("--database-url", default=None, help="Existing database (defaults to in-memory SQLite)")
+    parser.add_argument("--ticker", default="BENCH", help="Ticker to load")
+    parser.add_argument("--years", type=int, default=25, help="Years of synthetic daily bars (SQLite only)")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed repetitions per loader")
+    return parser
+
+
+def seed_synthetic(session, ticker: str, years: int) -> None:
+    symbol = Symbol(ticker=ticker, name=ticker)
+    session.add(symbol)
+    session.flush()
+
+    n_bars = years * 252
+    rng = np.random.default_rng(42)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    day = date(2000, 1, 3)
+    rows = []
+    for close in closes:
+        rows.append(
+            {
+                "symbol_id": symbol.id,
+                "date": day,
+                "open": float(close * 0.99),
+                "high": float(close * 1.01),
+                "low": float(close * 0.98),
+                "close": float(close),
+                "volume": 1000.0,
+            }
+        )
+        day += timedelta(days=1)
+    session.execute(Price.__table__.insert(), rows)
+    session.commit()
+
+
+def legacy_load(session, ticker: str) -> pd.DataFrame:
+    symbol = session.execute(select(Symbol).where(Symbol.ticker == ticker)).scalar_one()
+    prices = session.execute(
+        select(Price).where(Price.symbol_id == symbol.id).order_by(Price.date.asc())
+    ).scalars().all()
+    df = pd.DataFrame(
+        [
+            {"datetime": p.date, "open": p.open, "high": p.high, "low": p.low, "close": p.close, "volume": p.volume}
+            for p in prices
+        ]
+    )
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    df.set_index("datetime", inplace=True)
+    return df
+
+
+def time_loader(session_factory, loader, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        session = session_factory()
+        try:
+            started = time.perf_counter()
+            loader(session)
+            best = min(best, time.perf_counter() - started)
+        finally:
+            session.close()
+    return best
+
+
+def main():
+    args = build_parser().parse_args()
+
+    if args.database_url:
+        engine = create_engine(args.database_url, future=True)
+    else:
+        engine = create_engine("sqlite:///:memory:", future=True)
+        Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False, future=True)
+
+    if not args.database_url:
+        session = session_factory()
+        seed_synthetic(session, args.ticker, args.years)
+        session.close()
+
+    session = session_factory()
+    try:
+        legacy_df = legacy_load(session, args.ticker)
+        columnar_df = load_price_frame(args.ticker, db=session)
+        pd.testing.assert_frame_equal(columnar_df, legacy_df)
+    finally:
+        session.close()
+
+    legacy = time_loader(session_factory, lambda s: legacy_load(s, args.ticker), args.repeat)
+    columnar = time_loader(session_factory, lambda s: load_price_frame(args.ticker, db=s), args.repeat)
+
+    print(f"bars: {len(legacy_df)}")
+    print(f"orm hydration: {legacy * 1000:8.2f} ms")
+    print(f"columnar:      {columnar * 1000:8.2f} ms")
+    print(f"speedup:       {legacy / columnar:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark of shipping a price frame to a worker: pickle round-trip vs shared-memory attach.
+
+The pickle side is what ``ProcessPoolExecutor`` pays when the frame travels
+with each task; the shared-memory side is ``attach_frame`` over a segment
+published once by ``SharedPriceStore``.
+
+Usage:
+    python -m scripts.benchmarks.bench_shared_prices --bars 1000000 --repeat 5
+"""
+import argparse
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.shared_prices import SharedPriceStore, attach_frame
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark pickling price frames against shared-memory attach.")
+    parser.add_argument("--bars", type=int, default=1_000_000, help="Number of bars")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per implementation")
+    return parser
+
+
+def synthetic_prices(n_bars: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n_bars)))
+    return pd.DataFrame(
+        {
+            "open": closes,
+            "high": closes * 1.001,
+            "low": closes * 0.999,
+            "close": closes,
+            "volume": 1.0,
+        },
+        index=pd.date_range("2000-01-03", periods=n_bars, freq="min", name="datetime"),
+    )
+
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _attach_and_release(handle):
+    segment, df = attach_frame(handle)
+    float(df["close"].iloc[-1])
+    del df
+    segment.close()
+
+
+def main():
+    args = build_parser().parse_args()
+    df = synthetic_prices(args.bars)
+    payload = len(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))
+
+    pickled = best_of(lambda: pickle.loads(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)), args.repeat)
+    with SharedPriceStore() as store:
+        handle = store.publish(df)
+        handle_bytes = len(pickle.dumps(handle))
+        shared = best_of(lambda: _attach_and_release(handle), args.repeat)
+
+    print(f"bars: {args.bars}")
+    print(f"pickle:        {pickled * 1000:9.2f} ms per task ({payload / 1e6:.1f} MB)")
+    print(f"shared memory: {shared * 1000:9.2f} ms per worker ({handle_bytes} B handle)")
+    print(f"speedup:       {pickled / shared:9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
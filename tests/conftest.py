@@ -1,11 +1,14 @@
+import numpy as np
+import pandas as pd
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, select
 from sqlalchemy.orm import sessionmaker
 
 from app.db.base import Base
 from app.db.models.symbol import Symbol
 from app.db.models.price import Price
 from app.db.models.indicator import Indicator
+from app.services.price_cache import price_cache
 
 
 @pytest.fixture(scope="session")
@@ -28,9 +31,12 @@ def db_session(test_engine, monkeypatch):
 
     monkeypatch.setattr(session_module, "SessionLocal", Session)
     monkeypatch.setattr(backtest_service, "SessionLocal", Session)
+    price_cache.clear()
 
     yield session
 
+    price_cache.clear()
+
     session.close()
     transaction.rollback()
     connection.close()
@@ -41,4 +47,29 @@ def seed_symbol(db_session):
     symbol = Symbol(ticker="PETR4.SA", name="Petrobras", exchange="B3", currency="BRL")
     db_session.add(symbol)
     db_session.commit()
-    return symbol
\ No newline at end of file
+    return symbol
+
+
+@pytest.fixture(scope="function")
+def seed_random_walk(db_session):
+    """Insert ``n`` bars of a seeded random walk for ``ticker`` and return the closes.
+
+    Bars are business days by default (``freq="D"`` includes weekends); the
+    symbol is created if it does not exist yet.
+    """
+
+    def seed(ticker, n, seed, *, base=100.0, drift=0.0, start="2022-01-03", freq="B"):
+        symbol = db_session.execute(select(Symbol).where(Symbol.ticker == ticker)).scalar_one_or_none()
+        if symbol is None:
+            symbol = Symbol(ticker=ticker, name=ticker, exchange="B3", currency="BRL")
+            db_session.add(symbol)
+            db_session.flush()
+        closes = base * np.exp(np.cumsum(np.random.default_rng(seed).normal(drift, 0.02, n)))
+        db_session.add_all(
+            Price(symbol_id=symbol.id, date=day, open=float(c), high=float(c * 1.01), low=float(c * 0.99), close=float(c), volume=1000)
+            for day, c in zip(pd.date_range(start, periods=n, freq=freq), closes)
+        )
+        db_session.commit()
+        return closes
+
+    return seed
@@ -84,8 +84,94 @@ def test_list_backtests(api_client, monkeypatch):
 
 
 def test_get_results_not_found(api_client, monkeypatch):
-    monkeypatch.setattr("app.api.routers.backtests.get_backtest_results", lambda backtest_id: None)
+    monkeypatch.setattr("app.api.routers.backtests.get_backtest_results", lambda backtest_id, **kwargs: None)
     response = api_client.get("/backtests/999/results")
     assert response.status_code == 404
     detail = response.json()["detail"]
-    assert detail.startswith("Backtest")
\ No newline at end of file
+    assert detail.startswith("Backtest")
+
+def test_positions_page_and_stream(api_client, monkeypatch):
+    calls = []
+
+    def fake_rows(backtest_id, kind, **kwargs):
+        calls.append((backtest_id, kind, kwargs))
+        return None if backtest_id == 999 else {"backtest_id": backtest_id, "items": [], "next_after": None}
+
+    def fake_stream(backtest_id, kind, **kwargs):
+        calls.append((backtest_id, kind, kwargs))
+        return iter([{"date": "2023-01-02", "equity": 1.0}, {"date": "2023-01-03", "equity": 2.0}])
+
+    monkeypatch.setattr("app.api.routers.backtests.get_backtest_rows", fake_rows)
+    monkeypatch.setattr("app.api.routers.backtests.iter_backtest_rows", fake_stream)
+
+    response = api_client.get("/backtests/1/positions?after=40&limit=10&fields=date,equity")
+    assert response.status_code == 200 and response.json()["next_after"] is None
+    assert calls[-1] == (1, "positions", {"after": 40, "limit": 10, "fields": ["date", "equity"]})
+    assert api_client.get("/backtests/999/trades").status_code == 404
+    assert api_client.get("/backtests/1/trades?limit=0").status_code == 422
+
+    response = api_client.get("/backtests/1/positions?stream=true")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [line for line in response.text.splitlines() if line][-1] == '{"date": "2023-01-03", "equity": 2.0}'
+
+
+def test_results_invalid_fields_returns_400(api_client, monkeypatch):
+    def fake_results(backtest_id, **kwargs):
+        raise ValueError("fields invalidos: bars.")
+
+    monkeypatch.setattr("app.api.routers.backtests.get_backtest_results", fake_results)
+    assert api_client.get("/backtests/1/results?fields=bars").status_code == 400
+
+
+def test_sweep_streams_ndjson(api_client, monkeypatch):
+    captured = {}
+
+    def fake_stream(**kwargs):
+        captured.update(kwargs)
+        return iter([{"event": "result", "strategy_params": {"fast_period": 3}}, {"event": "summary", "id": 7}])
+
+    monkeypatch.setattr("app.api.routers.backtests.stream_sweep", fake_stream)
+
+    payload = {"ticker": "PETR4.SA", "strategy_type": "sma_cross", "param_grid": {"fast_period": [3]}}
+    response = api_client.post("/backtests/sweep?stream=true", json=payload)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [line for line in response.text.splitlines() if line]
+    assert len(lines) == 2 and '"summary"' in lines[-1]
+    assert captured["top_n"] == 5
+
+
+def test_sweep_invalid_grid_returns_400(api_client, monkeypatch):
+    def fake_run(**kwargs):
+        raise ValueError("param_grid vazio.")
+
+    monkeypatch.setattr("app.api.routers.backtests.run_sweep", fake_run)
+    response = api_client.post("/backtests/sweep", json={"ticker": "PETR4.SA", "strategy_type": "sma_cross", "param_grid": {}})
+    assert response.status_code == 400
+
+
+def test_universe_accepts_all_and_lists(api_client, monkeypatch):
+    calls = []
+
+    def fake_run_universe(**kwargs):
+        calls.append(kwargs)
+        return {"completed": 0, "failed": 0, "results": [], "errors": []}
+
+    monkeypatch.setattr("app.api.routers.backtests.run_universe", fake_run_universe)
+
+    assert api_client.post("/backtests/universe", json={"strategy_type": "momentum"}).status_code == 200
+    assert api_client.post("/backtests/universe", json={"strategy_type": "momentum", "tickers": ["PETR4.SA"]}).status_code == 200
+    assert api_client.post("/backtests/universe", json={"strategy_type": "momentum", "tickers": "some"}).status_code == 422
+    assert [call["tickers"] for call in calls] == ["all", ["PETR4.SA"]]
+
+
+def test_walk_forward_invalid_window_returns_400(api_client, monkeypatch):
+    def fake_walk_forward(**kwargs):
+        raise ValueError("Historico insuficiente")
+
+    monkeypatch.setattr("app.api.routers.backtests.run_walk_forward", fake_walk_forward)
+    payload = {"ticker": "PETR4.SA", "strategy_type": "sma_cross", "train_bars": 250, "test_bars": 60}
+    response = api_client.post("/backtests/walk-forward", json=payload)
+    assert response.status_code == 400
+    assert api_client.post("/backtests/walk-forward", json={**payload, "test_bars": 0}).status_code == 422
@@ -1,8 +1,23 @@
+import time
+
 import pandas as pd
-import numpy as np
+import pytest
+from sqlalchemy import select
 
-from app.services.backtest_service import load_price_data_from_db, run_backtest
+from app.db.models.indicator import Indicator
+import app.services.backtest_service as backtest_service
+from app.services.backtest_service import (
+    get_backtest_results,
+    get_backtest_rows,
+    iter_backtest_rows,
+    load_price_data_from_db,
+    run_backtest,
+    run_backtest_and_save,
+    run_backtest_batch,
+)
+from app.services.price_cache import price_cache
 from app.db.models.price import Price
+from app.db.models.symbol import Symbol
 
 
 def test_load_price_data_from_db(db_session, seed_symbol):
@@ -84,4 +99,250 @@ def test_run_backtest_ml_momentum(db_session, seed_symbol):
 
     assert result["strategy_type"] == "ml_momentum"
     assert result["final_value"] > 0
-    assert result["metrics"]["return_pct"] is not None
\ No newline at end of file
+    assert result["metrics"]["return_pct"] is not None
+
+
+def test_run_backtest_batch_isolates_missing_tickers(db_session, seed_symbol):
+    db_session.add(Symbol(ticker="VALE3.SA", name="Vale"))
+    db_session.add_all(
+        [
+            Price(symbol_id=seed_symbol.id, date=pd.to_datetime("2023-01-02") + pd.Timedelta(days=idx), open=10 + idx, high=11 + idx, low=9 + idx, close=10 + idx, volume=1000)
+            for idx in range(5)
+        ]
+    )
+    db_session.commit()
+
+    results = run_backtest_batch(
+        tickers=["PETR4.SA", "VALE3.SA"],
+        strategy_type="sma_cross",
+        strategy_params={"fast_period": 2, "slow_period": 3},
+        initial_cash=50000.0,
+    )
+
+    assert results["PETR4.SA"]["final_value"] > 0
+    assert "error" in results["VALE3.SA"]
+
+
+def test_run_backtest_with_stored_indicators_matches_recompute(db_session, seed_random_walk):
+    seed_random_walk("PETR4.SA", 160, seed=11, base=20.0, start="2023-01-02", freq="D")
+
+    cases = {
+        "sma_cross": {"fast_period": 5, "slow_period": 15},
+        "donchian_breakout": {"channel_period": 10},
+        "momentum": {"lookback": 10},
+        "ml_momentum": {"lookback": 5, "train_window": 40, "entry_threshold": 0.5, "retrain_every": 5, "solver": "newton"},
+    }
+    for strategy_type, params in cases.items():
+        expected = run_backtest(ticker="PETR4.SA", strategy_type=strategy_type, strategy_params=params)
+        stored = run_backtest(
+            ticker="PETR4.SA", strategy_type=strategy_type, strategy_params=params, use_stored_indicators=True
+        )
+        assert expected["trades"], strategy_type
+        assert stored["trades"] == expected["trades"], strategy_type
+        assert stored["final_value"] == pytest.approx(expected["final_value"], rel=1e-9)
+        vectorized = run_backtest(
+            ticker="PETR4.SA",
+            strategy_type=strategy_type,
+            strategy_params=params,
+            use_stored_indicators=True,
+            engine="vectorized",
+        )
+        assert vectorized["trades"] == stored["trades"], strategy_type
+
+    names = db_session.execute(select(Indicator.name, Indicator.params).distinct()).all()
+    assert ("ATR", "period=14") in names and ("HIGHEST", "period=10") in names
+    assert ("ML_PROB", "lookback=5,train_window=40,retrain_every=5,warm_start=0,solver=newton") in names
+
+
+def test_stored_indicator_runs_are_cached_apart_from_recomputes(db_session, seed_random_walk):
+    seed_random_walk("PETR4.SA", 260, seed=11, start="2023-01-02", freq="D")
+    # Stored series span the full history (ATR smoothing, warm-started ML_PROB), so over a
+    # bounded range they do not match a recompute and must not share its cache entry.
+    kwargs = dict(
+        ticker="PETR4.SA",
+        strategy_type="ml_momentum",
+        strategy_params={"lookback": 5, "train_window": 40, "entry_threshold": 0.5, "retrain_every": 5, "warm_start": True},
+        start="2023-05-01",
+    )
+
+    recomputed = run_backtest_and_save(**kwargs)
+    stored = run_backtest_and_save(**kwargs, use_stored_indicators=True)
+    assert stored["cached"] is False and stored["id"] != recomputed["id"]
+    assert stored["final_value"] == pytest.approx(run_backtest(**kwargs, use_stored_indicators=True)["final_value"])
+    assert stored["final_value"] != pytest.approx(recomputed["final_value"])
+
+    repeat = run_backtest_and_save(**kwargs, use_stored_indicators=True)
+    assert repeat["cached"] is True and repeat["id"] == stored["id"]
+
+
+def test_run_backtest_and_save_reuses_identical_runs(db_session, seed_symbol):
+    prices = [
+        Price(symbol_id=seed_symbol.id, date=pd.to_datetime("2023-01-02") + pd.Timedelta(days=idx), open=10 + idx, high=11 + idx, low=9 + idx, close=10 + idx, volume=1000)
+        for idx in range(8)
+    ]
+    db_session.add_all(prices)
+    db_session.commit()
+    kwargs = dict(ticker="PETR4.SA", strategy_type="sma_cross", strategy_params={"fast_period": 2, "slow_period": 3})
+
+    first = run_backtest_and_save(**kwargs)
+    repeat = run_backtest_and_save(**{**kwargs, "strategy_params": {"slow_period": 3, "fast_period": 2}})
+    assert first["cached"] is False
+    assert repeat["cached"] is True and repeat["id"] == first["id"]
+
+    # A revised bar changes the price fingerprint, so the run is executed again.
+    prices[-1].close = 30
+    db_session.commit()
+    price_cache.invalidate("PETR4.SA")
+    revised = run_backtest_and_save(**kwargs)
+    assert revised["cached"] is False and revised["id"] != first["id"]
+    assert run_backtest_and_save(**kwargs, use_cache=False)["id"] not in (first["id"], revised["id"])
+
+
+def test_stored_results_include_rolling_metrics(db_session, seed_random_walk):
+    seed_random_walk("PETR4.SA", 60, seed=5, start="2023-01-02", freq="D")
+
+    saved = run_backtest_and_save(ticker="PETR4.SA", strategy_type="sma_cross", strategy_params={"fast_period": 3, "slow_period": 8})
+    stored = get_backtest_results(saved["id"], rolling_window=5)
+    rolling = stored["rolling_metrics"]
+    assert rolling and [row["date"] for row in rolling] == [point["date"] for point in stored["equity_curve"]]
+    assert [row["sharpe"] for row in rolling[:4]] == [None] * 4
+    assert all(row["drawdown"] <= 0 for row in rolling)
+
+    # Thinned positions are not daily closes, so downsampled runs have no rolling series.
+    thinned = run_backtest_and_save(
+        ticker="PETR4.SA", strategy_type="sma_cross", strategy_params={"fast_period": 3, "slow_period": 8}, capture="equity_downsampled"
+    )
+    stored = get_backtest_results(thinned["id"], rolling_window=5)
+    assert stored["capture"] == "equity_downsampled" and stored["positions"]
+    assert stored["rolling_metrics"] is None
+
+
+def test_stored_rows_are_paged_streamed_and_selected(db_session, seed_random_walk):
+    seed_random_walk("PETR4.SA", 80, seed=6, start="2023-01-02", freq="D")
+    saved = run_backtest_and_save(ticker="PETR4.SA", strategy_type="sma_cross", strategy_params={"fast_period": 3, "slow_period": 8})
+    full = get_backtest_results(saved["id"])
+    assert full["trades"]
+
+    for kind in ("trades", "positions"):
+        pages, after = [], None
+        while True:
+            page = get_backtest_rows(saved["id"], kind, after=after, limit=7)
+            pages.extend(page["items"])
+            after = page["next_after"]
+            if after is None:
+                break
+        assert pages == full[kind]
+        assert list(iter_backtest_rows(saved["id"], kind, fetch_rows=5)) == full[kind]
+
+    curve = iter_backtest_rows(saved["id"], "positions", fields=["equity", "date"])
+    assert list(curve) == full["equity_curve"]
+
+    metrics_only = get_backtest_results(saved["id"], fields=["metrics"])
+    assert metrics_only["metrics"] == full["metrics"]
+    assert not {"trades", "positions", "equity_curve", "rolling_metrics"} & set(metrics_only)
+
+    with pytest.raises(ValueError, match="fields"):
+        get_backtest_rows(saved["id"], "trades", fields=["equity"])
+    assert get_backtest_rows(saved["id"] + 1, "trades") is None
+    assert iter_backtest_rows(saved["id"] + 1, "positions") is None
+
+
+def test_run_backtest_and_save_coalesces_concurrent_submissions(monkeypatch):
+    import threading
+
+    frame = pd.DataFrame(
+        {"open": [1.0], "high": [1.0], "low": [1.0], "close": [1.0], "volume": [1.0]},
+        index=pd.DatetimeIndex(["2023-01-02"], name="datetime"),
+    )
+    started, release, coalesced, calls = threading.Event(), threading.Event(), threading.Event(), []
+
+    def slow_run(df, **kwargs):
+        calls.append(kwargs["cache_key"])
+        started.set()
+        release.wait(5)
+        return {"id": 1, "cached": False}
+
+    monkeypatch.setattr(backtest_service, "load_price_data_from_db", lambda *args, **kwargs: frame)
+    monkeypatch.setattr(backtest_service, "_find_cached_backtest", lambda *args: None)
+    monkeypatch.setattr(backtest_service, "_run_and_save", slow_run)
+    log_info = backtest_service.logger.info
+
+    def spy_info(event, **kwargs):
+        if event == "backtest.run.coalesced":
+            coalesced.set()
+        return log_info(event, **kwargs)
+
+    monkeypatch.setattr(backtest_service.logger, "info", spy_info)
+
+    kwargs = dict(ticker="PETR4.SA", strategy_type="sma_cross", strategy_params={"fast_period": 2, "slow_period": 3})
+    results = []
+    owner = threading.Thread(target=lambda: results.append(run_backtest_and_save(**kwargs)))
+    owner.start()
+    started.wait(5)
+    waiter = threading.Thread(target=lambda: results.append(run_backtest_and_save(**kwargs)))
+    waiter.start()
+    # The second submission holds the first one's future before the run is released.
+    assert coalesced.wait(5)
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+
+    assert len(calls) == 1
+    assert sorted(result["cached"] for result in results) == [False, True]
+    assert not backtest_service._inflight
+
+
+def test_low_memory_run_streams_rows_and_matches_the_loaded_run(db_session, seed_random_walk, monkeypatch):
+    monkeypatch.setattr(backtest_service.settings, "LOW_MEMORY_FETCH_ROWS", 100)
+    seed_random_walk("PETR4.SA", 700, seed=3, base=20.0, drift=0.0003, start="2015-01-02", freq="D")
+
+    cases = {
+        "sma_cross": {"fast_period": 5, "slow_period": 15},
+        "donchian_breakout": {"channel_period": 10},
+        "ml_momentum": {"lookback": 5, "train_window": 40, "entry_threshold": 0.5, "exit_threshold": 0.45},
+    }
+    for strategy_type, params in cases.items():
+        kwargs = dict(ticker="PETR4.SA", strategy_type=strategy_type, strategy_params=params)
+        expected = run_backtest(**kwargs)
+        streamed = run_backtest(**kwargs, low_memory=True, analyzers=False)
+        assert expected["trades"], strategy_type
+        for key in ("final_value", "metrics", "trades", "positions"):
+            assert streamed[key] == expected[key], (strategy_type, key)
+        assert streamed["peak_rss_mb"] is None or streamed["peak_rss_mb"] > 0
+
+    # By default the analyzers stand in for the unrecorded value series.
+    analyzed = run_backtest(**kwargs, low_memory=True)
+    assert {name: analyzed["metrics"][name] for name in ("sharpe", "max_drawdown", "win_rate")} == {
+        name: expected["metrics"][name] for name in ("sharpe", "max_drawdown", "win_rate")
+    }
+    assert analyzed["metrics"]["sortino"] is None
+
+    thinned = run_backtest(**kwargs, low_memory=True, capture="equity_downsampled", analyzers=False)
+    assert thinned["metrics"] == expected["metrics"]
+    assert 250 <= len(thinned["positions"]) <= 501
+    assert thinned["positions"][0] == expected["positions"][0]
+    assert thinned["positions"][-1] == expected["positions"][-1]
+
+    with pytest.raises(ValueError, match="low_memory"):
+        run_backtest(**kwargs, low_memory=True, engine="vectorized")
+    with pytest.raises(ValueError, match="Nenhum dado"):
+        run_backtest(**kwargs, start="2030-01-01", low_memory=True)
+
+
+def test_rss_sampler_reports_the_peak_inside_the_block(monkeypatch):
+    rss = {"mb": 900.0}
+    monkeypatch.setattr(backtest_service, "_current_rss_mb", lambda: rss["mb"])
+
+    rss["mb"] = 100.0  # the earlier 900 MB is not this block's
+    with backtest_service._RssSampler(interval=0.001) as sampler:
+        rss["mb"] = 500.0
+        deadline = time.monotonic() + 5
+        while sampler.peak_mb != 500.0 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        rss["mb"] = 200.0
+    assert sampler.peak_mb == 500.0
+
+    monkeypatch.setattr(backtest_service, "_current_rss_mb", lambda: None)
+    with backtest_service._RssSampler(interval=0.001) as sampler:
+        pass
+    assert sampler.peak_mb is None
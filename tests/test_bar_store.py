@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from app.db.models.price import Price
+from app.services.backtest_service import load_price_data_from_db, run_backtest
+from app.services.bar_store import _month_starts, ensure_bar_partitions
+from app.services.data_collector import update_prices_for_ticker
+
+
+def _minute_download(n=120, start="2023-01-31 15:00"):
+    closes = 10 + np.sin(np.arange(n) / 5.0) + np.arange(n) * 0.01
+    return pd.DataFrame(
+        {"Open": closes, "High": closes + 0.05, "Low": closes - 0.05, "Close": closes, "Volume": 100},
+        index=pd.date_range(start, periods=n, freq="5min"),
+    )
+
+
+def test_intraday_ingest_goes_to_bars_and_keeps_daily_path(mocker, db_session, seed_symbol):
+    mocker.patch("app.services.data_collector.fetch_prices_yf", return_value=_minute_download())
+
+    first = update_prices_for_ticker("PETR4.SA", interval="5m", db=db_session)
+    second = update_prices_for_ticker("PETR4.SA", interval="5m", db=db_session)
+
+    assert first["inserted"] == 120
+    assert (second["inserted"], second["skipped"]) == (0, 120)
+    assert db_session.query(Price).count() == 0
+
+    df = load_price_data_from_db("PETR4.SA", start="2023-01-31", end="2023-01-31", interval="5m")
+    assert len(df) == 108
+    assert df.index[1] - df.index[0] == pd.Timedelta(minutes=5)
+
+
+def test_run_backtest_on_intraday_bars(mocker, db_session, seed_symbol):
+    mocker.patch("app.services.data_collector.fetch_prices_yf", return_value=_minute_download())
+    update_prices_for_ticker("PETR4.SA", interval="5m", db=db_session)
+
+    result = run_backtest(
+        ticker="PETR4.SA",
+        strategy_type="sma_cross",
+        strategy_params={"fast_period": 3, "slow_period": 8, "atr_period": 5},
+        timeframe="5m",
+        initial_cash=10000.0,
+    )
+
+    assert result["timeframe"] == "5m"
+    assert result["final_value"] > 0
+
+
+def test_partitions_are_monthly_and_postgres_only(db_session):
+    months = _month_starts(pd.Timestamp("2023-01-31 23:00"), pd.Timestamp("2023-03-01"))
+    assert [m.strftime("%Y-%m") for m in months] == ["2023-01", "2023-02", "2023-03"]
+    assert ensure_bar_partitions(db_session, months[0], months[-1]) == 0
@@ -0,0 +1,108 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import select
+
+import app.db.bulk as bulk
+from app.db.bulk import _rows_to_csv, bulk_insert_ignore_duplicates
+from app.db.models.price import Price
+
+
+def _rows(symbol_id, n, offset=0):
+    return [
+        {
+            "symbol_id": symbol_id,
+            "date": (pd.Timestamp("2023-01-02") + pd.Timedelta(days=offset + idx)).date(),
+            "open": 1.0,
+            "high": 2.0,
+            "low": 0.5,
+            "close": 1.5,
+            "volume": None,
+        }
+        for idx in range(n)
+    ]
+
+
+def test_bulk_insert_chunks_and_counts_duplicates(monkeypatch, db_session, seed_symbol):
+    # 7 columns per row -> 3 rows per statement with a 21-parameter budget.
+    monkeypatch.setattr(bulk, "SQLITE_MAX_BIND_PARAMS", 21)
+    first = bulk_insert_ignore_duplicates(db_session, Price.__table__, _rows(seed_symbol.id, 8), ["symbol_id", "date"])
+    db_session.commit()
+
+    second = bulk_insert_ignore_duplicates(
+        db_session, Price.__table__, _rows(seed_symbol.id, 8, offset=5), ["symbol_id", "date"]
+    )
+    db_session.commit()
+
+    assert (first.inserted, first.skipped) == (8, 0)
+    assert (second.inserted, second.skipped) == (5, 3)
+    assert len(db_session.execute(select(Price.id)).all()) == 13
+
+
+def test_rows_to_csv_encodes_nulls_dates_and_nan():
+    buffer = _rows_to_csv(
+        [{"date": date(2023, 1, 2), "close": 1.25, "volume": None, "open": float("nan")}],
+        ["date", "close", "volume", "open"],
+    )
+    assert buffer.read() == "2023-01-02,1.25,,NaN\n"
+
+
+class _FakeCursor:
+    def __init__(self, fail_on=None):
+        self.statements = []
+        self.rowcount = -1
+        self.fail_on = fail_on
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        self.statements.append(sql)
+        if self.fail_on and sql.startswith(self.fail_on):
+            raise RuntimeError("duplicate key")
+        self.rowcount = 2 if sql.startswith("INSERT") else -1
+
+    def copy_expert(self, sql, buffer):
+        self.statements.append(sql)
+        self.copied = buffer.read()
+
+
+def _fake_db(cursor):
+    class _Raw:
+        def cursor(self):
+            return cursor
+
+    class _Conn:
+        connection = type("Pool", (), {"driver_connection": _Raw()})()
+
+    class _Db:
+        def connection(self):
+            return _Conn()
+
+    return _Db()
+
+
+def test_copy_path_stages_and_inserts_per_chunk(db_session, seed_symbol):
+    cursor = _FakeCursor()
+
+    inserted = bulk._copy_insert(_fake_db(cursor), Price.__table__, _rows(1, 3), ["symbol_id", "date"], chunk_rows=2)
+
+    kinds = [sql.split()[0] for sql in cursor.statements]
+    assert kinds == ["CREATE", "COPY", "INSERT", "TRUNCATE", "COPY", "INSERT", "TRUNCATE", "DROP"]
+    assert "ON COMMIT DROP" in cursor.statements[0]
+    assert "ON CONFLICT (symbol_id, date) DO NOTHING" in cursor.statements[2]
+    assert inserted == 4
+
+
+def test_copy_path_failure_raises_the_original_error(db_session, seed_symbol):
+    cursor = _FakeCursor(fail_on="INSERT")
+
+    with pytest.raises(RuntimeError, match="duplicate key"):
+        bulk._copy_insert(_fake_db(cursor), Price.__table__, _rows(1, 3), ["symbol_id", "date"], chunk_rows=2)
+
+    # Nothing runs in the aborted transaction after the failing statement.
+    assert cursor.statements[-1].startswith("INSERT")
@@ -1,4 +1,10 @@
+import math
+
+import numpy as np
 import pandas as pd
+from sqlalchemy import select
+
+from app.db.models.price import Price
 from app.services.data_collector import _prepare_rows_for_insert, update_prices_for_ticker
 
 
@@ -20,6 +26,62 @@ def test_prepare_rows_for_insert(seed_symbol):
     assert rows[1]["close"] == 12.0
 
 
+def _legacy_prepare_rows(df, symbol_id):
+    rows = []
+    for ts, row in df.iterrows():
+        def safe_float(value):
+            try:
+                if hasattr(value, "iloc"):
+                    return float(value.iloc[0])
+                return float(value)
+            except Exception:
+                return None
+
+        rows.append(
+            {
+                "symbol_id": symbol_id,
+                "date": ts.date(),
+                "open": safe_float(row.get("Open")),
+                "high": safe_float(row.get("High")),
+                "low": safe_float(row.get("Low")),
+                "close": safe_float(row.get("Close")),
+                "volume": safe_float(row.get("Volume")),
+            }
+        )
+    return rows
+
+
+def test_prepare_rows_matches_iterrows_version():
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame(
+        rng.uniform(1, 100, size=(50, 5)),
+        columns=["Open", "High", "Low", "Close", "Volume"],
+        index=pd.date_range("2023-01-02", periods=50, freq="h"),
+    )
+    df["Volume"] = df["Volume"].astype(int)
+    df["Close"] = df["Close"].astype(object)
+    df.loc[df.index[3], "Close"] = "n/a"
+
+    assert _prepare_rows_for_insert(df, symbol_id=7) == _legacy_prepare_rows(df, symbol_id=7)
+
+
+def test_prepare_rows_handles_missing_and_duplicated_columns():
+    df = pd.DataFrame(
+        [[10.0, 10.5, 11.0, float("nan")], [11.0, 11.5, 12.0, 1.0]],
+        columns=["Open", "Open", "High", "Close"],
+        index=pd.to_datetime(["2023-01-02", "2023-01-03"]),
+    )
+
+    rows = _prepare_rows_for_insert(df, symbol_id=1)
+    legacy = _legacy_prepare_rows(df, symbol_id=1)
+
+    assert [r["open"] for r in rows] == [r["open"] for r in legacy] == [10.0, 11.0]
+    assert rows[0]["low"] is None and rows[0]["volume"] is None
+    # NaN used to leak through as float('nan'); it is now stored as NULL.
+    assert math.isnan(legacy[0]["close"])
+    assert rows[0]["close"] is None
+
+
 def test_update_prices_for_ticker_with_mock(mocker, db_session, seed_symbol):
     mock_df = pd.DataFrame(
         {
@@ -37,4 +99,66 @@ def test_update_prices_for_ticker_with_mock(mocker, db_session, seed_symbol):
     result = update_prices_for_ticker("PETR4.SA", db=db_session)
     assert result["inserted"] == 2
     assert result["skipped"] == 0
-    assert result["message"] == "Precos atualizados com sucesso."
\ No newline at end of file
+    assert result["message"] == "Precos atualizados com sucesso."
+
+
+def test_update_prices_incremental_uses_watermark_and_revises(mocker, db_session, seed_symbol):
+    db_session.add_all(
+        [
+            Price(symbol_id=seed_symbol.id, date=pd.to_datetime("2023-01-09"), open=10, high=11, low=9, close=10, volume=1000),
+            Price(symbol_id=seed_symbol.id, date=pd.to_datetime("2023-01-10"), open=11, high=12, low=10, close=11, volume=1100),
+        ]
+    )
+    db_session.commit()
+
+    mock_df = pd.DataFrame(
+        {
+            "Open": [10.0, 11.0, 12.0],
+            "High": [11.0, 12.0, 13.0],
+            "Low": [9.0, 10.0, 11.0],
+            "Close": [10.0, 11.5, 12.0],
+            "Volume": [1000, 1100, 1200],
+        },
+        index=pd.to_datetime(["2023-01-09", "2023-01-10", "2023-01-11"]),
+    )
+    fetch = mocker.patch("app.services.data_collector.fetch_prices_yf", return_value=mock_df)
+
+    result = update_prices_for_ticker("PETR4.SA", db=db_session, incremental=True)
+
+    assert fetch.call_args.kwargs["start"] == "2023-01-05"
+    assert result["inserted"] == 1
+    assert result["revised"] == 1
+    assert result["skipped"] == 1
+    closes = db_session.execute(select(Price.close).order_by(Price.date)).scalars().all()
+    assert closes == [10.0, 11.5, 12.0]
+
+
+def test_revised_close_refreshes_stored_indicators(mocker, db_session, seed_symbol):
+    from app.indicators import IndicatorSpec, atr, sma
+    from app.services.indicator_service import load_indicator_frame
+
+    days = pd.bdate_range("2023-01-02", periods=30)
+    closes = 10 + np.arange(30, dtype=float)
+    db_session.add_all(
+        Price(symbol_id=seed_symbol.id, date=day, open=c, high=c + 1, low=c - 1, close=c, volume=1000)
+        for day, c in zip(days, closes)
+    )
+    db_session.commit()
+    specs = [IndicatorSpec("SMA", 5), IndicatorSpec("ATR", 3)]
+    load_indicator_frame("PETR4.SA", specs, db=db_session)
+
+    # The overlap refresh revises the close of the fourth-to-last bar.
+    revised = closes.copy()
+    revised[-4] += 5.0
+    tail = slice(25, 30)
+    mock_df = pd.DataFrame(
+        {"Open": closes[tail], "High": closes[tail] + 1, "Low": closes[tail] - 1, "Close": revised[tail], "Volume": 1000},
+        index=days[tail],
+    )
+    mocker.patch("app.services.data_collector.fetch_prices_yf", return_value=mock_df)
+    assert update_prices_for_ticker("PETR4.SA", db=db_session, incremental=True)["revised"] == 1
+
+    frame = load_indicator_frame("PETR4.SA", specs, db=db_session)
+    expected = pd.DataFrame({"sma_5": sma(revised, 5), "atr_3": atr(closes + 1, closes - 1, revised, 3)}, index=days)
+    np.testing.assert_allclose(frame.to_numpy(), expected.reindex(frame.index).to_numpy())
+    assert frame["sma_5"].notna().sum() == 26
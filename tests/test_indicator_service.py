@@ -1,5 +1,13 @@
+import numpy as np
 import pandas as pd
-from app.services.indicator_service import calculate_sma, update_sma_for_ticker
+import pytest
+from sqlalchemy import select
+
+import app.indicators as ind
+from app.indicators import IndicatorSpec, parse_indicator_specs
+from app.services.indicator_service import calculate_sma, update_indicators_for_ticker, update_sma_for_ticker
+from app.db.models.indicator import Indicator
+from app.ml.logistic_signal import MomentumProbabilitySpec
 from app.db.models.price import Price
 
 
@@ -30,4 +38,99 @@ def test_update_sma_for_ticker(db_session, seed_symbol):
 
     result = update_sma_for_ticker("PETR4.SA", window=3, db=db_session)
     assert result["inserted"] > 0
-    assert "SMA atualizado com sucesso." in result["message"]
\ No newline at end of file
+    assert "SMA atualizado com sucesso." in result["message"]
+
+def test_update_sma_incremental_computes_only_new_bars(db_session, seed_symbol):
+    closes = [10, 11, 12, 13, 14, 15, 16]
+    dates = pd.date_range("2023-01-02", periods=len(closes), freq="D")
+    db_session.add_all(
+        [
+            Price(symbol_id=seed_symbol.id, date=d, open=c, high=c, low=c, close=c, volume=1)
+            for d, c in zip(dates[:5], closes[:5])
+        ]
+    )
+    db_session.commit()
+    assert update_sma_for_ticker("PETR4.SA", window=3, db=db_session)["inserted"] == 3
+
+    db_session.add_all(
+        [
+            Price(symbol_id=seed_symbol.id, date=d, open=c, high=c, low=c, close=c, volume=1)
+            for d, c in zip(dates[5:], closes[5:])
+        ]
+    )
+    db_session.commit()
+    result = update_sma_for_ticker("PETR4.SA", window=3, db=db_session)
+
+    assert (result["inserted"], result["skipped"]) == (2, 0)
+    values = db_session.execute(select(Indicator.value).order_by(Indicator.date)).scalars().all()
+    full = calculate_sma(pd.DataFrame({"close": closes}), window=3).dropna().tolist()
+    assert values == full
+    assert update_sma_for_ticker("PETR4.SA", window=3, db=db_session)["inserted"] == 0
+
+
+def test_update_indicators_incremental_matches_full_recompute(db_session, seed_symbol):
+    rng = np.random.default_rng(3)
+    closes = 20 + np.cumsum(rng.normal(0, 0.5, 40))
+    dates = pd.date_range("2023-01-02", periods=len(closes), freq="D")
+    bars = [
+        Price(symbol_id=seed_symbol.id, date=d, open=c, high=c + 0.4, low=c - 0.3, close=c, volume=1)
+        for d, c in zip(dates, closes.tolist())
+    ]
+    specs = parse_indicator_specs("SMA:5,EMA:4,ATR:3,HIGHEST:6,LOWEST:6,ROC:3,LOGRET:1")
+
+    db_session.add_all(bars[:25])
+    db_session.commit()
+    update_indicators_for_ticker("PETR4.SA", specs, db=db_session)
+    db_session.add_all(bars[25:])
+    db_session.commit()
+    result = update_indicators_for_ticker("PETR4.SA", specs, db=db_session)
+    assert result["skipped"] == 0
+
+    stored = pd.DataFrame(
+        db_session.execute(select(Indicator.date, Indicator.name, Indicator.value)).all(),
+        columns=["date", "name", "value"],
+    ).pivot(index="date", columns="name", values="value")
+    highs, lows = closes + 0.4, closes - 0.3
+    expected = {
+        "SMA": ind.sma(closes, 5),
+        "EMA": ind.ema(closes, 4),
+        "ATR": ind.atr(highs, lows, closes, 3),
+        "HIGHEST": ind.rolling_max(highs, 6),
+        "LOWEST": ind.rolling_min(lows, 6),
+        "ROC": ind.roc_percent(closes, 3),
+        "LOGRET": ind.log_returns(closes),
+    }
+    for name, values in expected.items():
+        np.testing.assert_allclose(stored[name].dropna().to_numpy(), values[~np.isnan(values)], rtol=1e-12)
+
+
+@pytest.mark.parametrize("retrain_every", [1, 4])
+def test_update_ml_probabilities_incremental_matches_full_recompute(db_session, seed_symbol, retrain_every):
+    closes = 20 * np.exp(np.cumsum(np.random.default_rng(5).normal(0, 0.02, 90)))
+    dates = pd.date_range("2023-01-02", periods=len(closes), freq="D")
+    bars = [
+        Price(symbol_id=seed_symbol.id, date=d, open=c, high=c, low=c, close=c, volume=1)
+        for d, c in zip(dates, closes.tolist())
+    ]
+    spec = MomentumProbabilitySpec(4, 30, retrain_every, solver="newton")
+
+    db_session.add_all(bars[:50])
+    db_session.commit()
+    assert update_indicators_for_ticker("PETR4.SA", [spec], db=db_session)["inserted"] == 50 - spec.first_valid
+    db_session.add_all(bars[50:])
+    db_session.commit()
+    assert update_indicators_for_ticker("PETR4.SA", [spec], db=db_session)["inserted"] == 40
+
+    values = db_session.execute(
+        select(Indicator.value).where(Indicator.name == "ML_PROB").order_by(Indicator.date)
+    ).scalars().all()
+    expected = spec.compute({"close": closes})
+    np.testing.assert_allclose(values, expected[spec.first_valid :], rtol=1e-12)
+
+
+def test_parse_indicator_specs_rejects_unknown_names():
+    assert parse_indicator_specs("sma:20, ATR:14,SMA:20") == [IndicatorSpec("SMA", 20), IndicatorSpec("ATR", 14)]
+    with pytest.raises(ValueError, match="nao suportado"):
+        parse_indicator_specs("RSI:14")
+    with pytest.raises(ValueError, match="Formato"):
+        parse_indicator_specs("SMA")
@@ -0,0 +1,78 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.indicators import atr, ema, log_returns, roc_percent, rolling_max, rolling_min, sma
+
+
+def _ohlc(n=300, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    high = close * (1 + rng.uniform(0, 0.02, n))
+    low = close * (1 - rng.uniform(0, 0.02, n))
+    return pd.DataFrame(
+        {"open": close, "high": high, "low": low, "close": close, "volume": 1000.0},
+        index=pd.date_range("2020-01-01", periods=n, freq="D"),
+    )
+
+
+class _Collect(bt.Strategy):
+    def __init__(self):
+        d = self.datas[0]
+        self.inds = {
+            "sma": bt.ind.SMA(d.close, period=20),
+            "ema": bt.ind.EMA(d.close, period=12),
+            "atr": bt.ind.ATR(d, period=14),
+            "highest": bt.ind.Highest(d.high, period=20),
+            "lowest": bt.ind.Lowest(d.low, period=7),
+            "roc": bt.ind.RateOfChange100(d.close, period=10),
+        }
+
+
+def _backtrader_values(df):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(bt.feeds.PandasData(dataname=df))
+    cerebro.addstrategy(_Collect)
+    strat = cerebro.run()[0]
+    return {name: np.array(ind.lines[0].array, dtype=float) for name, ind in strat.inds.items()}
+
+
+def test_indicators_match_backtrader():
+    df = _ohlc()
+    expected = _backtrader_values(df)
+    h, l, c = df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy()
+
+    ours = {
+        "sma": sma(c, 20),
+        "ema": ema(c, 12),
+        "atr": atr(h, l, c, 14),
+        "highest": rolling_max(h, 20),
+        "lowest": rolling_min(l, 7),
+        "roc": roc_percent(c, 10),
+    }
+    for name, values in ours.items():
+        np.testing.assert_allclose(values, expected[name], rtol=1e-9, equal_nan=True, err_msg=name)
+
+
+@pytest.mark.parametrize("period", [1, 2, 5, 13])
+def test_rolling_extremes_match_naive_windows(period):
+    values = np.random.default_rng(period).normal(size=50)
+    naive_max = [np.nan] * (period - 1) + [values[i - period + 1 : i + 1].max() for i in range(period - 1, 50)]
+    naive_min = [np.nan] * (period - 1) + [values[i - period + 1 : i + 1].min() for i in range(period - 1, 50)]
+    np.testing.assert_array_equal(rolling_max(values, period), naive_max)
+    np.testing.assert_array_equal(rolling_min(values, period), naive_min)
+
+
+def test_seeded_recursions_continue_full_history():
+    df = _ohlc(n=120)
+    h, l, c = df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy()
+    full_ema = ema(c, 10)
+    full_atr = atr(h, l, c, 14)
+
+    np.testing.assert_allclose(ema(c[80:], 10, seed=full_ema[79]), full_ema[80:], rtol=1e-12)
+    np.testing.assert_allclose(atr(h[79:], l[79:], c[79:], 14, seed=full_atr[79]), full_atr[79:], rtol=1e-12)
+
+
+def test_log_returns():
+    np.testing.assert_allclose(log_returns([1.0, np.e, 1.0]), [np.nan, 1.0, -1.0], equal_nan=True)
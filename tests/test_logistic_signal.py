@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from app.ml.logistic_signal import (
+    fit_logistic,
+    fit_logistic_gd_batch,
+    fit_logistic_newton,
+    fit_logistic_newton_batch,
+    momentum_training_set,
+)
+
+
+def _problem(seed, rows=200):
+    rng = np.random.default_rng(seed)
+    features = rng.normal(size=(rows, 4))
+    labels = (features @ np.array([1.0, -0.5, 0.3, 0.0]) + rng.normal(size=rows) > 0).astype(np.float64)
+    return features, labels
+
+
+def test_newton_reaches_the_gradient_descent_optimum():
+    features, labels = _problem(0)
+    gd_coeffs, gd_bias = fit_logistic(features, labels, lr=0.5, epochs=20000)
+    coeffs, bias = fit_logistic_newton(features, labels)
+    np.testing.assert_allclose(coeffs, gd_coeffs, atol=1e-8)
+    assert bias == pytest.approx(gd_bias, abs=1e-8)
+
+    # Warm-started at the optimum, one step is enough and nothing moves.
+    again = fit_logistic_newton(features, labels, initial=(coeffs, bias))
+    np.testing.assert_allclose(again[0], coeffs, atol=1e-12)
+
+
+def test_batched_fit_matches_one_fit_per_window():
+    log_returns = np.random.default_rng(1).normal(0, 0.01, 400)
+    windows = [momentum_training_set(log_returns[first:], 5, 60) for first in range(0, 300, 9)]
+    features, labels = np.stack([f for f, _ in windows]), np.stack([l for _, l in windows])
+
+    for batched, single in ((fit_logistic_newton_batch, fit_logistic_newton), (fit_logistic_gd_batch, fit_logistic)):
+        coeffs, bias = batched(features, labels)
+        for row, window in enumerate(windows):
+            expected = single(*window)
+            # The batched matmul may round differently from the 2-D one, depending on the BLAS build.
+            np.testing.assert_allclose(coeffs[row], expected[0], rtol=1e-12, atol=1e-14)
+            assert bias[row] == pytest.approx(expected[1], rel=1e-12, abs=1e-14)
+
+    with pytest.raises(ValueError, match="3-D"):
+        fit_logistic_newton_batch(windows[0][0], windows[0][1])
@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.metrics import max_drawdown_duration, performance_metrics, rolling_metrics, rolling_sharpe
+
+
+def _series():
+    # Two bars per day for the first two days: only the last one of each day counts.
+    dates = np.array(
+        ["2024-01-01T10", "2024-01-01T16", "2024-01-02T10", "2024-01-02T16", "2024-01-03T16", "2025-01-02T16"],
+        dtype="datetime64[h]",
+    )
+    values = np.array([100.0, 110.0, 90.0, 99.0, 121.0, 121.0])
+    trades = [
+        {"date": np.datetime64("2024-01-01").astype(object), "operation": "buy", "price": 10.0, "size": 5.0, "pnl": None},
+        {"date": np.datetime64("2024-01-02").astype(object), "operation": "sell", "price": 8.0, "size": -5.0, "pnl": -10.0},
+        {"date": np.datetime64("2024-01-03").astype(object), "operation": "buy", "price": 11.0, "size": 5.0, "pnl": None},
+        {"date": np.datetime64("2025-01-02").astype(object), "operation": "sell", "price": 15.0, "size": -5.0, "pnl": 20.0},
+    ]
+    return dates, values, trades
+
+
+def test_performance_metrics_on_a_hand_checked_series():
+    dates, values, trades = _series()
+    metrics = performance_metrics(100.0, 121.0, dates, values, trades)
+
+    returns = np.array([0.1, -0.1, 121.0 / 99.0 - 1.0, 0.0])
+    assert metrics["return_pct"] == pytest.approx(0.21)
+    assert metrics["sharpe"] == pytest.approx(returns.mean() / returns.std())
+    assert metrics["sortino"] == pytest.approx(returns.mean() / math.sqrt(0.01 / 4))
+    assert metrics["volatility"] == pytest.approx(returns.std() * math.sqrt(252))
+    assert metrics["max_drawdown"] == pytest.approx(90.0 / 110.0 - 1.0)
+    assert metrics["max_drawdown_days"] == 1
+    assert metrics["cagr"] == pytest.approx(1.21 ** (365.25 / 367) - 1.0)
+    assert metrics["calmar"] == pytest.approx(metrics["cagr"] / (1.0 - 90.0 / 110.0))
+    assert (metrics["closed_trades"], metrics["win_rate"], metrics["profit_factor"]) == (2, 0.5, 2.0)
+    # Held at the end of 2024-01-01 and 2024-01-03, flat after the last sell.
+    assert metrics["exposure"] == pytest.approx(0.5)
+    assert metrics["turnover"] == pytest.approx((50 + 40 + 55 + 75) / np.mean([110.0, 99.0, 121.0, 121.0]))
+
+
+def test_performance_metrics_without_series_or_trades():
+    metrics = performance_metrics(100.0, 90.0)
+    assert metrics["return_pct"] == pytest.approx(-0.1)
+    assert all(value is None for name, value in metrics.items() if name not in ("return_pct", "closed_trades"))
+
+
+def test_rolling_series():
+    assert max_drawdown_duration(np.array([1.0, 2.0, 1.5, 1.8, 2.5, 2.0, 2.5])) == 2
+    np.testing.assert_allclose(rolling_sharpe(np.array([0.1, 0.3, 0.2, 0.2]), 2), [np.nan, 2.0, 5.0, np.nan])
+
+    dates, values, _ = _series()
+    rows = rolling_metrics(dates, values, 100.0, window=2)
+    assert [row["date"].isoformat() for row in rows] == ["2024-01-01", "2024-01-02", "2024-01-03", "2025-01-02"]
+    assert rows[0]["sharpe"] is None and rows[1]["sharpe"] == pytest.approx(0.0)
+    assert [row["drawdown"] for row in rows][:2] == [0.0, pytest.approx(-0.1)]
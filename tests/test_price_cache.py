@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+from app.db.models.backtest import Backtest
+from app.db.models.price import Price
+from app.db.models.symbol import Symbol
+from app.services.backtest_service import load_price_data_from_db, warm_up_price_cache
+from app.services.data_collector import update_prices_for_ticker
+from app.services.price_cache import PriceCache, price_cache
+from app.services.price_loader import PriceArrays
+
+
+def _arrays(n=3):
+    dates = np.arange(np.datetime64("2023-01-02"), np.datetime64("2023-01-02") + n)
+    values = np.arange(n * 5, dtype=float).reshape(n, 5)
+    return PriceArrays(dates=dates, values=values)
+
+
+def _seed_prices(db_session, symbol_id):
+    db_session.add_all(
+        [
+            Price(symbol_id=symbol_id, date=pd.to_datetime("2023-01-02"), open=10, high=11, low=9, close=10, volume=1000),
+            Price(symbol_id=symbol_id, date=pd.to_datetime("2023-01-03"), open=11, high=12, low=10, close=11, volume=1200),
+            Price(symbol_id=symbol_id, date=pd.to_datetime("2023-01-04"), open=12, high=13, low=11, close=12, volume=1300),
+        ]
+    )
+    db_session.commit()
+
+
+def test_price_cache_lru_eviction_and_counters():
+    cache = PriceCache(max_symbols=2)
+    cache.put("A", _arrays())
+    cache.put("B", _arrays())
+    assert cache.get("A") is not None
+    cache.put("C", _arrays())
+
+    assert cache.get("B") is None
+    stats = cache.stats()
+    assert stats["tickers"] == ["A", "C"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_price_cache_drops_a_load_invalidated_while_running():
+    cache = PriceCache(max_symbols=2)
+
+    def loader_racing_an_ingest(ticker):
+        arrays = _arrays()
+        cache.invalidate(ticker)  # new prices committed after this load read the table
+        return arrays
+
+    assert len(cache.get_or_load("A", loader_racing_an_ingest)) == 3
+    assert cache.get("A") is None
+
+    cache.get_or_load("A", lambda ticker: _arrays(n=4))
+    assert len(cache.get("A")) == 4
+
+
+def test_price_arrays_slice_is_inclusive():
+    arrays = _arrays(n=5).slice("2023-01-03", "2023-01-05")
+    assert len(arrays) == 3
+    assert arrays.values[0, 0] == 5.0
+
+
+def test_load_price_data_uses_cache_and_ingest_invalidates(mocker, db_session, seed_symbol):
+    _seed_prices(db_session, seed_symbol.id)
+
+    first = load_price_data_from_db("PETR4.SA", "2023-01-03", "2023-01-04")
+    second = load_price_data_from_db("PETR4.SA", start="2023-01-02")
+    assert len(first) == 2
+    assert len(second) == 3
+    assert price_cache.stats()["hits"] == 1
+
+    mock_df = pd.DataFrame(
+        {"Open": [13.0], "High": [14.0], "Low": [12.0], "Close": [13.0], "Volume": [900]},
+        index=pd.to_datetime(["2023-01-05"]),
+    )
+    mocker.patch("app.services.data_collector.fetch_prices_yf", return_value=mock_df)
+    update_prices_for_ticker("PETR4.SA", db=db_session)
+
+    assert price_cache.stats()["invalidations"] == 1
+    assert len(load_price_data_from_db("PETR4.SA")) == 4
+
+
+def test_warm_up_price_cache_loads_most_used(db_session, seed_symbol):
+    _seed_prices(db_session, seed_symbol.id)
+    db_session.add(Symbol(ticker="VALE3.SA", name="Vale"))
+    db_session.add_all(
+        [
+            Backtest(ticker="PETR4.SA", strategy_type="sma_cross", initial_cash=1000.0),
+            Backtest(ticker="PETR4.SA", strategy_type="momentum", initial_cash=1000.0),
+            Backtest(ticker="VALE3.SA", strategy_type="sma_cross", initial_cash=1000.0),
+        ]
+    )
+    db_session.commit()
+
+    loaded = warm_up_price_cache(top_n=1)
+
+    assert loaded == ["PETR4.SA"]
+    assert price_cache.stats()["tickers"] == ["PETR4.SA"]
@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+from sqlalchemy import select
+
+from app.db.models.price import Price
+from app.db.models.symbol import Symbol
+from app.services.price_loader import load_price_arrays, load_price_arrays_batch, load_price_frame
+
+
+def _seed_prices(db_session, symbol_id):
+    prices = [
+        Price(symbol_id=symbol_id, date=pd.to_datetime("2023-01-02"), open=10, high=11, low=9, close=10, volume=1000),
+        Price(symbol_id=symbol_id, date=pd.to_datetime("2023-01-03"), open=11, high=12, low=10, close=11, volume=1200),
+        Price(symbol_id=symbol_id, date=pd.to_datetime("2023-01-04"), open=None, high=13, low=11, close=12, volume=1300),
+        Price(symbol_id=symbol_id, date=pd.to_datetime("2023-01-05"), open=13, high=14, low=12, close=13, volume=1500),
+    ]
+    db_session.add_all(prices)
+    db_session.commit()
+
+
+def _legacy_frame(db_session, symbol_id, start=None, end=None):
+    query = select(Price).where(Price.symbol_id == symbol_id).order_by(Price.date.asc())
+    if start:
+        query = query.where(Price.date >= start)
+    if end:
+        query = query.where(Price.date <= end)
+    prices = db_session.execute(query).scalars().all()
+    df = pd.DataFrame(
+        [
+            {"datetime": p.date, "open": p.open, "high": p.high, "low": p.low, "close": p.close, "volume": p.volume}
+            for p in prices
+        ]
+    )
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    df.set_index("datetime", inplace=True)
+    return df
+
+
+def test_load_price_frame_matches_orm_path(db_session, seed_symbol):
+    _seed_prices(db_session, seed_symbol.id)
+
+    expected = _legacy_frame(db_session, seed_symbol.id, "2023-01-03", "2023-01-05")
+    df = load_price_frame("PETR4.SA", "2023-01-03", "2023-01-05", db=db_session)
+
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_load_price_arrays_selects_columns(db_session, seed_symbol):
+    _seed_prices(db_session, seed_symbol.id)
+
+    arrays = load_price_arrays("PETR4.SA", columns=("high", "close"), db=db_session)
+
+    assert len(arrays) == 4
+    assert arrays.values.shape == (4, 2)
+    assert arrays.column("close").tolist() == [10.0, 11.0, 12.0, 13.0]
+    assert list(arrays.to_frame().columns) == ["high", "close"]
+
+
+def test_load_price_arrays_errors(db_session, seed_symbol):
+    with pytest.raises(ValueError, match="nao encontrado"):
+        load_price_arrays("XXXX3.SA", db=db_session)
+    with pytest.raises(ValueError, match="Nenhum dado"):
+        load_price_arrays("PETR4.SA", db=db_session)
+    with pytest.raises(ValueError, match="Colunas"):
+        load_price_arrays("PETR4.SA", columns=("adj_close",), db=db_session)
+
+
+def test_load_price_arrays_batch_splits_per_ticker(db_session, seed_symbol):
+    _seed_prices(db_session, seed_symbol.id)
+    other = Symbol(ticker="VALE3.SA", name="Vale")
+    empty = Symbol(ticker="ITUB4.SA", name="Itau")
+    db_session.add_all([other, empty])
+    db_session.commit()
+    db_session.add(Price(symbol_id=other.id, date=pd.to_datetime("2023-01-03"), open=70, high=71, low=69, close=70, volume=10))
+    db_session.commit()
+
+    batch = load_price_arrays_batch(
+        ["PETR4.SA", "VALE3.SA", "ITUB4.SA", "XXXX3.SA"], start="2023-01-03", chunk_size=1, db=db_session
+    )
+
+    assert sorted(batch) == ["PETR4.SA", "VALE3.SA"]
+    pd.testing.assert_frame_equal(
+        batch["PETR4.SA"].to_frame(), load_price_frame("PETR4.SA", start="2023-01-03", db=db_session)
+    )
+    assert batch["VALE3.SA"].column("close").tolist() == [70.0]
@@ -0,0 +1,95 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from app.core.config import settings
+from app.db.models.price import Price
+from app.services.backtest_service import load_price_data_from_db
+from app.services.data_collector import update_prices_for_ticker
+from app.services.price_cache import price_cache
+from app.services.price_mirror import mirror_path, read_price_mirror, refresh_price_mirror
+
+
+@pytest.fixture
+def mirror_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PRICE_MIRROR_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _seed_prices(db_session, symbol_id):
+    db_session.add_all(
+        [
+            Price(symbol_id=symbol_id, date=pd.to_datetime("2023-01-02"), open=10, high=11, low=9, close=10, volume=1000),
+            Price(symbol_id=symbol_id, date=pd.to_datetime("2023-01-03"), open=11, high=12, low=10, close=11, volume=None),
+        ]
+    )
+    db_session.commit()
+
+
+def test_refresh_builds_and_appends_incrementally(mirror_dir, db_session, seed_symbol):
+    _seed_prices(db_session, seed_symbol.id)
+
+    assert refresh_price_mirror("PETR4.SA", db=db_session) == 2
+    assert mirror_path("PETR4.SA").exists()
+
+    db_session.add(Price(symbol_id=seed_symbol.id, date=pd.to_datetime("2023-01-04"), open=12, high=13, low=11, close=12, volume=1300))
+    db_session.commit()
+
+    assert refresh_price_mirror("PETR4.SA", db=db_session) == 1
+    mirrored = read_price_mirror("PETR4.SA")
+    assert len(mirrored) == 3
+    assert mirrored.column("close").tolist() == [10.0, 11.0, 12.0]
+
+
+def test_loader_reads_from_mirror(mirror_dir, monkeypatch, db_session, seed_symbol):
+    _seed_prices(db_session, seed_symbol.id)
+    refresh_price_mirror("PETR4.SA", db=db_session)
+    monkeypatch.setattr(price_cache, "max_symbols", 0)
+
+    expected = load_price_data_from_db("PETR4.SA")
+    db_session.execute(Price.__table__.delete())
+    df = load_price_data_from_db("PETR4.SA", start="2023-01-03")
+
+    pd.testing.assert_frame_equal(df, expected.iloc[1:])
+
+
+def test_ingest_refreshes_mirror(mocker, mirror_dir, db_session, seed_symbol):
+    _seed_prices(db_session, seed_symbol.id)
+    refresh_price_mirror("PETR4.SA", db=db_session)
+
+    mock_df = pd.DataFrame(
+        {"Open": [13.0], "High": [14.0], "Low": [12.0], "Close": [13.0], "Volume": [900]},
+        index=pd.to_datetime(["2023-01-05"]),
+    )
+    mocker.patch("app.services.data_collector.fetch_prices_yf", return_value=mock_df)
+    update_prices_for_ticker("PETR4.SA", db=db_session)
+
+    assert read_price_mirror("PETR4.SA").column("close").tolist() == [10.0, 11.0, 13.0]
+
+
+def test_mirror_reads_are_views_over_the_mapped_file(mirror_dir, db_session, seed_symbol):
+    _seed_prices(db_session, seed_symbol.id)
+    refresh_price_mirror("PETR4.SA", db=db_session)
+
+    mirrored = read_price_mirror("PETR4.SA")
+    for array in (mirrored.dates, mirrored.values):
+        assert not array.flags.owndata and array.base is not None
+        assert not array.flags.writeable
+    assert mirrored.values.shape == (2, 5)
+    assert mirrored.dates.tolist() == [pd.Timestamp("2023-01-02").date(), pd.Timestamp("2023-01-03").date()]
+    assert mirrored.column("volume")[1] != mirrored.column("volume")[1]  # NULL kept as NaN
+
+
+def test_old_layout_is_rebuilt(mirror_dir, db_session, seed_symbol):
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+
+    _seed_prices(db_session, seed_symbol.id)
+    old = pa.table({"date": pa.array([pd.Timestamp("2023-01-02").date()]), "close": pa.array([10.0])})
+    with pa.OSFile(str(mirror_path("PETR4.SA")), "wb") as sink, pa_ipc.new_file(sink, old.schema) as writer:
+        writer.write_table(old)
+
+    assert read_price_mirror("PETR4.SA") is None
+    assert refresh_price_mirror("PETR4.SA", db=db_session) == 2
+    assert len(read_price_mirror("PETR4.SA")) == 2
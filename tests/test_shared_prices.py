@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.shared_prices import SharedPriceStore, attach_frame
+
+
+def _frame(tz=None):
+    index = pd.date_range("2024-01-02 10:00", periods=5, freq="5min", tz=tz, name="datetime")
+    values = np.arange(25, dtype=np.float64).reshape(5, 5)
+    return pd.DataFrame(values, index=index, columns=["open", "high", "low", "close", "volume"])
+
+
+@pytest.mark.parametrize("tz", [None, "America/Sao_Paulo"])
+def test_attach_frame_is_a_read_only_view(tz):
+    df = _frame(tz)
+    with SharedPriceStore() as store:
+        handle = store.publish(df)
+        segment, attached = attach_frame(handle)
+        raw = np.frombuffer(segment.buf, dtype=np.float64)
+
+        pd.testing.assert_frame_equal(attached, df, check_freq=False)
+        assert np.shares_memory(attached["close"].to_numpy(), raw)
+        with pytest.raises(ValueError):
+            attached["close"].to_numpy()[0] = 1.0
+        del attached, raw
+        segment.close()
+
+
+def test_store_unlinks_segments_on_error():
+    with pytest.raises(RuntimeError):
+        with SharedPriceStore() as store:
+            handle = store.publish(_frame())
+            raise RuntimeError("worker failed")
+
+    with pytest.raises(FileNotFoundError):
+        attach_frame(handle)
@@ -0,0 +1,46 @@
+from datetime import date, datetime, timedelta
+
+import backtrader as bt
+
+from app.strategies.capture import BarCapture, ThinnedBarCapture, TradeCapture
+
+
+def _num(day: date) -> float:
+    return bt.date2num(datetime(day.year, day.month, day.day, 15, 30))
+
+
+def test_bar_capture_grows_past_capacity():
+    capture = BarCapture(capacity=1)
+    days = [date(2023, 1, day) for day in range(2, 30)]
+    for idx, day in enumerate(days):
+        capture.append(_num(day), float(idx), 2.0 * idx, 100.0 + idx)
+
+    positions = capture.positions()
+    assert len(positions) == len(days)
+    assert positions[-1] == {"date": days[-1], "position": 27.0, "value": 54.0, "equity": 127.0}
+    assert capture.equity_curve()[0] == {"date": days[0], "equity": 100.0}
+
+
+def test_trade_capture_attaches_pnl_to_latest_open_sell_of_the_day():
+    capture = TradeCapture(capacity=1)
+    day, other = _num(date(2023, 1, 2)), _num(date(2023, 1, 3))
+    capture.append(day, True, 10.0, 5.0)
+    capture.append(day, False, 11.0, -5.0)
+    capture.append(day, False, 12.0, -5.0)
+    capture.set_pnl(day, 7.5)
+    capture.set_pnl(other, 1.0)
+
+    assert [trade["pnl"] for trade in capture.trades()] == [None, None, 7.5]
+    assert capture.trades()[0] == {"date": date(2023, 1, 2), "operation": "buy", "price": 10.0, "size": 5.0, "pnl": None}
+
+
+def test_thinned_bar_capture_stays_bounded_and_keeps_the_latest_bar():
+    capture = ThinnedBarCapture(points=4)
+    days = [date(2023, 1, 1) + timedelta(days=idx) for idx in range(1000)]
+    for idx, day in enumerate(days):
+        capture.append(_num(day), float(idx), 0.0, 100.0 + idx)
+        assert capture.count <= 9
+
+    positions = [row["position"] for row in capture.positions()]
+    assert positions[:-1] == [float(idx * capture.stride) for idx in range(len(positions) - 1)]
+    assert positions[-1] == 999.0 and capture.equity_curve()[-1] == {"date": days[-1], "equity": 1099.0}
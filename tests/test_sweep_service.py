@@ -0,0 +1,85 @@
+import pytest
+from sqlalchemy import select
+
+from app.db.models.backtest_sweep_result import BacktestSweepResult
+from app.db.models.backtest_trade import BacktestTrade
+from app.services.sweep_service import expand_param_grid, run_sweep, stream_sweep
+
+
+def test_expand_param_grid_ranges_and_lists():
+    combos = expand_param_grid({"fast_period": [3, 5, 3], "atr_mult": {"start": 1.0, "stop": 1.2, "step": 0.1}})
+    assert len(combos) == 6
+    assert {combo["atr_mult"] for combo in combos} == {1.0, 1.1, 1.2}
+
+    with pytest.raises(ValueError):
+        expand_param_grid({"fast_period": {"start": 1, "stop": 100}}, max_combinations=10)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_run_sweep_ranks_and_persists_top_n(db_session, seed_random_walk, max_workers):
+    seed_random_walk("PETR4.SA", 150, seed=7)
+
+    summary = run_sweep(
+        ticker="PETR4.SA",
+        strategy_type="sma_cross",
+        param_grid={"fast_period": [3, 5], "slow_period": {"start": 10, "stop": 20, "step": 10}},
+        engine="vectorized",
+        top_n=2,
+        max_workers=max_workers,
+    )
+
+    assert summary["combinations"] == 4
+    assert summary["failed"] == 0
+    assert [row["rank"] for row in summary["top"]] == [1, 2]
+    sharpes = [row["sharpe"] if row["sharpe"] is not None else float("-inf") for row in summary["top"]]
+    assert sharpes == sorted(sharpes, reverse=True)
+
+    rows = db_session.execute(
+        select(BacktestSweepResult).where(BacktestSweepResult.sweep_id == summary["id"])
+    ).scalars().all()
+    assert len(rows) == 4
+    stored = [row.backtest_id for row in rows if row.backtest_id is not None]
+    assert len(stored) == 2
+    trades = db_session.execute(select(BacktestTrade.backtest_id).distinct()).scalars().all()
+    assert set(trades) <= set(stored)
+
+
+def test_stream_sweep_validates_before_streaming(db_session, seed_random_walk):
+    with pytest.raises(ValueError):
+        stream_sweep(ticker="PETR4.SA", strategy_type="sma_cross", param_grid={"fast_period": [3]}, rank_by="sortino")
+
+    seed_random_walk("PETR4.SA", 60, seed=7)
+    events = list(
+        stream_sweep(
+            ticker="PETR4.SA",
+            strategy_type="sma_cross",
+            param_grid={"fast_period": [3, 4]},
+            strategy_params={"slow_period": 10},
+            top_n=0,
+            max_workers=1,
+        )
+    )
+    assert [event["event"] for event in events] == ["result", "result", "summary"]
+    assert events[-1]["top"] == []
+
+
+def test_stream_sweep_ends_with_an_error_event_when_persisting_fails(seed_random_walk, monkeypatch):
+    seed_random_walk("PETR4.SA", 60, seed=7)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr("app.services.sweep_service._persist_sweep", fail)
+    kwargs = dict(
+        ticker="PETR4.SA",
+        strategy_type="sma_cross",
+        param_grid={"fast_period": [3, 4]},
+        strategy_params={"slow_period": 10},
+        max_workers=1,
+    )
+    events = list(stream_sweep(**kwargs))
+    assert [event["event"] for event in events] == ["result", "result", "error"]
+    assert events[-1]["detail"] == "disk full"
+
+    with pytest.raises(RuntimeError, match="disk full"):
+        run_sweep(**kwargs)
@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import select
+
+from app.db.models.backtest import Backtest
+from app.db.models.symbol import Symbol
+from app.services import universe_service
+from app.services.universe_service import run_universe
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_run_universe_all_symbols_ranks_and_persists(db_session, seed_random_walk, max_workers):
+    for seed, ticker in enumerate(["AAA3.SA", "BBB3.SA", "CCC3.SA"]):
+        seed_random_walk(ticker, 120, seed=seed)
+    db_session.add(Symbol(ticker="ZZZ3.SA", name="Sem precos", exchange="B3", currency="BRL"))
+    db_session.commit()
+
+    summary = run_universe(
+        strategy_type="sma_cross",
+        strategy_params={"fast_period": 3, "slow_period": 10},
+        engine="vectorized",
+        rank_by="return_pct",
+        max_workers=max_workers,
+        batch_size=2,
+    )
+
+    assert summary["tickers"] == 4
+    assert summary["completed"] == 3
+    assert summary["errors"] == [{"ticker": "ZZZ3.SA", "error": "Nenhum dado encontrado para ZZZ3.SA no periodo."}]
+    returns = [row["return_pct"] for row in summary["results"]]
+    assert returns == sorted(returns, reverse=True)
+    assert [row["rank"] for row in summary["results"]] == [1, 2, 3]
+
+    stored = db_session.execute(select(Backtest.ticker)).scalars().all()
+    assert sorted(stored) == ["AAA3.SA", "BBB3.SA", "CCC3.SA"]
+
+
+def test_run_universe_isolates_failed_batches(db_session, seed_random_walk, monkeypatch):
+    for seed, ticker in enumerate(["AAA3.SA", "BBB3.SA"]):
+        seed_random_walk(ticker, 120, seed=seed)
+    real_save = universe_service.save_backtest_result
+
+    def flaky_save(db, result):
+        if result["ticker"] == "BBB3.SA":
+            raise RuntimeError("falha ao gravar")
+        return real_save(db, result)
+
+    monkeypatch.setattr(universe_service, "save_backtest_result", flaky_save)
+
+    summary = run_universe(
+        strategy_type="sma_cross",
+        tickers=["AAA3.SA", "BBB3.SA"],
+        strategy_params={"fast_period": 3, "slow_period": 10},
+        max_workers=1,
+        batch_size=1,
+    )
+
+    assert [row["ticker"] for row in summary["results"]] == ["AAA3.SA"]
+    assert summary["errors"] == [{"ticker": "BBB3.SA", "error": "falha ao gravar"}]
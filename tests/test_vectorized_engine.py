@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.backtest_service import run_backtest_on_frame
+
+COMPARED = ["final_value", "metrics", "trades", "positions", "equity_curve"]
+
+
+def _frame(seed, n_bars=300, vol=0.02, freq="B"):
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0.0003, vol, n_bars)))
+    open_ = close * (1 + rng.normal(0, vol / 3, n_bars))
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) * (1 + rng.uniform(0, vol, n_bars)),
+            "low": np.minimum(open_, close) * (1 - rng.uniform(0, vol, n_bars)),
+            "close": close,
+            "volume": 1.0,
+        },
+        index=pd.date_range("2015-01-01", periods=n_bars, freq=freq, name="datetime"),
+    )
+
+
+def _assert_same(df, strategy_type, params, **kwargs):
+    expected = run_backtest_on_frame(df, ticker="X", strategy_type=strategy_type, strategy_params=params, **kwargs)
+    result = run_backtest_on_frame(
+        df, ticker="X", strategy_type=strategy_type, strategy_params=params, engine="vectorized", **kwargs
+    )
+    assert result["engine"] == "vectorized"
+    for key in COMPARED:
+        assert result[key] == expected[key], key
+    return result
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+@pytest.mark.parametrize("vol", [0.02, 0.002])
+@pytest.mark.parametrize(
+    "strategy_type,params",
+    [
+        ("sma_cross", {"fast_period": 5, "slow_period": 20}),
+        ("donchian_breakout", {"channel_period": 15}),
+        ("momentum", {"lookback": 10}),
+    ],
+)
+def test_vectorized_engine_matches_backtrader(seed, vol, strategy_type, params):
+    result = _assert_same(_frame(seed, vol=vol), strategy_type, params)
+    assert result["trades"]
+
+
+def test_vectorized_engine_replays_stale_stops_and_rejections():
+    # Tight stops and large risk: entries get margin-rejected and stops left
+    # behind by close() later open shorts, in both engines.
+    result = _assert_same(
+        _frame(1), "sma_cross", {"fast_period": 3, "slow_period": 8, "atr_mult": 0.5, "risk_per_trade": 0.2}
+    )
+    assert any(pos["position"] < 0 for pos in result["positions"])
+
+
+def test_vectorized_engine_ml_momentum_and_intraday():
+    params = {"lookback": 5, "train_window": 40, "entry_threshold": 0.5, "exit_threshold": 0.45}
+    _assert_same(_frame(4, n_bars=120, vol=0.01), "ml_momentum", params)
+    _assert_same(_frame(6, n_bars=200, vol=0.01), "ml_momentum", {**params, "retrain_every": 7, "warm_start": True})
+    _assert_same(_frame(7, n_bars=200, vol=0.01), "ml_momentum", {**params, "retrain_every": 3, "solver": "newton"})
+    _assert_same(_frame(7, n_bars=200, vol=0.01), "ml_momentum", {**params, "solver": "newton", "warm_start": True})
+    _assert_same(_frame(5, n_bars=400, vol=0.003, freq="5min"), "momentum", {"lookback": 10}, timeframe="5m")
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError, match="Engine"):
+        run_backtest_on_frame(_frame(0), ticker="X", strategy_type="momentum", engine="numba")
+
+
+@pytest.mark.parametrize("engine", ["backtrader", "vectorized"])
+def test_capture_levels_keep_the_full_metrics(engine):
+    df = _frame(2, n_bars=1200, vol=0.01)
+    kwargs = dict(ticker="X", strategy_type="sma_cross", strategy_params={"fast_period": 5, "slow_period": 20}, engine=engine)
+    full = run_backtest_on_frame(df, **kwargs)
+
+    runs = {level: run_backtest_on_frame(df, capture=level, **kwargs) for level in ("metrics_only", "trades", "equity_downsampled")}
+    for level, result in runs.items():
+        assert result["capture"] == level
+        assert result["final_value"] == full["final_value"]
+        assert result["metrics"] == full["metrics"], level
+
+    assert runs["metrics_only"]["trades"] == [] and runs["metrics_only"]["positions"] == []
+    assert runs["trades"]["trades"] == full["trades"] and runs["trades"]["equity_curve"] == []
+    downsampled = runs["equity_downsampled"]["positions"]
+    assert 1 < len(downsampled) <= 501 < len(full["positions"])
+    assert downsampled[0] == full["positions"][0] and downsampled[-1] == full["positions"][-1]
+
+
+def test_analyzers_report_the_post_run_figures():
+    df = _frame(3, n_bars=600, vol=0.01)
+    kwargs = dict(ticker="X", strategy_type="sma_cross", strategy_params={"fast_period": 5, "slow_period": 20})
+    post_run = run_backtest_on_frame(df, **kwargs)
+    analyzed = run_backtest_on_frame(df, analyzers=True, **kwargs)
+    assert analyzed["metrics"] == post_run["metrics"]
+    assert post_run["metrics"]["win_rate"] is not None and post_run["metrics"]["exposure"] > 0
+
+    with pytest.raises(ValueError, match="analyzers"):
+        run_backtest_on_frame(df, engine="vectorized", analyzers=True, **kwargs)
+
+
+def test_unknown_capture_level_is_rejected():
+    with pytest.raises(ValueError, match="captura"):
+        run_backtest_on_frame(_frame(0), ticker="X", strategy_type="momentum", capture="everything")
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.db.models.price import Price
+from app.services import walk_forward_service
+from app.services.walk_forward_service import build_folds, default_param_grid, run_walk_forward
+
+
+def test_build_folds_rolling_and_anchored():
+    rolling = build_folds(100, train_bars=40, test_bars=20)
+    assert [(f["train_start"], f["test_start"], f["test_end"]) for f in rolling] == [(0, 40, 60), (20, 60, 80), (40, 80, 100)]
+    anchored = build_folds(100, train_bars=40, test_bars=20, anchored=True)
+    assert {f["train_start"] for f in anchored} == {0}
+
+    with pytest.raises(ValueError):
+        build_folds(30, train_bars=40, test_bars=20)
+
+
+def test_default_param_grid_scales_registry_defaults():
+    assert default_param_grid("sma_cross") == {"fast_period": [5, 10, 15], "slow_period": [15, 30, 45]}
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_walk_forward_stitches_folds_and_resumes(db_session, seed_random_walk, tmp_path, monkeypatch, max_workers):
+    monkeypatch.setattr(settings, "WALK_FORWARD_CHECKPOINT_DIR", str(tmp_path))
+    seed_random_walk("PETR4.SA", 200, seed=3, drift=0.001)
+    kwargs = dict(
+        ticker="PETR4.SA",
+        strategy_type="sma_cross",
+        param_grid={"fast_period": [3, 5], "slow_period": [10, 15]},
+        train_bars=80,
+        test_bars=40,
+        engine="vectorized",
+        rank_by="return_pct",
+        max_workers=max_workers,
+    )
+
+    first = run_walk_forward(**kwargs)
+
+    assert len(first["folds"]) == 3
+    assert first["resumed_folds"] == 0
+    assert all(fold["best_params"]["fast_period"] in (3, 5) for fold in first["folds"])
+    growth = np.prod([1 + fold["test_return_pct"] for fold in first["folds"]])
+    assert first["equity_curve"][-1]["equity"] == pytest.approx(100000.0 * growth)
+    assert first["metrics"]["return_pct"] == pytest.approx(growth - 1)
+    assert (tmp_path / f"{first['job_id']}.json").exists()
+
+    monkeypatch.setattr(walk_forward_service, "_evaluate_fold", lambda *args: pytest.fail("fold rerun"))
+    second = run_walk_forward(**{**kwargs, "max_workers": 1})
+    assert second["resumed_folds"] == 3
+    assert second["equity_curve"] == first["equity_curve"]
+
+
+def test_revised_bar_invalidates_the_checkpoint(db_session, seed_random_walk, tmp_path, monkeypatch):
+    from app.services.price_cache import price_cache
+
+    monkeypatch.setattr(settings, "WALK_FORWARD_CHECKPOINT_DIR", str(tmp_path))
+    seed_random_walk("PETR4.SA", 200, seed=3, drift=0.001)
+    kwargs = dict(
+        ticker="PETR4.SA",
+        strategy_type="sma_cross",
+        param_grid={"fast_period": [3], "slow_period": [10]},
+        train_bars=80,
+        test_bars=40,
+        engine="vectorized",
+        max_workers=1,
+    )
+    first = run_walk_forward(**kwargs)
+
+    # A refresh revising a bar in the middle of the range (first, last and length unchanged).
+    revised = db_session.query(Price).order_by(Price.date).offset(100).first()
+    revised.close = revised.close * 1.05
+    db_session.commit()
+    price_cache.invalidate("PETR4.SA")
+
+    second = run_walk_forward(**kwargs)
+    assert second["job_id"] != first["job_id"]
+    assert second["resumed_folds"] == 0